@@ -14,21 +14,25 @@ import os
 import environ
 from pathlib import Path
 
-environ.Env.read_env('./.env')
-env = environ.Env()
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# .env читається один раз і не залежить від поточного каталогу; змінні
+# оточення процесу мають пріоритет над файлом. У продакшені файла може не
+# бути – тоді все береться з оточення (див. settings_production.py).
+env = environ.Env()
+if (BASE_DIR / '.env').is_file():
+    env.read_env(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-xsati*4k_ei1gkcs6z@%x=17rvj3@8+js)^9tzok&n*+v@#&)k'
+SECRET_KEY = env('DJANGO_SECRET_KEY', default='django-insecure-xsati*4k_ei1gkcs6z@%x=17rvj3@8+js)^9tzok&n*+v@#&)k')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env.bool('DJANGO_DEBUG', default=True)
 
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "*").split(",")
 CSRF_TRUSTED_ORIGINS = os.getenv(
@@ -48,16 +52,28 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'ci_cd_project2',
 ]
-DEFAULT_FILE_STORAGE = 'db_file_storage.storage.DatabaseFileStorage'
+# Медіафайли зберігаються в БД (таблиця MediaFile) з дисковим кешем,
+# див. ci_cd_project2/storage.py. DEFAULT_FILE_STORAGE Django 5.1+ ігнорує.
+STORAGES = {
+    'default': {
+        'BACKEND': 'ci_cd_project2.storage.CachedDatabaseStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
 
 MIDDLEWARE = [
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise з підтримкою async-ланцюжка (ASGI), див. ci_cd_project2/static_middleware.py
+    'ci_cd_project2.static_middleware.AsyncWhiteNoiseMiddleware',
+    'ci_cd_project2.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'ci_cd_project2.cart_store.CartMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -81,23 +97,99 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'CI_CD_Project.wsgi.application'
 
+# Параметри БД не обовʼязкові при імпорті: Django перевіряє їх лише при
+# першому зʼєднанні, тож collectstatic, check і makemigrations працюють без
+# секретів БД (наприклад, під час збирання образу).
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env('DB_NAME', default=''),
+        'USER': env('DB_USER', default=''),
+        'PASSWORD': env('DB_PASSWORD', default=''),
+        'HOST': env('DB_HOST', default=''),
+        'PORT': env('DB_PORT', default=''),
+        # Перевірка зʼєднання перед повторним використанням (для CONN_MAX_AGE > 0)
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Пул зʼєднань psycopg 3 (https://docs.djangoproject.com/en/5.2/ref/databases/#connection-pool).
+# Пул створюється ліниво в кожному процесі, тож воркери gunicorn не ділять
+# сокети після fork. Межа для PostgreSQL: кількість воркерів * DB_POOL_MAX_SIZE
+# має бути меншою за max_connections. З вимкненим пулом (DB_POOL=False)
+# зʼєднання тримаються CONN_MAX_AGE секунд.
+DB_POOL = env.bool('DB_POOL', default=True)
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': env.int('DB_POOL_MIN_SIZE', default=1),
+            'max_size': env.int('DB_POOL_MAX_SIZE', default=4),
+            # Скільки секунд запит чекає на вільне зʼєднання
+            'timeout': env.float('DB_POOL_TIMEOUT', default=10.0),
+            # Зʼєднання старші за max_lifetime замінюються, простоюючі понад max_idle – закриваються
+            'max_lifetime': env.float('DB_POOL_MAX_LIFETIME', default=1800.0),
+            'max_idle': env.float('DB_POOL_MAX_IDLE', default=300.0),
+            # Перевірку зʼєднання при видачі з пулу (ConnectionPool.check_connection)
+            # Django передає сам, бо CONN_HEALTH_CHECKS увімкнено; повторний
+            # 'check' тут – TypeError при створенні пулу
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = env.int('DB_CONN_MAX_AGE', default=60)
 
-import environ
 
-environ.Env.read_env('./.env')
-env = environ.Env()
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND=locmem – кеш у памʼяті процесу (за замовчуванням),
+# CACHE_BACKEND=file   – спільний для всіх воркерів кеш у CACHE_LOCATION.
 
-DATABASES = {
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+# Чи бачать записи кешу всі воркери (locmem – лише свій процес). Від цього
+# залежать кеш сторінок, таймаут кешу категорій і ETag API каталогу.
+CACHE_SHARED = CACHE_BACKEND != 'locmem'
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': env('DB_NAME'),
-        'USER': env('DB_USER'),
-        'PASSWORD': env('DB_PASSWORD'),
-        'HOST': env('DB_HOST'),
-        'PORT': env('DB_PORT'),
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache') if CACHE_BACKEND == 'file' else 'default'),
     }
 }
 
+# Кеш каталогу (категорії тощо), див. ci_cd_project2/catalog_cache.py. Locmem
+# інвалідується лише у своєму воркері, тож з ним записи живуть хвилину
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 60 * 60 if CACHE_SHARED else 60))
+# Кошик, див. ci_cd_project2/cart_store.py: DatabaseCartStore, CacheCartStore,
+# SignedCookieCartStore або SessionCartStore
+CART_STORE = os.getenv('CART_STORE', 'ci_cd_project2.cart_store.DatabaseCartStore')
+CART_COOKIE_NAME = 'cart_id'
+CART_CACHE_ALIAS = 'default'
+# Скільки секунд живе кошик без змін (cookie, ключі кешу, sweep_carts)
+CART_TTL = int(os.getenv('CART_TTL', 30 * 24 * 60 * 60))
+# Кеш сторінок каталогу для гостей, див. ci_cd_project2/page_cache.py. З locmem за
+# замовчуванням вимкнений: інвалідація дійшла б лише до воркера, що зберіг зміни,
+# а решта віддавали б застарілі сторінки до PAGE_CACHE_TIMEOUT.
+PAGE_CACHE_ENABLED = env.bool('PAGE_CACHE_ENABLED', default=CACHE_SHARED)
+# Скільки секунд сторінка свіжа і скільки ще віддається застарілою під час перебудови
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 5 * 60))
+PAGE_CACHE_STALE_TIMEOUT = int(os.getenv('PAGE_CACHE_STALE_TIMEOUT', 60))
+# Async view каталогу (home, good_detail, goods_by_category, category_list,
+# notifications) – лише під ASGI. Під WSGI urls.py бере синхронні варіанти: async
+# view там виконувався б через async_to_sync з переходом у інший потік на кожен запит.
+ASYNC_CATALOG_VIEWS = env.bool('ASYNC_CATALOG_VIEWS', default=os.getenv('SERVER_PROFILE', 'wsgi') == 'asgi')
+# Метрики Prometheus (/metrics), див. ci_cd_project2/metrics.py. METRICS_DIR – спільний
+# каталог знімків воркерів gunicorn (напр. /run/shop-metrics); gunicorn.conf.py за
+# замовчуванням задає .metrics у корені проєкту. Порожній – лише поточний процес
+# (runserver, команди manage.py).
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))
+# Якщо задано – /metrics вимагає заголовок "Authorization: Bearer <токен>" (для Prometheus);
+# якщо ні – /metrics доступний лише персоналу
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -140,6 +232,13 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Локальний кеш медіафайлів з БД (окремий на кожен сервер)
+MEDIA_CACHE_ROOT = Path(os.getenv('MEDIA_CACHE_ROOT', BASE_DIR / 'media_cache'))
+# Префікс internal-location у nginx, напр. '/_media_cache/'. Якщо задано,
+# файл віддає nginx через X-Accel-Redirect, інакше – Django через sendfile.
+MEDIA_CACHE_ACCEL_REDIRECT = os.getenv('MEDIA_CACHE_ACCEL_REDIRECT', '')
+# Процесів для генерації зменшених копій фото (0 – синхронно в поточному процесі)
+IMAGE_RENDITION_WORKERS = int(os.getenv('IMAGE_RENDITION_WORKERS', 2))
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -150,4 +249,3 @@ TEMPLATES[0]['DIRS'] = [BASE_DIR / 'ci_cd_project2' / 'templates']  # або а
 STATICFILES_STORAGE = (
     'whitenoise.storage.CompressedManifestStaticFilesStorage'
 )
-DATABASES['default']['CONN_MAX_AGE'] = 0
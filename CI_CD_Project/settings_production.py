@@ -0,0 +1,55 @@
+"""Налаштування продакшену: ``DJANGO_SETTINGS_MODULE=CI_CD_Project.settings_production``.
+
+Відрізняються від settings.py лише тим, що потрібно для продакшену:
+DEBUG вимкнено, секретний ключ – тільки з оточення, шаблони завантажуються
+кешованим завантажувачем явно (компілюються один раз на процес; воркери
+gunicorn компілюють їх ще до першого запиту, див. ci_cd_project2/warmup.py).
+
+Обовʼязкові значення оточення перевіряються при використанні, а не при
+імпорті: без ``DJANGO_SECRET_KEY`` Django відмовить при першому зверненні
+до ``settings.SECRET_KEY``, без ``DB_*`` – при першому зʼєднанні з БД.
+Тож збирання (collectstatic) не потребує секретів.
+
+Кеш за замовчуванням файловий (``CACHE_BACKEND=file``): інвалідація кешу
+сторінок і категорій має доходити до всіх воркерів gunicorn. Locmem
+дозволений лише з одним воркером (``WEB_CONCURRENCY=1``), інакше
+налаштування не імпортуються.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+# До імпорту settings: там від CACHE_BACKEND залежать CACHES і таймаути кешу
+os.environ.setdefault('CACHE_BACKEND', 'file')
+
+from .settings import *  # noqa: E402,F401,F403
+from .settings import CACHE_BACKEND, TEMPLATES, env  # noqa: E402
+
+DEBUG = False
+
+if CACHE_BACKEND == 'locmem' and os.getenv('WEB_CONCURRENCY') != '1':
+    raise ImproperlyConfigured(
+        "CACHE_BACKEND=locmem у продакшені: кожен воркер gunicorn мав би власний кеш. "
+        "Використайте спільний кеш (CACHE_BACKEND=file) або WEB_CONCURRENCY=1."
+    )
+
+# Порожній ключ Django відхиляє при першому зверненні
+SECRET_KEY = env('DJANGO_SECRET_KEY', default='')
+
+# Явний список завантажувачів несумісний з APP_DIRS
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
@@ -1,8 +1,6 @@
 from django.contrib import admin
 from django.http import HttpResponse
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,6 +9,4 @@ urlpatterns = [
     path('files/', include('db_file_storage.urls')),
 ]
 
-# для медіа-файлів
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Медіафайли віддає ci_cd_project2.views.media_file (з БД через дисковий кеш)
@@ -1,29 +1,37 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from django.urls import reverse
 from django.utils.html import format_html
+from .forms import StockLevelsForm
+from .images import rendition_url
 from .models import CustomUser, Category, Good, Notification, Order, OrderItem
+from .pagination import EstimatedCountPaginator
+from .stock import apply_stock_levels
 
-# Inlines for related objects
-class NotificationInline(admin.TabularInline):
-    model = Notification
-    extra = 0
-    fields = ('message', 'status', 'good', 'created_at')
-    readonly_fields = ('created_at',)
 
-class OrderInline(admin.TabularInline):
-    model = Order
-    extra = 0
-    fields = ('status', 'created_at')
-    readonly_fields = ('created_at',)
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist великої таблиці: без повного COUNT(*), загальна кількість – оцінка.
+
+    Кількість запитів на сторінку не залежить від розміру таблиці; рядки
+    мають бути підготовлені ``list_select_related``/анотаціями, а не
+    запитами з методів ``list_display``.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 
+# Inlines for related objects
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
-    fields = ('good', 'quantity', 'total_price')
-    readonly_fields = ('total_price',)
+    fields = ('good', 'quantity', 'unit_price', 'total_price')
+    readonly_fields = ('unit_price', 'total_price')
+    raw_id_fields = ('good',)
 
 # CustomUser Admin
 @admin.register(CustomUser)
-class CustomUserAdmin(admin.ModelAdmin):
+class CustomUserAdmin(LargeTableAdmin):
     list_display = ('id', 'username', 'email', 'phone_number', 'address', 'is_active', 'date_joined')
     list_filter = ('is_active', 'is_staff', 'is_superuser')
     search_fields = ('username', 'email', 'phone_number')
@@ -34,10 +42,26 @@ class CustomUserAdmin(admin.ModelAdmin):
         ('Contact Details', {'fields': ('phone_number', 'address')}),
         ('Permissions', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
         ('Important dates', {'fields': ('last_login', 'date_joined')}),
+        ('Activity', {'fields': ('orders_link', 'notifications_link')}),
     )
-    inlines = [NotificationInline, OrderInline]
+    # Замість інлайнів з усіма замовленнями і сповіщеннями – кількість
+    # і посилання на відфільтрований changelist (там є пагінація).
+    readonly_fields = ('orders_link', 'notifications_link')
     filter_horizontal = ('groups', 'user_permissions')
 
+    def _changelist_link(self, obj, model, related_name):
+        url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        total = getattr(obj, related_name).count()
+        return format_html('<a href="{}?user__id__exact={}">{}</a>', url, obj.pk, total)
+
+    def orders_link(self, obj):
+        return self._changelist_link(obj, Order, 'orders')
+    orders_link.short_description = 'Orders'
+
+    def notifications_link(self, obj):
+        return self._changelist_link(obj, Notification, 'notifications')
+    notifications_link.short_description = 'Notifications'
+
 # Category Admin
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -54,15 +78,16 @@ class CategoryAdmin(admin.ModelAdmin):
 
     def photo_thumb(self, obj):
         if obj.photo:
-            return format_html('<img src="{}" style="height: 75px;"/>', obj.photo.url)
+            return format_html('<img src="{}" style="height: 75px;"/>', rendition_url(obj, 160))
         return '-'
     photo_thumb.short_description = 'Preview'
 
 # Good Admin
 @admin.register(Good)
-class GoodAdmin(admin.ModelAdmin):
+class GoodAdmin(LargeTableAdmin):
     list_display = ('id', 'name', 'price', 'count', 'category', 'photo_thumb', 'created_at')
-    list_editable = ('price', 'count', 'category')
+    list_select_related = ('category',)
+    list_editable = ('price', 'category')
     list_filter = ('category', 'count', 'created_at')
     search_fields = ('name', 'description')
     prepopulated_fields = {'slug': ('name',)}
@@ -73,18 +98,66 @@ class GoodAdmin(admin.ModelAdmin):
         ('Image', {'fields': ('photo', 'photo_thumb')}),
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
-    filter_horizontal = ('subscribers',)
+    # Підписники довантажуються пошуком, а не всі користувачі у <select>
+    autocomplete_fields = ('subscribers',)
+    # Масове поповнення – дією, а не list_editable: один UPDATE і одна розсилка
+    actions = ('update_stock',)
 
     def photo_thumb(self, obj):
         if obj.photo:
-            return format_html('<img src="{}" style="height: 75px;"/>', obj.photo.url)
+            return format_html('<img src="{}" style="height: 75px;"/>', rendition_url(obj, 160))
         return '-'
     photo_thumb.short_description = 'Preview'
 
+    def get_changelist_form(self, request, **kwargs):
+        # list_editable category: без цього кожен рядок окремо вибирає всі
+        # категорії для свого <select>. Список будується один раз на сторінку.
+        form = super().get_changelist_form(request, **kwargs)
+        category_choices = []
+
+        class ChangelistForm(form):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                if not category_choices:
+                    category_choices.extend(self.fields['category'].choices)
+                self.fields['category'].choices = category_choices
+
+        return ChangelistForm
+
+    @admin.action(description='Оновити залишки вибраних товарів')
+    def update_stock(self, request, queryset):
+        """Проміжна сторінка з рядками ``slug,count``; застосовує їх через ``apply_stock_levels``."""
+        if 'apply' in request.POST:
+            form = StockLevelsForm(request.POST)
+            if form.is_valid():
+                result = apply_stock_levels(form.cleaned_data['levels'])
+                self.message_user(
+                    request,
+                    f"Змінено залишків: {result.updated}; знову в наявності: {len(result.restocked)}, "
+                    f"сповіщень: {result.notified}.",
+                )
+                if result.unknown:
+                    self.message_user(request, f"Не знайдено: {', '.join(result.unknown)}", messages.WARNING)
+                return None
+        else:
+            levels = queryset.order_by('slug').values_list('slug', 'count')
+            form = StockLevelsForm(initial={'levels': '\n'.join(f'{slug},{count}' for slug, count in levels)})
+        return TemplateResponse(request, 'admin/ci_cd_project2/good/update_stock.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Оновити залишки',
+            'opts': self.model._meta,
+            'form': form,
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across') == '1',
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+
 # Notification Admin
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(LargeTableAdmin):
     list_display = ('id', 'user', 'good', 'status', 'created_at')
+    list_select_related = ('user', 'good')
+    raw_id_fields = ('user', 'good')
     list_filter = ('status', 'created_at')
     search_fields = ('message',)
     readonly_fields = ('created_at', 'updated_at')
@@ -96,23 +169,42 @@ class NotificationAdmin(admin.ModelAdmin):
 
 # Order Admin
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'status', 'created_at', 'total_items')
+class OrderAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'status', 'created_at', 'items_count', 'total_price')
+    list_select_related = ('user',)
     list_filter = ('status', 'created_at')
     search_fields = ('user__username',)
     date_hierarchy = 'created_at'
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('total_price', 'items_count', 'created_at', 'updated_at')
     inlines = [OrderItemInline]
     raw_id_fields = ('user',)
 
-    def total_items(self, obj):
-        return obj.items.count()
-    total_items.short_description = 'Items Count'
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Позиції могли змінитись в інлайні
+        form.instance.refresh_totals()
 
 # OrderItem Admin
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(LargeTableAdmin):
     list_display = ('id', 'order', 'good', 'quantity', 'total_price', 'created_at')
+    # order.__str__ читає користувача, good.__str__ – товар
+    list_select_related = ('order__user', 'good')
     search_fields = ('good__name', 'order__id')
-    readonly_fields = ('total_price', 'created_at', 'updated_at')
+    readonly_fields = ('unit_price', 'total_price', 'created_at', 'updated_at')
     raw_id_fields = ('order', 'good')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.order.refresh_totals()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        obj.order.refresh_totals()
+
+    def delete_queryset(self, request, queryset):
+        # Дія «Видалити вибрані»: замовлення читаються до видалення позицій
+        orders = list(Order.objects.filter(pk__in=queryset.values('order_id')))
+        super().delete_queryset(request, queryset)
+        for order in orders:
+            order.refresh_totals()
@@ -0,0 +1,218 @@
+"""JSON API каталогу (лише читання).
+
+    GET /api/goods/                ?category=<slug>&in_stock=1&fields=...&after=...
+    GET /api/goods/<id>/           ?fields=...
+    GET /api/categories/           ?fields=...
+    GET /api/stock/                ?ids=1,2,3  (id, залишок, ціна)
+
+Кожна відповідь має ``ETag``. Зі спільним кешем (``CACHE_SHARED``) він
+будується з версії каталогу – лічильника ``pages`` з catalog_cache.py,
+який після коміту збільшують ті самі місця, що інвалідують кеш сторінок
+(сигнали Good/Category, оформлення замовлення, залишки, імпорт, копії
+фото). Тож опитування без змін коштує одне звернення до кешу і жодного
+запиту до БД. З locmem версія своя в кожному воркері, тому ETag
+обчислюється агрегатним запитом (``Max(updated_at)`` і ``Count`` по
+вибірці товарів та їхніх категорій). На ``If-None-Match`` без змін
+повертається 304 – без завантаження й серіалізації рядків.
+
+``?fields=id,name,price`` – лише вказані поля; з БД читаються тільки
+потрібні колонки.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+
+from .catalog_cache import get_version
+from .models import Category, Good
+from .page_cache import PAGES_NAMESPACE
+from .pagination import paginate
+
+API_PAGE_SIZE = 50
+STOCK_PAGE_SIZE = 500
+STOCK_MAX_IDS = 500
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+# Поле відповіді -> (колонки для only(), функція отримання значення)
+GOOD_FIELDS = {
+    'id': (('id',), lambda good: good.id),
+    'slug': (('slug',), lambda good: good.slug),
+    'name': (('name',), lambda good: good.name),
+    'price': (('price',), lambda good: str(good.price)),
+    'count': (('count',), lambda good: good.count),
+    'in_stock': (('count',), lambda good: good.count > 0),
+    'category': (('category__slug',), lambda good: good.category.slug),
+    'description': (('description',), lambda good: good.description),
+    'photo': (('photo',), lambda good: good.photo.url if good.photo else None),
+    'created_at': (('created_at',), lambda good: _iso(good.created_at)),
+    'updated_at': (('updated_at',), lambda good: _iso(good.updated_at)),
+}
+GOOD_DEFAULT_FIELDS = ('id', 'slug', 'name', 'price', 'in_stock', 'category', 'photo', 'updated_at')
+STOCK_FIELDS = ('id', 'count', 'in_stock', 'price')
+
+CATEGORY_FIELDS = {
+    'id': (('id',), lambda category: category.id),
+    'slug': (('slug',), lambda category: category.slug),
+    'name': (('name',), lambda category: category.name),
+    'photo': (('photo',), lambda category: category.photo.url if category.photo else None),
+    'updated_at': (('updated_at',), lambda category: _iso(category.updated_at)),
+}
+CATEGORY_DEFAULT_FIELDS = tuple(CATEGORY_FIELDS)
+
+
+class InvalidParameter(Exception):
+    pass
+
+
+def _selected_fields(request, available, default):
+    raw = request.GET.get('fields')
+    if not raw:
+        return default
+    fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in available]
+    if unknown or not fields:
+        raise InvalidParameter(
+            f"Невідомі поля: {', '.join(unknown)}. Доступні: {', '.join(available)}"
+        )
+    return fields
+
+
+def _only(queryset, available, fields, always=()):
+    columns = {column for name in fields for column in available[name][0]}
+    columns.update(always)
+    if any('__' in column for column in columns):
+        queryset = queryset.select_related('category')
+    return queryset.only(*columns)
+
+
+def _serialize(obj, available, fields):
+    return {name: available[name][1](obj) for name in fields}
+
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _conditional_json(request, fingerprint, build):
+    """304, якщо клієнт має актуальну версію, інакше ``JsonResponse(build())``.
+
+    ``fingerprint`` – стан даних (див. ``_catalog_state``); разом із повним
+    шляхом запиту (поля, фільтри, курсор) він дає ETag.
+    """
+    etag = quote_etag(hashlib.md5(f'{request.get_full_path()}|{fingerprint}'.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(build(), json_dumps_params={'ensure_ascii': False})
+    response['ETag'] = etag
+    # Кешувати можна, але перед використанням – перевірити ETag
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def _catalog_state(aggregate):
+    """Fingerprint для ETag: версія каталогу або, з locmem, ``aggregate()``."""
+    if settings.CACHE_SHARED:
+        return f'v{get_version(PAGES_NAMESPACE)}'
+    return aggregate()
+
+
+def _goods_state(queryset):
+    """Fingerprint вибірки товарів разом з їхніми категоріями."""
+    def aggregate():
+        state = queryset.order_by().aggregate(
+            updated=Max('updated_at'), total=Count('id'), category_updated=Max('category__updated_at'),
+        )
+        return '|'.join(str(state[key]) for key in ('updated', 'total', 'category_updated'))
+
+    return _catalog_state(aggregate)
+
+
+def _page_json(request, page, items):
+    return {
+        'results': items,
+        'next': page.next_url and request.build_absolute_uri(page.next_url),
+        'previous': page.previous_url and request.build_absolute_uri(page.previous_url),
+    }
+
+
+def _goods_list(request, queryset, default_fields, per_page):
+    try:
+        fields = _selected_fields(request, GOOD_FIELDS, default_fields)
+    except InvalidParameter as error:
+        return _error(str(error))
+    def build():
+        page = paginate(request, _only(queryset, GOOD_FIELDS, fields, always=('id', 'created_at')), per_page)
+        return _page_json(request, page, [_serialize(good, GOOD_FIELDS, fields) for good in page])
+
+    return _conditional_json(request, _goods_state(queryset), build)
+
+
+@require_safe
+def goods(request):
+    queryset = Good.objects.all()
+    if request.GET.get('category'):
+        queryset = queryset.filter(category__slug=request.GET['category'])
+    if request.GET.get('in_stock'):
+        queryset = queryset.filter(count__gt=0)
+    return _goods_list(request, queryset, GOOD_DEFAULT_FIELDS, API_PAGE_SIZE)
+
+
+@require_safe
+def stock(request):
+    """Залишки і ціни – для частого опитування партнерами."""
+    queryset = Good.objects.all()
+    if request.GET.get('ids'):
+        try:
+            ids = [int(value) for value in request.GET['ids'].split(',') if value.strip()]
+        except ValueError:
+            return _error("ids – список чисел через кому")
+        if len(ids) > STOCK_MAX_IDS:
+            return _error(f"Не більше {STOCK_MAX_IDS} ids за запит")
+        queryset = queryset.filter(id__in=ids)
+    return _goods_list(request, queryset, STOCK_FIELDS, STOCK_PAGE_SIZE)
+
+
+@require_safe
+def good_detail(request, good_id):
+    try:
+        fields = _selected_fields(request, GOOD_FIELDS, tuple(GOOD_FIELDS))
+    except InvalidParameter as error:
+        return _error(str(error))
+    def aggregate():
+        state = get_object_or_404(
+            Good.objects.filter(id=good_id).values('updated_at', 'category__updated_at')
+        )
+        return f"{state['updated_at']}|{state['category__updated_at']}"
+
+    def build():
+        good = get_object_or_404(_only(Good.objects.filter(id=good_id), GOOD_FIELDS, fields))
+        return _serialize(good, GOOD_FIELDS, fields)
+
+    return _conditional_json(request, _catalog_state(aggregate), build)
+
+
+@require_safe
+def categories(request):
+    try:
+        fields = _selected_fields(request, CATEGORY_FIELDS, CATEGORY_DEFAULT_FIELDS)
+    except InvalidParameter as error:
+        return _error(str(error))
+    def aggregate():
+        state = Category.objects.aggregate(updated=Max('updated_at'), total=Count('id'))
+        return f"{state['updated']}|{state['total']}"
+
+    def build():
+        queryset = _only(Category.objects.order_by('name', 'id'), CATEGORY_FIELDS, fields)
+        return {'results': [_serialize(category, CATEGORY_FIELDS, fields) for category in queryset]}
+
+    return _conditional_json(request, _catalog_state(aggregate), build)
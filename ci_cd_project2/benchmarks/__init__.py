@@ -0,0 +1,8 @@
+"""Бенчмарки view: кількість запитів, затримка і памʼять на кожен URL.
+
+    python manage.py benchmark_views --scale 10k [--repeat 20] [--output results.json]
+
+seed.py наповнює каталог обраного масштабу, scenarios.py описує запити
+(щонайменше один на кожен маршрут urls.py), runner.py проганяє їх через
+тестовий клієнт і порівнює результат з бюджетами budgets.json.
+"""
@@ -0,0 +1,216 @@
+"""Вимірювання сценаріїв і перевірка бюджетів.
+
+Для кожного сценарію: кількість SQL-запитів (максимум серед повторів),
+p50/p95 затримки в мілісекундах і пікова памʼять Python (tracemalloc,
+окремим запитом – трасування сповільнює виконання).
+
+Бюджети в budgets.json записані окремо для кожної СУБД
+(``{"postgresql": {сценарій: {...}}, "sqlite": {...}}``): кількість запитів
+залежить від бекенду – наприклад, ``approximate_count`` на PostgreSQL
+виконує ще й ``EXPLAIN``, а на малих таблицях після нього і точний
+``COUNT``. Тому бюджет запитів PostgreSQL знімається на масштабі smoke
+(його перевіряє тест), а затримки й памʼяті – на 1k::
+
+    manage.py benchmark_views --write-budgets
+    manage.py benchmark_views --scale smoke --check queries --write-budgets
+"""
+
+import json
+import math
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .. import urls
+from .scenarios import client_users, fill_cart
+
+BUDGETS_PATH = Path(__file__).with_name('budgets.json')
+METRICS = ('queries', 'p95_ms', 'peak_kb')
+# Запас для --write-budgets: затримка і памʼять залежать від машини,
+# кількість запитів – ні, тож вона записується як є
+HEADROOM = 3
+# Нижні межі бюджетів: запити в кілька мілісекунд дуже шумні
+MIN_P95_MS = 50
+MIN_PEAK_KB = 256
+
+
+@dataclass
+class Measurement:
+    name: str
+    url: str
+    status: int
+    queries: int
+    p50_ms: float
+    p95_ms: float
+    peak_kb: int
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def isolated_settings(media_cache_root):
+    """Окремі кеші й дисковий кеш медіа: дані бенчмарку відкочуються і не мають лишитись у кешах."""
+    return override_settings(
+        CACHES={
+            alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmark-{alias}'}
+            for alias in settings.CACHES
+        },
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        MEDIA_CACHE_ROOT=media_cache_root,
+        # Як у продакшені зі спільним кешем
+        CACHE_SHARED=True,
+        PAGE_CACHE_ENABLED=True,
+    )
+
+
+def uncovered_routes(scenarios):
+    """Імена маршрутів urls.py, для яких немає жодного сценарію."""
+    covered = {scenario.url_name for scenario in scenarios}
+    return sorted(pattern.name for pattern in urls.urlpatterns if pattern.name not in covered)
+
+
+def make_clients(fixtures):
+    clients = {}
+    for kind, user in client_users(fixtures).items():
+        clients[kind] = client = Client()
+        if user is not None:
+            client.force_login(user)
+    fill_cart(clients['shopper'], fixtures.cart_goods)
+    return clients
+
+
+def measure(scenario, client, fixtures, repeat=10, warmup=1):
+    send = getattr(client, scenario.method)
+    url = scenario.url()
+
+    def prepared():
+        return (scenario.prepare(client, fixtures) if scenario.prepare else None) or {}
+
+    durations, queries, status = [], 0, None
+    for attempt in range(warmup + repeat):
+        extra = prepared()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = send(url, scenario.data, **extra)
+            elapsed = time.perf_counter() - started
+        if attempt >= warmup:
+            durations.append(elapsed * 1000)
+            queries = max(queries, len(captured))
+            status = response.status_code
+
+    extra = prepared()
+    tracemalloc.start()
+    try:
+        send(url, scenario.data, **extra)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(
+        name=scenario.name, url=url, status=status, queries=queries,
+        p50_ms=round(percentile(durations, 50), 2), p95_ms=round(percentile(durations, 95), 2),
+        peak_kb=math.ceil(peak / 1024),
+    )
+
+
+def _read_budgets(path):
+    try:
+        with open(path, encoding='utf-8') as source:
+            return json.load(source)
+    except FileNotFoundError:
+        return {}
+
+
+def load_budgets(path=BUDGETS_PATH, vendor=None):
+    """Бюджети для СУБД ``vendor`` (за замовчуванням – поточного зʼєднання); ``None`` – не записані."""
+    return _read_budgets(path).get(vendor or connection.vendor)
+
+
+def check_budgets(measurements, budgets, metrics=METRICS):
+    """Список порушень: помилкові статуси, перевищені бюджети, сценарії без бюджету.
+
+    ``metrics`` – які метрики перевіряти (у тестах – лише ``queries``:
+    затримка й памʼять на спільних CI-машинах нестабільні).
+    """
+    violations = []
+    for measurement in measurements:
+        if measurement.status >= 400:
+            violations.append(f"{measurement.name}: HTTP {measurement.status}")
+        budget = budgets.get(measurement.name)
+        if budget is None:
+            violations.append(f"{measurement.name}: немає бюджету")
+            continue
+        for metric in metrics:
+            limit, value = budget.get(metric), getattr(measurement, metric)
+            if limit is not None and value > limit:
+                violations.append(f"{measurement.name}: {metric} = {value} > {limit}")
+    return violations
+
+
+def write_budgets(measurements, path=BUDGETS_PATH, vendor=None, metrics=METRICS):
+    """Записує бюджети поточної СУБД; бюджети інших СУБД лишаються.
+
+    Перезаписуються лише ``metrics``, решта метрик сценарію береться з
+    попереднього запису – так бюджет запитів можна зняти на іншому
+    масштабі, ніж бюджети затримки й памʼяті.
+    """
+    document = _read_budgets(path)
+    vendor = vendor or connection.vendor
+    previous = document.get(vendor, {})
+    document[vendor] = {}
+    for measurement in measurements:
+        recorded = {
+            'queries': measurement.queries,
+            'p95_ms': max(math.ceil(measurement.p95_ms * HEADROOM), MIN_P95_MS),
+            'peak_kb': max(math.ceil(measurement.peak_kb * HEADROOM), MIN_PEAK_KB),
+        }
+        budget = dict(previous.get(measurement.name, {}))
+        budget.update({metric: recorded[metric] for metric in metrics})
+        document[vendor][measurement.name] = budget
+    with open(path, 'w', encoding='utf-8') as target:
+        json.dump(document, target, indent=2, sort_keys=True)
+        target.write('\n')
+
+
+def results_document(scale, sizes, repeat, measurements, violations):
+    return {
+        'created_at': timezone.now().isoformat(),
+        'scale': scale,
+        'sizes': sizes,
+        'repeat': repeat,
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'machine': platform.machine(),
+        },
+        'results': {measurement.name: asdict(measurement) for measurement in measurements},
+        'violations': violations,
+    }
+
+
+def compare(previous, current):
+    """Рядки ``сценарій: метрика було -> стало (зміна %)`` для двох документів результатів."""
+    lines = []
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name)
+        if before is None:
+            continue
+        for metric in ('queries', 'p50_ms', 'p95_ms', 'peak_kb'):
+            old, new = before.get(metric), result[metric]
+            if old in (None, new):
+                continue
+            change = f" ({(new - old) / old * 100:+.0f}%)" if old else ''
+            lines.append(f"{name}: {metric} {old} -> {new}{change}")
+    return lines
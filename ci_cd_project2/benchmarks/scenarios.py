@@ -0,0 +1,130 @@
+"""Сценарії бенчмарку: один або кілька запитів на кожен маршрут urls.py.
+
+Клієнти сценаріїв:
+
+* ``anonymous`` – гість (сторінки каталогу йдуть через кеш сторінок;
+  сценарії ``*_uncached`` скидають його в ``prepare`` і вимірюють рендер);
+* ``shopper`` – користувач з великим кошиком;
+* ``regular`` – користувач з довгою історією замовлень і сповіщень;
+* ``staff`` – персонал;
+* ``buyer`` – окремий клієнт для оформлення замовлень і виходу: його стан
+  відновлюється перед кожним запитом у ``prepare``.
+"""
+
+from dataclasses import dataclass, field
+
+from django.urls import reverse
+
+from ..page_cache import invalidate_pages
+from ..pagination import encode_cursor
+
+
+@dataclass
+class Scenario:
+    name: str
+    url_name: str
+    client: str
+    args: tuple = ()
+    query: str = ''
+    method: str = 'get'
+    data: dict = field(default_factory=dict)
+    # prepare(client, fixtures) -> додаткові kwargs запиту; виконується до
+    # кожного запиту і не вимірюється
+    prepare: object = None
+
+    def url(self):
+        url = reverse(self.url_name, args=self.args)
+        return f'{url}?{self.query}' if self.query else url
+
+
+def fill_cart(client, goods):
+    for good in goods:
+        client.get(reverse('add_to_cart', args=[good.id]))
+
+
+def _login_with_cart(client, fixtures):
+    client.force_login(fixtures.shopper)
+    fill_cart(client, fixtures.cart_goods)
+
+
+def _uncached(client, fixtures):
+    invalidate_pages()
+
+
+def _etag(url_name):
+    def prepare(client, fixtures):
+        return {'HTTP_IF_NONE_MATCH': client.get(reverse(url_name))['ETag']}
+    return prepare
+
+
+def build_scenarios(fixtures):
+    good, category, order = fixtures.good, fixtures.category, fixtures.order
+    cart_good = fixtures.cart_goods[-1]
+    after = encode_cursor(cart_good.created_at, cart_good.id)
+    return [
+        # Каталог
+        Scenario('home', 'home', 'anonymous'),
+        Scenario('home_uncached', 'home', 'anonymous', prepare=_uncached),
+        Scenario('home_in_stock', 'home', 'anonymous', query='in_stock=1'),
+        Scenario('home_page_2', 'home', 'anonymous', query=f'after={after}'),
+        Scenario('home_user', 'home', 'regular'),
+        Scenario('good_detail', 'good_detail', 'anonymous', args=(good.id,)),
+        Scenario('good_detail_uncached', 'good_detail', 'anonymous', args=(good.id,), prepare=_uncached),
+        Scenario('good_detail_user', 'good_detail', 'regular', args=(good.id,)),
+        Scenario('category_goods', 'category_goods', 'anonymous', args=(category.slug,)),
+        Scenario('category_goods_uncached', 'category_goods', 'anonymous', args=(category.slug,),
+                 prepare=_uncached),
+        Scenario('category_goods_user', 'category_goods', 'regular', args=(category.slug,)),
+        Scenario('category_list', 'category_list', 'anonymous'),
+        Scenario('category_list_uncached', 'category_list', 'anonymous', prepare=_uncached),
+        Scenario('category_list_user', 'category_list', 'regular'),
+        Scenario('media_file', 'media_file', 'anonymous', args=(fixtures.photo_name,)),
+
+        # Автентифікація
+        Scenario('login', 'login', 'anonymous'),
+        Scenario('register', 'register', 'anonymous'),
+        Scenario('logout', 'logout', 'buyer', prepare=lambda client, fixtures: client.force_login(fixtures.shopper)),
+
+        # Кошик і замовлення
+        Scenario('cart', 'cart', 'shopper'),
+        Scenario('order_form', 'order', 'shopper'),
+        Scenario('add_to_cart', 'add_to_cart', 'shopper', args=(good.id,)),
+        Scenario('increase_quantity', 'increase_quantity', 'shopper', args=(cart_good.id,)),
+        Scenario('decrease_quantity', 'decrease_quantity', 'shopper', args=(cart_good.id,)),
+        Scenario('remove_from_cart', 'remove_from_cart', 'shopper', args=(cart_good.id,)),
+        Scenario('checkout', 'order', 'buyer', method='post', prepare=_login_with_cart),
+
+        # Особистий кабінет
+        Scenario('profile', 'profile', 'regular'),
+        Scenario('edit_profile', 'edit_profile', 'regular'),
+        Scenario('change_password', 'change_password', 'regular'),
+        Scenario('order_detail', 'order_detail', 'regular', args=(order.id,)),
+        Scenario('notify_availability', 'notify_availability', 'regular', args=(good.id,)),
+        Scenario('notifications', 'notifications', 'regular'),
+        Scenario('notifications_unread', 'notifications', 'regular', query='status=unread'),
+        Scenario('mark_notifications_read', 'mark_notifications_read', 'regular', method='post',
+                 data={'all': '1'}),
+
+        # JSON API
+        Scenario('api_goods', 'api_goods', 'anonymous'),
+        Scenario('api_goods_fields', 'api_goods', 'anonymous', query='fields=id,price&in_stock=1'),
+        Scenario('api_good_detail', 'api_good_detail', 'anonymous', args=(good.id,)),
+        Scenario('api_categories', 'api_categories', 'anonymous'),
+        Scenario('api_stock', 'api_stock', 'anonymous'),
+        Scenario('api_stock_not_modified', 'api_stock', 'anonymous', prepare=_etag('api_stock')),
+
+        # Службові
+        Scenario('db_pool_status', 'db_pool_status', 'staff'),
+        Scenario('metrics', 'metrics', 'staff'),
+    ]
+
+
+def client_users(fixtures):
+    """Користувач для кожного клієнта сценаріїв (None – гість)."""
+    return {
+        'anonymous': None,
+        'shopper': fixtures.shopper,
+        'regular': fixtures.regular,
+        'staff': fixtures.staff,
+        'buyer': None,
+    }
@@ -0,0 +1,93 @@
+"""Тестові дані для бенчмарків.
+
+Рядки створюються ``bulk_create`` без сигналів; команда benchmark_views
+виконує все в транзакції, яка потім відкочується.
+"""
+
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from ..models import Category, Good, Notification, Order, OrderItem
+
+User = get_user_model()
+
+# Масштаб -> кількість рядків. cart_lines – позицій у кошику покупця,
+# orders/notifications – історія одного «постійного» користувача.
+SCALES = {
+    'smoke': dict(goods=60, categories=3, cart_lines=5, orders=15, items_per_order=3, notifications=30),
+    '1k': dict(goods=1_000, categories=20, cart_lines=20, orders=50, items_per_order=5, notifications=200),
+    '10k': dict(goods=10_000, categories=100, cart_lines=50, orders=500, items_per_order=5, notifications=2_000),
+    '100k': dict(goods=100_000, categories=500, cart_lines=100, orders=5_000, items_per_order=5,
+                 notifications=20_000),
+}
+BATCH_SIZE = 2000
+
+
+@dataclass
+class Fixtures:
+    category: Category
+    good: Good
+    cart_goods: list
+    shopper: User
+    regular: User
+    staff: User
+    order: Order
+    photo_name: str
+
+
+def seed(goods, categories, cart_lines, orders, items_per_order, notifications):
+    tag = uuid.uuid4().hex[:8]
+    category_rows = Category.objects.bulk_create(
+        Category(name=f'Benchmark {i}', slug=f'bench-{tag}-{i}') for i in range(categories)
+    )
+    Good.objects.bulk_create(
+        (
+            Good(name=f'Benchmark good {i}', slug=f'bench-{tag}-{i}', price=Decimal('9.99'),
+                 # Кожен п'ятий товар розпродано – фільтр «в наявності» має що відсіяти
+                 count=0 if i % 5 == 0 else 1_000_000, category=category_rows[i % categories],
+                 description=f'Benchmark good {i}', search_document=f'benchmark good {i}')
+            for i in range(goods)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    in_stock = list(Good.objects.filter(slug__startswith=f'bench-{tag}-', count__gt=0).order_by('-id')[:cart_lines])
+
+    users = User.objects.bulk_create([
+        # Клієнти входять через force_login, пароль не потрібен
+        User(username=f'bench-{tag}-{role}', email=f'{role}@example.com', password='!', is_staff=role == 'staff')
+        for role in ('shopper', 'regular', 'staff')
+    ])
+    shopper, regular, staff = users
+
+    order_rows = Order.objects.bulk_create(
+        (Order(user=regular, status='delivered', items_count=items_per_order,
+               total_price=Decimal('9.99') * items_per_order) for _ in range(orders)),
+        batch_size=BATCH_SIZE,
+    )
+    OrderItem.objects.bulk_create(
+        (
+            OrderItem(order=order, good=in_stock[i % len(in_stock)], quantity=1, unit_price=Decimal('9.99'))
+            for order in order_rows for i in range(items_per_order)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Notification.objects.bulk_create(
+        (
+            Notification(user=regular, good=in_stock[i % len(in_stock)], message=f'Benchmark {i}',
+                         status=Notification.STATUS_UNREAD if i % 2 else Notification.STATUS_READ)
+            for i in range(notifications)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    User.objects.filter(pk=regular.pk).update(unread_notifications_count=notifications // 2)
+
+    photo_name = default_storage.save(f'goods/bench-{tag}.txt', ContentFile(b'benchmark' * 1024))
+    return Fixtures(
+        category=category_rows[0], good=in_stock[0], cart_goods=in_stock, shopper=shopper, regular=regular,
+        staff=staff, order=order_rows[-1], photo_name=photo_name,
+    )
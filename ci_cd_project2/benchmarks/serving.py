@@ -0,0 +1,138 @@
+"""Навантажувальне порівняння профілів gunicorn (gunicorn.conf.py): WSGI і ASGI.
+
+Сервер запускається окремим процесом на вільному порту з тією ж БД і
+налаштуваннями, що й команда; ``concurrency`` потоків-клієнтів, кожен зі
+своїм keep-alive зʼєднанням, протягом ``duration`` секунд по колу
+запитують ``paths``. ``async_views`` задає ASYNC_CATALOG_VIEWS сервера –
+так видно ціну async view каталогу під WSGI; ``cookie`` – сесію
+залогіненого користувача, для якого кеш сторінок не працює.
+"""
+
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .runner import percentile
+
+PROFILES = ('wsgi', 'asgi')
+# Пакет воркера, без якого профіль не запуститься
+PROFILE_REQUIREMENTS = {'asgi': 'uvicorn_worker'}
+STARTUP_TIMEOUT = 30
+
+
+class ServerError(RuntimeError):
+    pass
+
+
+@dataclass
+class ServingResult:
+    profile: str
+    views: str
+    user: str
+    requests: int
+    errors: int
+    seconds: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(profile, port, workers, async_views):
+    """Запускає gunicorn з профілем ``profile``; повертає процес, готовий приймати запити."""
+    env = {
+        **os.environ, 'SERVER_PROFILE': profile, 'WEB_CONCURRENCY': str(workers),
+        'ASYNC_CATALOG_VIEWS': str(async_views),
+        # Не спільний з робочим gunicorn каталог метрик: on_starting його очищає
+        'METRICS_DIR': os.path.join(tempfile.gettempdir(), f'benchmark-metrics-{port}'),
+    }
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', str(settings.BASE_DIR / 'gunicorn.conf.py'),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning'],
+        cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise ServerError(f"{profile}: gunicorn завершився з кодом {process.returncode}:\n"
+                              f"{process.stderr.read().decode(errors='replace')}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health/')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise ServerError(f"{profile}: сервер не відповів за {STARTUP_TIMEOUT} с")
+
+
+def stop_server(process):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=STARTUP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def _client(port, paths, headers, deadline, latencies, errors):
+    connection = None
+    number = 0
+    while time.monotonic() < deadline:
+        path = paths[number % len(paths)]
+        number += 1
+        started = time.perf_counter()
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            ok = False
+            connection = None
+        if ok:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors.append(path)
+
+
+def run_load(profile, port, paths, concurrency, duration, views='sync', cookie=None):
+    """``concurrency`` одночасних клієнтів протягом ``duration`` секунд."""
+    headers = {'Cookie': cookie} if cookie else {}
+    latencies, errors = [], []
+    started = time.monotonic()
+    deadline = started + duration
+    clients = [
+        threading.Thread(target=_client, args=(port, paths, headers, deadline, latencies, errors), daemon=True)
+        for _ in range(concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    seconds = time.monotonic() - started
+    ms = [latency * 1000 for latency in latencies] or [0]
+    return ServingResult(
+        profile=profile, views=views, user='logged-in' if cookie else 'anonymous', requests=len(latencies), errors=len(errors), seconds=round(seconds, 2),
+        rps=round(len(latencies) / seconds, 1), p50_ms=round(percentile(ms, 50), 2),
+        p95_ms=round(percentile(ms, 95), 2), p99_ms=round(percentile(ms, 99), 2),
+    )
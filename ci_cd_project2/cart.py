@@ -0,0 +1,90 @@
+"""Розрахунок кошика.
+
+Кошик – це словник ``{id товару: кількість}`` зі сховища кошика
+(``request.cart``, див. cart_store.py). ``resolve_cart``
+завантажує всі товари кошика одним запитом і рахує суми в памʼяті,
+тому вартість сторінки не залежить від кількості позицій.
+"""
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from .models import Good
+
+# Ключ кошика в сесії (SessionCartStore і перенесення старих кошиків)
+CART_SESSION_KEY = 'cart'
+
+
+@dataclass
+class CartLine:
+    good: Good
+    quantity: int
+    item_total: Decimal
+
+    @property
+    def over_stock(self):
+        """Замовлено більше, ніж є на складі."""
+        return self.quantity > self.good.count
+
+
+@dataclass
+class ResolvedCart:
+    lines: list = field(default_factory=list)
+    total: Decimal = Decimal('0.00')
+    # Ключі сесії, для яких товару вже немає або кількість некоректна
+    stale_keys: list = field(default_factory=list)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    @property
+    def over_stock(self):
+        return [line for line in self.lines if line.over_stock]
+
+    def cleaned(self):
+        """Кошик без «битих» записів – для збереження назад у сесію."""
+        return {str(line.good.pk): line.quantity for line in self.lines}
+
+
+def _parse_line(key, quantity):
+    try:
+        good_id, quantity = int(key), int(quantity)
+    except (TypeError, ValueError):
+        return None
+    if quantity <= 0:
+        return None
+    return good_id, quantity
+
+
+def parse_cart(cart):
+    """Повертає ``({ключ: (id товару, кількість)}, [некоректні ключі])``."""
+    parsed, invalid = {}, []
+    for key, quantity in cart.items():
+        line = _parse_line(key, quantity)
+        if line is None:
+            invalid.append(key)
+        else:
+            parsed[key] = line
+    return parsed, invalid
+
+
+def resolve_cart(cart):
+    """Перетворює сесійний кошик на позиції з товарами та сумами (1 запит)."""
+    parsed, invalid = parse_cart(cart)
+    resolved = ResolvedCart(stale_keys=invalid)
+
+    goods = Good.objects.in_bulk([good_id for good_id, _ in parsed.values()])
+
+    for key, (good_id, quantity) in parsed.items():
+        good = goods.get(good_id)
+        if good is None:
+            resolved.stale_keys.append(key)
+            continue
+        item_total = good.price * quantity
+        resolved.total += item_total
+        resolved.lines.append(CartLine(good=good, quantity=quantity, item_total=item_total))
+
+    return resolved
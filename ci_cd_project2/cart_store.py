@@ -0,0 +1,422 @@
+"""Сховища кошика.
+
+Кошик – це словник ``{id товару (str): кількість}``, як і раніше в сесії,
+але зберігається окремо від неї, тож додавання товару не переписує рядок
+сесії в БД. Реалізація задається налаштуванням ``CART_STORE``:
+
+* ``DatabaseCartStore`` – таблиця ``CartItem``, рядок на позицію
+  (за замовчуванням). Зміна кількості – один ``UPDATE ... SET quantity =
+  quantity + 1``.
+* ``CacheCartStore`` – кеш ``CART_CACHE_ALIAS``; кількість кожної позиції –
+  окремий ключ, що змінюється атомарним ``incr``.
+* ``SignedCookieCartStore`` – підписана cookie, без стану на сервері.
+* ``SessionCartStore`` – старий варіант у сесії (сумісність).
+
+Кошики БД і кешу ідентифікуються випадковим ключем у cookie
+``CART_COOKIE_NAME``; ``CartMiddleware`` створює сховище для запиту
+(``request.cart``) і виставляє cookie у відповідь.
+"""
+
+import re
+import secrets
+import time
+from abc import ABC, abstractmethod
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Least
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .cart import CART_SESSION_KEY, parse_cart
+from .models import CartItem, Good
+
+_CART_KEY_RE = re.compile(r'[A-Za-z0-9_-]{32}')
+
+# Блокування списку позицій CacheCartStore: скільки секунд воно живе (на
+# випадок падіння воркера) і скільки разів по INDEX_LOCK_WAIT його чекати
+INDEX_LOCK_TIMEOUT = 5
+INDEX_LOCK_ATTEMPTS = 50
+INDEX_LOCK_WAIT = 0.01
+
+
+class CartStore(ABC):
+    """Базовий інтерфейс сховища кошика одного відвідувача."""
+
+    def __init__(self, request):
+        self.request = request
+
+    @abstractmethod
+    def items(self):
+        """``{id товару (str): кількість}``."""
+
+    @abstractmethod
+    def increment(self, good_id, delta=1, maximum=None, create=True):
+        """Атомарно змінює кількість позиції на ``delta``.
+
+        ``maximum`` – верхня межа (залишок на складі); ``create=False`` – не
+        додавати позицію, якої ще немає. Позиція з кількістю 0 видаляється.
+        """
+
+    @abstractmethod
+    def remove(self, good_id):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    def replace(self, cart):
+        """Записує кошик цілком (імпорт зі старої сесії)."""
+        self.clear()
+        for key, (good_id, quantity) in parse_cart(cart)[0].items():
+            self.increment(good_id, quantity)
+
+    def discard(self, keys):
+        """Прибирає «биті» ключі (видалені товари, некоректні кількості)."""
+        for key in keys:
+            self.remove(key)
+
+    def process_response(self, response):
+        return response
+
+    @property
+    def has_state(self):
+        """Чи є в запиті ознака вже створеного кошика (для імпорту зі старої сесії)."""
+        return True
+
+
+class _KeyedCartStore(CartStore):
+    """Сховище на сервері, кошик якого знаходиться за ключем з cookie."""
+
+    def __init__(self, request):
+        super().__init__(request)
+        key = request.COOKIES.get(settings.CART_COOKIE_NAME, '')
+        self.key = key if _CART_KEY_RE.fullmatch(key) else None
+        self._touched = False
+
+    @property
+    def has_state(self):
+        return self.key is not None
+
+    def _write_key(self):
+        if self.key is None:
+            self.key = secrets.token_urlsafe(24)
+        self._touched = True
+        return self.key
+
+    def process_response(self, response):
+        # Ковзний термін: cookie подовжується з кожною зміною кошика
+        if self._touched:
+            response.set_cookie(
+                settings.CART_COOKIE_NAME, self.key, max_age=settings.CART_TTL,
+                httponly=True, samesite='Lax', secure=self.request.is_secure(),
+            )
+        return response
+
+
+class DatabaseCartStore(_KeyedCartStore):
+
+    def _lines(self, good_id=None):
+        lines = CartItem.objects.filter(cart_key=self.key)
+        if good_id is not None:
+            lines = lines.filter(good_id=good_id)
+        return lines
+
+    def items(self):
+        if self.key is None:
+            return {}
+        return {str(good_id): quantity for good_id, quantity in self._lines().values_list('good_id', 'quantity')}
+
+    def increment(self, good_id, delta=1, maximum=None, create=True):
+        self._write_key()
+        if maximum is not None and maximum <= 0 and delta > 0:
+            return
+        quantity = F('quantity') + delta
+        if maximum is not None:
+            quantity = Least(quantity, maximum)
+        # Лише рядки, що після зміни лишаються додатними
+        changed = self._lines(good_id).filter(quantity__gt=-delta).update(
+            quantity=quantity, updated_at=timezone.now(),
+        )
+        if changed:
+            return
+        if delta <= 0:
+            self._lines(good_id).delete()
+        elif create:
+            try:
+                with transaction.atomic():
+                    CartItem.objects.create(
+                        cart_key=self.key, good_id=good_id,
+                        quantity=delta if maximum is None else min(delta, maximum),
+                    )
+            except IntegrityError:
+                # Паралельний запит уже створив позицію
+                self._lines(good_id).update(quantity=quantity, updated_at=timezone.now())
+
+    def remove(self, good_id):
+        if self.key is not None:
+            self._touched = True
+            self._lines(good_id).delete()
+
+    def discard(self, keys):
+        # Позиції з видаленими товарами прибирає каскад FK, решта ключів – числа
+        ids = [int(key) for key in keys if str(key).isdigit()]
+        if ids and self.key is not None:
+            self._lines().filter(good_id__in=ids).delete()
+
+    def clear(self):
+        if self.key is not None:
+            self._lines().delete()
+
+    def replace(self, cart):
+        self.clear()
+        parsed = parse_cart(cart)[0].values()
+        existing = set(Good.objects.filter(id__in=[good_id for good_id, _ in parsed]).values_list('id', flat=True))
+        key = self._write_key()
+        CartItem.objects.bulk_create(
+            [CartItem(cart_key=key, good_id=good_id, quantity=quantity)
+             for good_id, quantity in parsed if good_id in existing],
+            ignore_conflicts=True,
+        )
+
+
+class CacheCartStore(_KeyedCartStore):
+    """Кошик у кеші: ``cart:<ключ>`` – список id товарів, ``cart:<ключ>:<id>`` – кількість.
+
+    Кількість змінюється атомарно (``incr``) на бекендах з атомарним
+    ``incr`` (locmem, Redis, Memcached). Список позицій оновлюється
+    читанням-записом лише при додаванні чи видаленні товару – під
+    блокуванням ``cache.add``, тож паралельні запити одного кошика не
+    затирають позиції одне одного.
+    """
+
+    def _cache(self):
+        return caches[settings.CART_CACHE_ALIAS]
+
+    def _index_key(self):
+        return f'cart:{self.key}'
+
+    def _line_key(self, good_id):
+        return f'cart:{self.key}:{good_id}'
+
+    def _ids(self):
+        return self._cache().get(self._index_key()) or []
+
+    def _set_ids(self, ids):
+        self._cache().set(self._index_key(), ids, settings.CART_TTL)
+
+    def _update_ids(self, change):
+        """Записує ``change(список id)`` під блокуванням списку."""
+        cache, lock = self._cache(), f'{self._index_key()}:lock'
+        for _ in range(INDEX_LOCK_ATTEMPTS):
+            if cache.add(lock, 1, INDEX_LOCK_TIMEOUT):
+                try:
+                    self._set_ids(change(self._ids()))
+                finally:
+                    cache.delete(lock)
+                return
+            time.sleep(INDEX_LOCK_WAIT)
+        # Блокування не звільняється (утримувач упав) – краще записати без нього,
+        # ніж не додати товар зовсім
+        self._set_ids(change(self._ids()))
+
+    def items(self):
+        if self.key is None:
+            return {}
+        ids = self._ids()
+        values = self._cache().get_many([self._line_key(good_id) for good_id in ids])
+        return {
+            str(good_id): values[self._line_key(good_id)]
+            for good_id in ids if values.get(self._line_key(good_id), 0) > 0
+        }
+
+    def increment(self, good_id, delta=1, maximum=None, create=True):
+        self._write_key()
+        cache, line = self._cache(), self._line_key(good_id)
+        good_id = str(good_id)
+        if cache.get(line) is None:
+            if delta <= 0 or not create or (maximum is not None and maximum <= 0):
+                return
+            if cache.add(line, 0, settings.CART_TTL):
+                self._update_ids(lambda ids: ids if good_id in ids else ids + [good_id])
+        try:
+            value = cache.incr(line, delta)
+        except ValueError:
+            # Ключ витіснили між get і incr
+            value = delta
+            cache.set(line, value, settings.CART_TTL)
+        if maximum is not None and value > maximum:
+            value = cache.decr(line, value - maximum)
+        if value <= 0:
+            self.remove(good_id)
+        else:
+            cache.touch(line, settings.CART_TTL)
+            cache.touch(self._index_key(), settings.CART_TTL)
+
+    def remove(self, good_id):
+        if self.key is None:
+            return
+        self._touched = True
+        good_id = str(good_id)
+        self._cache().delete(self._line_key(good_id))
+        if good_id in self._ids():
+            self._update_ids(lambda ids: [other for other in ids if other != good_id])
+
+    def clear(self):
+        if self.key is None:
+            return
+        cache = self._cache()
+        cache.delete_many([self._line_key(good_id) for good_id in self._ids()] + [self._index_key()])
+
+
+class _DictCartStore(CartStore):
+    """Кошик як словник у памʼяті запиту; підкласи його завантажують і зберігають."""
+
+    def __init__(self, request):
+        super().__init__(request)
+        self._cart = None
+
+    @abstractmethod
+    def _load(self):
+        pass
+
+    @abstractmethod
+    def _save(self, cart):
+        pass
+
+    @property
+    def cart(self):
+        if self._cart is None:
+            self._cart = self._load()
+        return self._cart
+
+    def items(self):
+        return dict(self.cart)
+
+    def increment(self, good_id, delta=1, maximum=None, create=True):
+        cart, good_id = self.cart, str(good_id)
+        if good_id not in cart and not create:
+            return
+        quantity = cart.get(good_id, 0) + delta
+        if maximum is not None:
+            quantity = min(quantity, maximum)
+        if quantity > 0:
+            cart[good_id] = quantity
+        else:
+            cart.pop(good_id, None)
+        self._save(cart)
+
+    def remove(self, good_id):
+        if self.cart.pop(str(good_id), None) is not None:
+            self._save(self.cart)
+
+    def discard(self, keys):
+        for key in keys:
+            self.cart.pop(key, None)
+        self._save(self.cart)
+
+    def clear(self):
+        self._cart = {}
+        self._save(self._cart)
+
+
+class SignedCookieCartStore(_DictCartStore):
+    """Кошик у підписаній cookie ``CART_COOKIE_NAME`` (клієнт не може підробити кількості)."""
+
+    salt = 'ci_cd_project2.cart'
+
+    def __init__(self, request):
+        super().__init__(request)
+        self._dirty = False
+
+    @property
+    def has_state(self):
+        return settings.CART_COOKIE_NAME in self.request.COOKIES
+
+    def _load(self):
+        value = self.request.COOKIES.get(settings.CART_COOKIE_NAME)
+        if not value:
+            return {}
+        try:
+            cart = signing.loads(value, salt=self.salt, max_age=settings.CART_TTL)
+        except signing.BadSignature:
+            return {}
+        return cart if isinstance(cart, dict) else {}
+
+    def _save(self, cart):
+        self._dirty = True
+
+    def process_response(self, response):
+        if self._dirty:
+            if self.cart:
+                response.set_cookie(
+                    settings.CART_COOKIE_NAME,
+                    signing.dumps(self.cart, salt=self.salt, compress=True),
+                    max_age=settings.CART_TTL, httponly=True, samesite='Lax',
+                    secure=self.request.is_secure(),
+                )
+            else:
+                response.delete_cookie(settings.CART_COOKIE_NAME, samesite='Lax')
+        return response
+
+
+class SessionCartStore(_DictCartStore):
+    """Кошик у сесії, як було раніше: кожна зміна переписує сесію."""
+
+    def _load(self):
+        return self.request.session.get(CART_SESSION_KEY, {})
+
+    def _save(self, cart):
+        self.request.session[CART_SESSION_KEY] = cart
+
+
+def get_cart_store(request):
+    return import_string(settings.CART_STORE)(request)
+
+
+class CartMiddleware:
+    """Додає ``request.cart`` і зберігає стан кошика у відповіді.
+
+    Кошик, що лишився в сесії з часів ``SessionCartStore``, переноситься в
+    нове сховище при першому запиті, в якому кошика ще немає.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.cart = store = get_cart_store(request)
+        if not isinstance(store, SessionCartStore) and not store.has_state:
+            self._import_session_cart(request, store)
+        response = self.get_response(request)
+        return store.process_response(response)
+
+    async def __acall__(self, request):
+        request.cart = store = get_cart_store(request)
+        if not isinstance(store, SessionCartStore) and not store.has_state:
+            # Читання сесії – запит до БД
+            await sync_to_async(self._import_session_cart)(request, store)
+        response = await self.get_response(request)
+        return store.process_response(response)
+
+    def _import_session_cart(self, request, store):
+        session = getattr(request, 'session', None)
+        if session is None or settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            return
+        legacy = session.get(CART_SESSION_KEY)
+        if legacy:
+            store.replace(legacy)
+        if legacy is not None:
+            del session[CART_SESSION_KEY]
@@ -0,0 +1,61 @@
+"""Кеш даних каталогу.
+
+Ключі кешу містять номер версії простору імен (наприклад, ``categories``).
+Інвалідація – це збільшення версії: старі записи просто перестають
+читатися і витісняються за таймаутом, тож не треба знати всі ключі.
+
+Бекенд задається налаштуванням ``CACHES`` (locmem або файловий кеш).
+Locmem живе в памʼяті одного процесу, тому з кількома воркерами gunicorn
+інвалідація бачна лише у воркері, де змінили дані; решта віддає старий
+список категорій до ``CATALOG_CACHE_TIMEOUT`` (з locmem за замовчуванням
+60 с, зі спільним кешем – година). Продакшен за замовчуванням використовує
+файловий кеш (див. settings_production.py), тож там інвалідація спільна.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import cache_lookup
+from .models import Category
+
+
+def _cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def _version_key(namespace):
+    return f'catalog:{namespace}:version'
+
+
+def get_version(namespace):
+    cache = _cache()
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), 1, timeout=None)
+        version = cache.get(_version_key(namespace), 1)
+    return version
+
+
+def bump_version(namespace):
+    """Інвалідує всі записи простору імен."""
+    cache = _cache()
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 2, timeout=None)
+
+
+def versioned_key(namespace, *parts):
+    return ':'.join(['catalog', namespace, f'v{get_version(namespace)}', *map(str, parts)])
+
+
+def get_categories():
+    """Список усіх категорій (з кешу або з БД)."""
+    cache = _cache()
+    key = versioned_key('categories', 'all')
+    categories = cache.get(key)
+    cache_lookup('categories', 'miss' if categories is None else 'hit')
+    if categories is None:
+        categories = list(Category.objects.all())
+        cache.set(key, categories, settings.CATALOG_CACHE_TIMEOUT)
+    return categories
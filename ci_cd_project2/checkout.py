@@ -0,0 +1,103 @@
+"""Оформлення замовлення.
+
+Уся операція виконується в одній транзакції:
+
+1. товари кошика блокуються одним ``SELECT ... FOR UPDATE`` у порядку id,
+   щоб паралельні замовлення не взаємоблокувались;
+2. залишки зменшуються одним умовним ``UPDATE`` з ``F()``-виразами
+   (без read-modify-write і без ``post_save`` на кожну позицію);
+3. позиції замовлення вставляються одним ``bulk_create`` з ціною на момент
+   замовлення, а сума й кількість позицій записуються у ``Order``.
+
+Кількість запитів не залежить від кількості позицій у кошику.
+"""
+
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.utils import timezone
+
+from .cart import parse_cart
+from .models import Good, Order, OrderItem
+from .page_cache import invalidate_pages
+
+ORDER_STATUS_PENDING = "Очікується підтвердження"
+
+
+class CheckoutError(Exception):
+    """Замовлення не можна оформити (порожній кошик, товару немає тощо)."""
+
+
+@dataclass
+class AdjustedLine:
+    good: Good
+    requested: int
+    ordered: int
+
+
+@dataclass
+class CheckoutResult:
+    order: Order
+    # Позиції, кількість яких зменшено до наявного залишку
+    adjusted: list = field(default_factory=list)
+
+
+def place_order(user, cart):
+    """Створює замовлення з кошика та списує залишки. Повертає ``CheckoutResult``."""
+    parsed, _invalid = parse_cart(cart)
+    requested = {}
+    for good_id, quantity in parsed.values():
+        requested[good_id] = requested.get(good_id, 0) + quantity
+    if not requested:
+        raise CheckoutError("Ваш кошик порожній!")
+
+    with transaction.atomic():
+        goods = Good.objects.select_for_update().filter(id__in=requested).order_by('id')
+
+        lines, adjusted = [], []
+        for good in goods:
+            wanted = requested[good.id]
+            quantity = min(wanted, good.count)
+            if quantity < wanted:
+                adjusted.append(AdjustedLine(good=good, requested=wanted, ordered=quantity))
+            if quantity > 0:
+                lines.append((good, quantity))
+
+        if not lines:
+            raise CheckoutError("Жодного товару з кошика немає в наявності.")
+
+        # Рядки вже заблоковані, але умова count >= quantity залишається
+        # запобіжником: якщо хоч одна позиція не списалась – відкат.
+        condition = Q()
+        for good, quantity in lines:
+            condition |= Q(id=good.id, count__gte=quantity)
+        updated = Good.objects.filter(condition).update(
+            count=Case(
+                *(When(id=good.id, then=F('count') - quantity) for good, quantity in lines),
+                default=F('count'),
+                output_field=PositiveIntegerField(),
+            ),
+            updated_at=timezone.now(),
+        )
+        if updated != len(lines):
+            raise CheckoutError("Залишки змінилися під час оформлення. Спробуйте ще раз.")
+
+        # Ціни беруться із заблокованих рядків – ті самі, що бачить списання
+        order = Order.objects.create(
+            user=user,
+            status=ORDER_STATUS_PENDING,
+            total_price=sum(good.price * quantity for good, quantity in lines),
+            items_count=len(lines),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, good=good, quantity=quantity, unit_price=good.price)
+            for good, quantity in lines
+        ])
+        # Залишки змінено UPDATE-ом без post_save – сторінки каталогу скидаємо вручну
+        transaction.on_commit(invalidate_pages)
+
+    for good, quantity in lines:
+        good.count -= quantity
+
+    return CheckoutResult(order=order, adjusted=adjusted)
@@ -1,6 +1,9 @@
-from .models import Category
+from django.utils.functional import SimpleLazyObject
+
+from .catalog_cache import get_categories
 
 def categories_processor(request):
+    # Ліниво: кеш/БД читаються лише якщо шаблон звернувся до all_categories
     return {
-        'all_categories': Category.objects.all()
+        'all_categories': SimpleLazyObject(get_categories)
     }
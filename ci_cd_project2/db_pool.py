@@ -0,0 +1,27 @@
+"""Статистика пулів зʼєднань з БД (psycopg_pool) поточного процесу.
+
+Кожен воркер gunicorn має власний пул, тож цифри стосуються лише процесу,
+який обробив запит (його PID повертається разом зі статистикою).
+"""
+
+from django.db import connections
+
+
+def pool_stats():
+    """``{alias: статистика}`` для підключень з увімкненим пулом.
+
+    До лічильників psycopg_pool (``pool_size``, ``pool_available``,
+    ``requests_waiting``, ``requests_wait_ms`` ...) додаються ``in_use`` і
+    ``saturation`` – частка зайнятих зʼєднань від ``pool_max``.
+    """
+    result = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        stats = pool.get_stats()
+        in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+        stats['in_use'] = in_use
+        stats['saturation'] = round(in_use / stats['pool_max'], 3) if stats.get('pool_max') else 0
+        result[alias] = stats
+    return result
@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm, UserChangeForm
 from django.contrib.auth import get_user_model, authenticate
 from .models import CustomUser
+from .stock import StockFileError, parse_stock_csv
 
 User = get_user_model()
 
@@ -26,3 +27,14 @@ class CustomUserChangeForm(UserChangeForm):
     class Meta:
         model = CustomUser
         fields = ['username', 'phone_number', 'address']
+
+
+class StockLevelsForm(forms.Form):
+    """Залишки для дії адмінки «Оновити залишки»: рядки ``slug,count``."""
+    levels = forms.CharField(label='Залишки (slug,count)', widget=forms.Textarea(attrs={'rows': 20, 'cols': 60}))
+
+    def clean_levels(self):
+        try:
+            return parse_stock_csv(self.cleaned_data['levels'].splitlines())
+        except StockFileError as error:
+            raise forms.ValidationError(str(error))
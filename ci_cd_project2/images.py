@@ -0,0 +1,231 @@
+"""Зменшені копії (renditions) фото товарів і категорій.
+
+Для кожного фото генеруються варіанти шириною ``RENDITION_WIDTHS`` у форматах
+WebP та JPEG. Кодування виконується Pillow у пулі процесів; результат
+зберігається у default storage, а імена файлів – у полі ``photo_renditions``
+моделі у вигляді ``{"webp": {"320": "renditions/...-320w.webp"}, ...}``.
+
+Шаблонний тег ``responsive_image`` (templatetags/image_tags.py) будує з них
+``<picture>`` із ``srcset`` та ``loading="lazy"``.
+
+Після завантаження фото (signals.py) генерація ставиться в чергу фонового
+потоку (``schedule_renditions``) і не затримує відповідь адмінки. Копії,
+не згенеровані через перезапуск воркера, доробляє ``generate_renditions``.
+"""
+
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.utils import timezone
+
+from .models import Category, Good
+from .page_cache import invalidate_pages
+
+logger = logging.getLogger(__name__)
+
+RENDITION_WIDTHS = (160, 320, 640)
+# розширення -> (формат Pillow, MIME-тип)
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+RENDITION_QUALITY = 80
+# photo_renditions, коли копій немає і не буде: фото вужче за всі RENDITION_WIDTHS
+# або не обробилось. На відміну від {} («ще не згенеровано») generate_renditions
+# не бере такі фото повторно (лише з --force).
+NO_RENDITIONS = {'_none': True}
+
+_pool = None
+_background = None
+
+
+def render_rendition(source, width, ext):
+    """Кодує одну копію. Виконується в дочірньому процесі, тож працює лише з байтами.
+
+    Повертає ``None``, якщо оригінал вужчий за ``width`` (не збільшуємо).
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(source)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width < width:
+            return None
+        height = max(round(image.height * width / image.width), 1)
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        pil_format, _mimetype = RENDITION_FORMATS[ext]
+        if pil_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, 'white')
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            else:
+                image = image.convert('RGB')
+
+        output = io.BytesIO()
+        image.save(output, pil_format, quality=RENDITION_QUALITY, optimize=True)
+        return output.getvalue()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn, а не fork: воркер gunicorn має відкриті зʼєднання з БД і потоки
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_RENDITION_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _pool
+
+
+def _submit(source, width, ext):
+    if settings.IMAGE_RENDITION_WORKERS:
+        return _get_pool().submit(render_rendition, source, width, ext)
+    return ImmediateResult(render_rendition, source, width, ext)
+
+
+class ImmediateResult:
+    """Синхронний аналог Future: ``func(*args)`` виконується одразу.
+
+    Для коду, що працює і з пулом, і без нього (IMAGE_RENDITION_WORKERS=0,
+    ``import_catalog --workers 0``).
+    """
+
+    def __init__(self, func, *args):
+        try:
+            self._value, self._error = func(*args), None
+        except Exception as error:
+            self._value, self._error = None, error
+
+    def result(self):
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+def rendition_name(source_name, width, ext):
+    stem = os.path.splitext(source_name)[0]
+    return f'renditions/{stem}-{width}w.{ext}'
+
+
+def rendition_names(renditions):
+    return [
+        name
+        for by_width in (renditions or {}).values() if isinstance(by_width, dict)
+        for name in by_width.values()
+    ]
+
+
+def rendition_url(obj, width, ext='jpeg'):
+    """URL копії, найближчої до ``width`` (не вужчої), або оригіналу фото."""
+    by_width = (obj.photo_renditions or {}).get(ext) or {}
+    if not by_width:
+        return obj.photo.url
+    widths = sorted(int(w) for w in by_width)
+    chosen = next((w for w in widths if w >= width), widths[-1])
+    return default_storage.url(by_width[str(chosen)])
+
+
+def generate_renditions(instances, field_name='photo'):
+    """Генерує копії для кількох обʼєктів паралельно і зберігає їх у ``photo_renditions``.
+
+    Повертає кількість оброблених обʼєктів.
+    """
+    jobs = []
+    for instance in instances:
+        field_file = getattr(instance, field_name)
+        if not field_file:
+            continue
+        try:
+            with field_file.open('rb') as source_file:
+                source = source_file.read()
+        except (FileNotFoundError, ValueError):
+            logger.warning("Фото %s не знайдено у сховищі", field_file.name)
+            continue
+        futures = {
+            (ext, width): _submit(source, width, ext)
+            for ext in RENDITION_FORMATS
+            for width in RENDITION_WIDTHS
+        }
+        jobs.append((instance, field_file.name, futures))
+
+    processed = 0
+    for instance, source_name, futures in jobs:
+        renditions = {}
+        for (ext, width), future in futures.items():
+            try:
+                data = future.result()
+            except Exception:
+                logger.warning("Не вдалося обробити фото %s", source_name, exc_info=True)
+                renditions = {}
+                break
+            if data is None:
+                continue
+            content = ContentFile(data)
+            content.content_type = RENDITION_FORMATS[ext][1]
+            name = default_storage.save(rendition_name(source_name, width, ext), content)
+            renditions.setdefault(ext, {})[str(width)] = name
+
+        renditions = renditions or dict(NO_RENDITIONS)
+        # update(), а не save(): без повторних сигналів post_save
+        type(instance).objects.filter(pk=instance.pk).update(photo_renditions=renditions, updated_at=timezone.now())
+        instance.photo_renditions = renditions
+        processed += 1
+    if processed:
+        invalidate_pages()
+    return processed
+
+
+def delete_unused_photo(name, renditions=()):
+    """Видаляє фото (рядок MediaFile і дисковий кеш) та його копії, якщо на
+    імʼя більше не посилається жоден товар чи категорія (імпорт каталогу
+    повторно використовує імена файлів)."""
+    if Good.objects.filter(photo=name).exists() or Category.objects.filter(photo=name).exists():
+        return
+    for unused in (name, *renditions):
+        default_storage.delete(unused)
+
+
+def regenerate_renditions(instances, outdated=()):
+    """Видаляє файли ``outdated`` і генерує копії заново.
+
+    Імена копій залежать лише від імені фото, тож старі файли видаляються
+    першими: інакше сховище дало б новим копіям інші імена, а старі лишились би.
+    """
+    for name in outdated:
+        default_storage.delete(name)
+    return generate_renditions(instances)
+
+
+def _regenerate_in_background(instances, outdated):
+    try:
+        regenerate_renditions(instances, outdated)
+    except Exception:
+        logger.exception("Не вдалося згенерувати копії фото")
+    finally:
+        # Зʼєднання цього потоку не обслуговує запити – повертаємо його
+        connections.close_all()
+
+
+def schedule_renditions(instances, outdated=()):
+    """Видаляє ``outdated`` і генерує копії для ``instances`` у фоновому потоці.
+
+    Повертає Future; з ``IMAGE_RENDITION_WORKERS=0`` все виконується одразу
+    в поточному потоці і повертається ``None``.
+    """
+    global _background
+    if not settings.IMAGE_RENDITION_WORKERS:
+        regenerate_renditions(instances, outdated)
+        return None
+    if _background is None:
+        # Один потік: він лише чекає на пул процесів і зберігає результати
+        _background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='renditions')
+    return _background.submit(_regenerate_in_background, list(instances), list(outdated))
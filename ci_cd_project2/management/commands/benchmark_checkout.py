@@ -0,0 +1,103 @@
+"""Навантажувальна перевірка оформлення замовлень.
+
+Створює тимчасовий товар з обмеженим залишком, запускає кілька потоків,
+які одночасно оформлюють замовлення, і перевіряє, що товар не продано
+понад залишок, а кількість запитів на замовлення стала.
+
+Призначено для staging-бази на PostgreSQL (SQLite не підтримує
+``SELECT ... FOR UPDATE`` і серіалізує записи).
+
+    python manage.py benchmark_checkout --stock 50 --buyers 20 --quantity 3
+"""
+
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ...checkout import CheckoutError, place_order
+from ...models import Category, Good, Order
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Паралельні замовлення одного товару: перевірка на перепродаж і кількість запитів."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=50, help='Початковий залишок товару.')
+        parser.add_argument('--buyers', type=int, default=20, help='Кількість паралельних покупців.')
+        parser.add_argument('--quantity', type=int, default=3, help='Скільки одиниць купує кожен.')
+        parser.add_argument('--lines', type=int, default=5, help='Позицій у кошику кожного покупця.')
+
+    def handle(self, *args, **options):
+        stock, buyers = options['stock'], options['buyers']
+        quantity, extra_lines = options['quantity'], max(options['lines'] - 1, 0)
+        tag = uuid.uuid4().hex[:8]
+
+        category = Category.objects.create(slug=f'bench-{tag}', name='Benchmark')
+        contested = Good.objects.create(
+            slug=f'bench-{tag}', name='Benchmark good', price=Decimal('1.00'),
+            count=stock, category=category, description='benchmark',
+        )
+        # Додаткові позиції з великим запасом – перевіряємо, що кількість
+        # запитів не росте разом з розміром кошика.
+        filler = [
+            Good.objects.create(
+                slug=f'bench-{tag}-{i}', name=f'Benchmark filler {i}', price=Decimal('1.00'),
+                count=buyers * quantity, category=category, description='benchmark',
+            )
+            for i in range(extra_lines)
+        ]
+        users = [
+            User.objects.create_user(username=f'bench-{tag}-{i}', password=None)
+            for i in range(buyers)
+        ]
+        cart = {str(good.id): quantity for good in [contested, *filler]}
+
+        ordered, query_counts, failures = [], [], []
+        lock = threading.Lock()
+        start = threading.Barrier(buyers)
+
+        def buy(user):
+            try:
+                start.wait()
+                with CaptureQueriesContext(connection) as queries:
+                    result = place_order(user, cart)
+                bought = sum(item.quantity for item in result.order.items.filter(good=contested))
+                with lock:
+                    ordered.append(bought)
+                    query_counts.append(len(queries))
+            except CheckoutError as error:
+                with lock:
+                    failures.append(str(error))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in users]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - began
+
+        contested.refresh_from_db()
+        sold = sum(ordered)
+        try:
+            self.stdout.write(f"Замовлень: {len(ordered)}, відмов: {len(failures)}, час: {elapsed:.3f} с")
+            self.stdout.write(f"Продано: {sold} із {stock}, залишок: {contested.count}")
+            if query_counts:
+                self.stdout.write(f"Запитів на замовлення: min={min(query_counts)} max={max(query_counts)}")
+            if sold > stock or contested.count != stock - sold:
+                raise CommandError("Виявлено перепродаж: залишок не збігається з проданою кількістю.")
+            self.stdout.write(self.style.SUCCESS("Перепродажу немає."))
+        finally:
+            Order.objects.filter(user__in=users).delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+            category.delete()
@@ -0,0 +1,136 @@
+"""Пропускна здатність під одночасними зʼєднаннями: WSGI (gthread) проти ASGI (uvicorn).
+
+    python manage.py benchmark_serving [--profiles wsgi asgi] [--concurrency 64]
+                                       [--duration 15] [--workers 2]
+                                       [--users anonymous logged-in]
+                                       [--path / --path /categories/ ...] [--output results.json]
+
+Кожен профіль gunicorn.conf.py запускається з однаковою кількістю
+воркерів на вільному порту і отримує однакове навантаження. Команда
+працює з поточною БД і кешами (а не з відкочуваними даними, як
+benchmark_views), тому її варто запускати на стенді з наповненим
+каталогом. За замовчуванням запитуються сторінки каталогу, що мають
+async-реалізацію.
+
+WSGI-профіль проганяється двічі: з синхронними view каталогу (як у
+розгортанні, ASYNC_CATALOG_VIEWS=False) і з async – різниця між ними і є
+ціною async_to_sync під WSGI. Гість здебільшого отримує сторінки з кешу,
+тож навантаження повторюється для залогіненого користувача (тимчасовий
+обліковий запис, видаляється після заміру), якому сторінки рендеряться
+щоразу.
+"""
+
+import dataclasses
+import importlib.util
+import json
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from ...benchmarks.serving import (
+    PROFILE_REQUIREMENTS, PROFILES, ServerError, free_port, run_load, start_server, stop_server,
+)
+from ...models import Category, Good
+
+USERS = ('anonymous', 'logged-in')
+# (профіль, view каталогу): WSGI з async view – лише для порівняння
+RUNS = {'wsgi': (('wsgi', 'sync'), ('wsgi', 'async')), 'asgi': (('asgi', 'async'),)}
+
+
+class Command(BaseCommand):
+    help = "Порівнює пропускну здатність WSGI- і ASGI-профілів gunicorn під одночасними зʼєднаннями."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+        parser.add_argument('--concurrency', type=int, default=64, help='Одночасних клієнтів.')
+        parser.add_argument('--duration', type=float, default=15, help='Секунд навантаження на профіль.')
+        parser.add_argument('--warmup', type=float, default=2, help='Секунд прогріву перед вимірюванням.')
+        parser.add_argument('--workers', type=int, default=2, help='Воркерів gunicorn для кожного профілю.')
+        parser.add_argument('--users', nargs='+', choices=USERS, default=list(USERS),
+                            help='Гість (сторінки з кешу) і/або залогінений користувач (без кешу).')
+        parser.add_argument('--path', action='append', dest='paths', metavar='PATH',
+                            help='URL для навантаження (можна кілька); за замовчуванням – сторінки каталогу.')
+        parser.add_argument('--output', help='Записати результати у JSON.')
+
+    def handle(self, *args, **options):
+        for profile in options['profiles']:
+            module = PROFILE_REQUIREMENTS.get(profile)
+            if module and importlib.util.find_spec(module) is None:
+                raise CommandError(f"Профіль {profile} потребує пакета {module} (див. requirements.txt).")
+        paths = options['paths'] or self._default_paths()
+        # Сповіщення – лише для залогіненого: гостя перенаправило б на вхід
+        user_paths = {'anonymous': paths, 'logged-in': options['paths'] or paths + [reverse('notifications')]}
+        self.stdout.write(f"URL: {', '.join(paths)}; клієнтів: {options['concurrency']}, "
+                          f"воркерів: {options['workers']}")
+
+        results = []
+        with self._session_cookie() as cookie:
+            cookies = {'anonymous': None, 'logged-in': cookie}
+            for name in options['profiles']:
+                for profile, views in RUNS[name]:
+                    port = free_port()
+                    try:
+                        process = start_server(profile, port, options['workers'], async_views=views == 'async')
+                    except ServerError as error:
+                        raise CommandError(error)
+                    try:
+                        for user in options['users']:
+                            load = (profile, port, user_paths[user], options['concurrency'])
+                            if options['warmup']:
+                                run_load(*load, options['warmup'], views, cookies[user])
+                            result = run_load(*load, options['duration'], views, cookies[user])
+                            results.append(result)
+                            self.stdout.write(
+                                f"{result.profile:<5} {result.views:<6} {result.user:<10} "
+                                f"{result.rps:>9.1f} запит/с  p50 {result.p50_ms:>8.2f} мс  "
+                                f"p95 {result.p95_ms:>8.2f} мс  p99 {result.p99_ms:>8.2f} мс  "
+                                f"запитів {result.requests}, помилок {result.errors}"
+                            )
+                    finally:
+                        stop_server(process)
+
+        by_run = {(result.profile, result.views, result.user): result for result in results}
+        for user in options['users']:
+            sync_wsgi = by_run.get(('wsgi', 'sync', user))
+            if sync_wsgi is None or not sync_wsgi.rps:
+                continue
+            async_wsgi = by_run[('wsgi', 'async', user)]
+            self.stdout.write(f"{user}: async view під WSGI – {async_wsgi.rps / sync_wsgi.rps:.2f}× "
+                              f"запитів/с, p95 {async_wsgi.p95_ms - sync_wsgi.p95_ms:+.2f} мс")
+            if ('asgi', 'async', user) in by_run:
+                self.stdout.write(f"{user}: ASGI/WSGI: {by_run[('asgi', 'async', user)].rps / sync_wsgi.rps:.2f}×")
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                json.dump({
+                    'paths': paths, 'concurrency': options['concurrency'], 'workers': options['workers'],
+                    'results': [dataclasses.asdict(result) for result in results],
+                }, target, ensure_ascii=False, indent=2)
+        if any(result.errors for result in results):
+            raise CommandError("Були помилки відповідей – результати неповні.")
+
+    @contextmanager
+    def _session_cookie(self):
+        """Сесія тимчасового користувача у БД, яку бачить і сервер."""
+        user = get_user_model().objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:12]}')
+        client = Client()
+        client.force_login(user)
+        try:
+            yield f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        finally:
+            client.logout()
+            user.delete()
+
+    def _default_paths(self):
+        paths = [reverse('home'), reverse('category_list')]
+        category_slug = Category.objects.order_by('id').values_list('slug', flat=True).first()
+        if category_slug is not None:
+            paths.append(reverse('category_goods', args=[category_slug]))
+        good_id = Good.objects.order_by('id').values_list('id', flat=True).first()
+        if good_id is not None:
+            paths.append(reverse('good_detail', args=[good_id]))
+        return paths
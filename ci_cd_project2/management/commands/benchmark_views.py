@@ -0,0 +1,109 @@
+"""Бенчмарк усіх маршрутів застосунку з бюджетами запитів, затримки і памʼяті.
+
+    python manage.py benchmark_views [--scale smoke|1k|10k|100k] [--repeat 10]
+                                     [--output results.json] [--compare previous.json]
+                                     [--budgets path] [--write-budgets]
+                                     [--check queries p95_ms peak_kb]
+
+Дані створюються в транзакції, яка після вимірювань відкочується; кеші на
+час прогону замінюються locmem. Команда завершується з помилкою, якщо
+якийсь сценарій перевищив бюджет (benchmarks/budgets.json, розділ
+поточної СУБД), повернув помилку HTTP або маршрут urls.py не покритий
+жодним сценарієм.
+
+Кількість запитів від масштабу майже не залежить і перевіряється точно
+(виняток – approximate_count на PostgreSQL, див. benchmarks/runner.py);
+бюджети затримки й памʼяті мають запас і розраховані на масштаб до 10k.
+``--check queries`` перевіряє лише кількість запитів (так робить тест), а
+разом з ``--write-budgets`` – записує лише її.
+"""
+
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from ...benchmarks.runner import (
+    BUDGETS_PATH, METRICS, check_budgets, compare, isolated_settings, load_budgets, make_clients, measure,
+    results_document, uncovered_routes, write_budgets,
+)
+from ...benchmarks.scenarios import build_scenarios
+from ...benchmarks.seed import SCALES, seed
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Проганяє всі маршрути через тестовий клієнт і перевіряє бюджети запитів/затримки/памʼяті."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='1k')
+        for size in SCALES['1k']:
+            parser.add_argument(f"--{size.replace('_', '-')}", type=int, dest=size,
+                                help='Перевизначити розмір масштабу.')
+        parser.add_argument('--repeat', type=int, default=10, help='Вимірювань на сценарій.')
+        parser.add_argument('--warmup', type=int, default=1, help='Невимірюваних запитів перед вимірюваннями.')
+        parser.add_argument('--only', nargs='+', metavar='SCENARIO', help='Лише вказані сценарії.')
+        parser.add_argument('--budgets', default=str(BUDGETS_PATH))
+        parser.add_argument('--write-budgets', action='store_true',
+                            help='Записати поточні результати як бюджети (із запасом) для метрик --check.')
+        parser.add_argument('--check', nargs='+', choices=METRICS, default=list(METRICS),
+                            help='Які бюджети перевіряти (за замовчуванням – усі).')
+        parser.add_argument('--output', help='Записати результати у JSON.')
+        parser.add_argument('--compare', help='Порівняти з попереднім файлом результатів.')
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        sizes = {name: options[name] or default for name, default in SCALES[scale].items()}
+        self.stdout.write(f"Масштаб {scale}: {sizes}")
+
+        with tempfile.TemporaryDirectory() as media_cache_root, isolated_settings(media_cache_root):
+            try:
+                with transaction.atomic():
+                    fixtures = seed(**sizes)
+                    scenarios = build_scenarios(fixtures)
+                    missing = uncovered_routes(scenarios)
+                    if options['only']:
+                        scenarios = [scenario for scenario in scenarios if scenario.name in options['only']]
+                    clients = make_clients(fixtures)
+                    measurements = []
+                    for scenario in scenarios:
+                        measurement = measure(scenario, clients[scenario.client], fixtures,
+                                              repeat=options['repeat'], warmup=options['warmup'])
+                        measurements.append(measurement)
+                        self.stdout.write(
+                            f"{measurement.name:<26} {measurement.status:>3}  запитів {measurement.queries:>3}  "
+                            f"p50 {measurement.p50_ms:>8.2f} мс  p95 {measurement.p95_ms:>8.2f} мс  "
+                            f"памʼять {measurement.peak_kb:>6} КБ"
+                        )
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        if options['write_budgets']:
+            write_budgets(measurements, options['budgets'], metrics=options['check'])
+            self.stdout.write(f"Бюджети {connection.vendor} записано у {options['budgets']}")
+        budgets = load_budgets(options['budgets'])
+        if budgets is None:
+            raise CommandError(f"У {options['budgets']} немає бюджетів для {connection.vendor}; "
+                               f"запишіть їх з --write-budgets.")
+        violations = [f"{name}: немає сценарію" for name in missing]
+        violations += check_budgets(measurements, budgets, options['check'])
+
+        document = results_document(scale, sizes, options['repeat'], measurements, violations)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                json.dump(document, target, ensure_ascii=False, indent=2)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as source:
+                for line in compare(json.load(source), document):
+                    self.stdout.write(line)
+
+        if violations:
+            for violation in violations:
+                self.stderr.write(violation)
+            raise CommandError(f"Порушено бюджетів: {len(violations)}")
+        self.stdout.write(self.style.SUCCESS("Усі сценарії в межах бюджетів."))
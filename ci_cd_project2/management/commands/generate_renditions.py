@@ -0,0 +1,39 @@
+"""Генерує зменшені копії фото для товарів і категорій, де їх ще немає.
+
+    python manage.py generate_renditions [--force] [--batch-size 50]
+
+Фото, для яких копій немає і не буде (``images.NO_RENDITIONS``: вузькі чи
+пошкоджені), пропускаються. ``--force`` обробляє всі фото, спершу видаляючи
+наявні копії.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ...images import regenerate_renditions, rendition_names
+from ...models import Category, Good
+
+
+class Command(BaseCommand):
+    help = "Заповнює photo_renditions для наявних товарів і категорій."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Скільки фото обробляти паралельно за один прохід.')
+        parser.add_argument('--force', action='store_true', help='Перегенерувати і вже наявні копії.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model in (Category, Good):
+            queryset = model.objects.exclude(photo='').order_by('pk')
+            if not options['force']:
+                queryset = queryset.filter(photo_renditions={})
+            processed, last_pk = 0, 0
+            while True:
+                batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                outdated = [name for instance in batch for name in rendition_names(instance.photo_renditions)]
+                processed += regenerate_renditions(batch, outdated)
+                last_pk = batch[-1].pk
+            self.stdout.write(f"{model._meta.verbose_name_plural}: оброблено {processed}")
+        self.stdout.write(self.style.SUCCESS("Готово."))
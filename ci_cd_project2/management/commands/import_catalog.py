@@ -0,0 +1,320 @@
+"""Масовий імпорт категорій і товарів з CSV або JSONL.
+
+    python manage.py import_catalog [--categories categories.csv] [--goods goods.jsonl]
+                                    [--photos DIR] [--chunk-size 1000] [--workers 8]
+
+Колонки (ключі JSONL) категорій: ``slug, name[, photo]``; товарів:
+``slug, name, price, count, category (slug категорії), description[, photo]``.
+``photo`` – імʼя файлу в каталозі ``--photos``; якщо файл відсутній чи не
+читається, рядок імпортується без фото, а помилка виводиться в stderr.
+
+Файли читаються потоково, рядок за рядком, і записуються пакетами по
+``--chunk-size`` через ``bulk_create(update_conflicts=True)`` за ``slug``:
+памʼять не залежить від розміру файлу. Фото пакета завантажуються у
+сховище паралельно (``--workers`` потоків); файл, що вже є у сховищі під
+тим самим іменем і з тим самим вмістом (розмір і sha256), повторно не
+завантажується, а змінений зберігається під новим іменем. Якщо запис
+пакета не вдався, щойно завантажені фото видаляються.
+
+``bulk_create`` не викликає ``save()`` і сигнали, тому замість них команда
+один раз наприкінці:
+
+* сповіщає підписників товарів, що знову зʼявились у наявності
+  (``notify_restocked_ids``);
+* після коміту пакета видаляє замінені фото та їхні копії, якщо на них
+  ніхто більше не посилається (``images.delete_unused_photo``);
+* інвалідує кеш категорій і сторінок каталогу.
+
+Зменшені копії нових фото генерує ``generate_renditions``.
+"""
+
+import csv
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ...catalog_cache import bump_version
+from ...images import ImmediateResult, delete_unused_photo, rendition_names
+from ...models import Category, Good
+from ...notifications import notify_restocked_ids
+from ...page_cache import invalidate_pages
+from ...search import build_search_document
+
+class RowError(ValueError):
+    pass
+
+
+def read_rows(path, fmt=None):
+    """Генератор ``(номер рядка, словник)`` з CSV або JSONL файлу."""
+    fmt = fmt or ('csv' if str(path).lower().endswith('.csv') else 'jsonl')
+    with open(path, encoding='utf-8', newline='') as source:
+        if fmt == 'csv':
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                yield number, RowError(f"некоректний JSON: {error}")
+                continue
+            yield number, row if isinstance(row, dict) else RowError("очікується обʼєкт")
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _required(row, name):
+    value = row.get(name)
+    if isinstance(value, str):
+        value = value.strip()
+    if value in (None, ''):
+        raise RowError(f"порожнє поле {name}")
+    return value
+
+
+def _price(row):
+    try:
+        price = Decimal(str(_required(row, 'price')))
+    except InvalidOperation:
+        raise RowError(f"некоректна ціна {row.get('price')!r}")
+    if price < 0 or price.as_tuple().exponent < -2:
+        raise RowError(f"некоректна ціна {row.get('price')!r}")
+    return price.quantize(Decimal('0.01'))
+
+
+def _count(row):
+    try:
+        count = int(row.get('count') or 0)
+    except (TypeError, ValueError):
+        raise RowError(f"некоректна кількість {row.get('count')!r}")
+    if count < 0:
+        raise RowError(f"некоректна кількість {row.get('count')!r}")
+    return count
+
+
+class Command(BaseCommand):
+    help = "Потоковий імпорт категорій і товарів (upsert за slug) з CSV/JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', help='Файл категорій (.csv або .jsonl).')
+        parser.add_argument('--goods', help='Файл товарів (.csv або .jsonl).')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help='Формат, якщо не видно з розширення.')
+        parser.add_argument('--photos', help='Каталог з файлами фото.')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Потоків для завантаження фото; 0 – без потоків.')
+
+    def handle(self, *args, **options):
+        if not options['categories'] and not options['goods']:
+            raise CommandError("Вкажіть --categories та/або --goods.")
+        self.options = options
+        self.photos = Path(options['photos']) if options['photos'] else None
+        self.errors = 0
+        self.pool = ThreadPoolExecutor(options['workers']) if options['workers'] else None
+        started = timezone.now()
+        try:
+            if options['categories']:
+                total = self._import(options['categories'], self._category_chunk)
+                self.stdout.write(f"Категорій: {total}")
+            if options['goods']:
+                self.categories = dict(Category.objects.values_list('slug', 'id'))
+                self.restocked = []
+                total = self._import(options['goods'], self._goods_chunk)
+                self.stdout.write(f"Товарів: {total}")
+                notified = notify_restocked_ids(self.restocked)
+                self.stdout.write(f"Сповіщень про надходження: {notified}")
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+            bump_version('categories')
+            invalidate_pages()
+
+        elapsed = (timezone.now() - started).total_seconds()
+        if self.errors:
+            self.stderr.write(f"Пропущено рядків з помилками: {self.errors}")
+        self.stdout.write(self.style.SUCCESS(f"Готово за {elapsed:.1f} с."))
+
+    # ------------------------------------------------------------------
+
+    def _import(self, path, import_chunk):
+        total = 0
+        for chunk in chunked(read_rows(path, self.options['format']), self.options['chunk_size']):
+            rows = []
+            for number, row in chunk:
+                if isinstance(row, RowError):
+                    self._error(path, number, row)
+                else:
+                    rows.append((number, row))
+            total += import_chunk(path, rows)
+        return total
+
+    def _error(self, path, number, error):
+        self.errors += 1
+        self.stderr.write(f"{path}:{number}: {error}")
+
+    def _category_chunk(self, path, rows):
+        objects = {}
+        for number, row in rows:
+            try:
+                objects[_required(row, 'slug')] = (
+                    Category(slug=_required(row, 'slug'), name=_required(row, 'name')),
+                    row.get('photo'),
+                    number,
+                )
+            except RowError as error:
+                self._error(path, number, error)
+        return self._upsert(Category, objects, ['name'], path)
+
+    def _goods_chunk(self, path, rows):
+        objects = {}
+        for number, row in rows:
+            try:
+                slug = _required(row, 'slug')
+                category_id = self.categories.get(_required(row, 'category'))
+                if category_id is None:
+                    raise RowError(f"невідома категорія {row['category']!r}")
+                name, description = _required(row, 'name'), row.get('description') or ''
+                good = Good(
+                    slug=slug, name=name, price=_price(row), count=_count(row), category_id=category_id,
+                    description=description, search_document=build_search_document(name, description),
+                )
+            except RowError as error:
+                self._error(path, number, error)
+                continue
+            objects[slug] = (good, row.get('photo'), number)
+
+        # Попередні залишки – для сповіщень про надходження
+        previous = dict(Good.objects.filter(slug__in=objects).values_list('slug', 'count'))
+        imported = self._upsert(
+            Good, objects, ['name', 'price', 'count', 'category', 'description', 'search_document'], path,
+        )
+        back_in_stock = [
+            slug for slug, (good, _, _) in objects.items() if previous.get(slug) == 0 and good.count > 0
+        ]
+        self.restocked.extend(Good.objects.filter(slug__in=back_in_stock).values_list('id', flat=True))
+        return imported
+
+    def _upsert(self, model, objects, update_fields, path):
+        """Записує пакет ``{slug: (обʼєкт, імʼя фото, номер рядка)}``; фото завантажуються паралельно."""
+        uploads = {
+            slug: self._submit(self._store_photo, model, photo)
+            for slug, (_, photo, _) in objects.items() if photo
+        }
+        photos, uploaded = {}, []
+        for slug, future in uploads.items():
+            try:
+                name, is_new = future.result()
+            except (OSError, RowError) as error:
+                # Рядок імпортується без фото (наявне фото товару не змінюється)
+                self._error(path, objects[slug][2], f"фото: {error}")
+                continue
+            photos[slug] = name
+            if is_new:
+                uploaded.append(name)
+        # Фото, які замінює імпорт: після коміту вони вже нікому не потрібні
+        replaced = {
+            slug: (photo, renditions)
+            for slug, photo, renditions in model.objects.filter(slug__in=photos).values_list(
+                'slug', 'photo', 'photo_renditions',
+            )
+            if photo != photos[slug]
+        }
+
+        groups = {}
+        for slug, (instance, _, _) in objects.items():
+            fields = list(update_fields)
+            if slug in photos:
+                instance.photo = photos[slug]
+                fields.append('photo')
+                if slug in replaced:
+                    # Інше фото – копії перегенерує generate_renditions
+                    fields.append('photo_renditions')
+            groups.setdefault(tuple(fields), []).append(instance)
+
+        written = 0
+        try:
+            with transaction.atomic():
+                for fields, instances in groups.items():
+                    model.objects.bulk_create(
+                        instances, update_conflicts=True, unique_fields=['slug'],
+                        update_fields=[*fields, 'updated_at'],
+                    )
+                    written += len(instances)
+        except Exception:
+            # Пакет не записано – завантажені для нього фото стали б сиротами
+            for name in uploaded:
+                default_storage.delete(name)
+            raise
+        for photo, renditions in replaced.values():
+            if photo:
+                transaction.on_commit(
+                    lambda photo=photo, renditions=renditions: delete_unused_photo(photo, rendition_names(renditions))
+                )
+        return written
+
+    def _submit(self, func, *args):
+        if self.pool is None:
+            return ImmediateResult(func, *args)
+        return self.pool.submit(_in_thread, func, *args)
+
+    def _store_photo(self, model, filename):
+        """``(імʼя у сховищі, чи завантажено)``."""
+        if self.photos is None:
+            raise RowError("не вказано --photos")
+        path = (self.photos / filename).resolve()
+        if self.photos.resolve() not in path.parents:
+            raise RowError(f"шлях поза каталогом фото: {filename}")
+        name = model._meta.get_field('photo').generate_filename(None, path.name)
+        if default_storage.exists(name) and _same_content(name, path):
+            return name, False
+        # Змінений файл з тим самим іменем сховище збереже під новим іменем
+        with path.open('rb') as source:
+            return default_storage.save(name, File(source, name=path.name)), True
+
+
+def _same_content(name, path):
+    """Чи збігається файл ``path`` з уже збереженим ``name``.
+
+    ``CachedDatabaseStorage`` знає розмір і sha256 збереженого вмісту
+    (дисковий кеш, наповнений з рядка MediaFile); іншим сховищам
+    порівнюється лише розмір.
+    """
+    size = path.stat().st_size
+    if not hasattr(default_storage, 'cached_entry'):
+        return default_storage.size(name) == size
+    entry = default_storage.cached_entry(name)
+    if entry is None or entry['size'] != size:
+        return False
+    digest = hashlib.sha256()
+    with path.open('rb') as source:
+        for block in iter(lambda: source.read(1 << 16), b''):
+            digest.update(block)
+    return entry['digest'] == digest.hexdigest()
+
+
+def _in_thread(func, *args):
+    """Виконує ``func`` у потоці пулу і закриває зʼєднання з БД цього потоку."""
+    try:
+        return func(*args)
+    finally:
+        connection.close()
@@ -0,0 +1,45 @@
+"""Виправляє розбіжності лічильника непрочитаних сповіщень.
+
+    python manage.py reconcile_unread_counts [--dry-run] [--batch-size 1000]
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from ...models import CustomUser, Notification
+
+
+def unread_subquery():
+    return Coalesce(Subquery(
+        Notification.objects.filter(user=OuterRef('pk'), status=Notification.STATUS_UNREAD)
+        .order_by().values('user').annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = "Перераховує CustomUser.unread_notifications_count для користувачів з розбіжностями."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Лише показати кількість розбіжностей.')
+
+    def handle(self, *args, **options):
+        drifted = (
+            CustomUser.objects.annotate(actual_unread=unread_subquery())
+            .exclude(unread_notifications_count=F('actual_unread'))
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        batch_size, fixed, last_pk = options['batch_size'], 0, 0
+        while True:
+            batch = list(drifted.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            if not options['dry_run']:
+                CustomUser.objects.filter(pk__in=batch).update(unread_notifications_count=unread_subquery())
+            fixed += len(batch)
+            last_pk = batch[-1]
+
+        verb = "Знайдено" if options['dry_run'] else "Виправлено"
+        self.stdout.write(self.style.SUCCESS(f"{verb} розбіжностей: {fixed}"))
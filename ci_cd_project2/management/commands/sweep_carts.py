@@ -0,0 +1,54 @@
+"""Прибирає покинуті кошики та прострочені сесії невеликими пакетами.
+
+Замість одного великого ``DELETE`` (як у ``clearsessions``) рядки
+видаляються пакетами за первинним ключем, з паузою між пакетами, тож
+таблиці не блокуються надовго, а WAL і реплікація не отримують сплеск.
+
+    python manage.py sweep_carts [--batch-size 1000] [--sleep 0.05] [--dry-run]
+
+Кошики в кеші та підписаній cookie мають власний термін життя (CART_TTL) і
+прибирання не потребують.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...models import CartItem
+
+
+class Command(BaseCommand):
+    help = "Видаляє позиції кошиків без змін довше CART_TTL і прострочені сесії (пакетами)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.05, help='Пауза між пакетами, секунди.')
+        parser.add_argument('--dry-run', action='store_true', help='Лише порахувати.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        carts = CartItem.objects.filter(updated_at__lt=now - timedelta(seconds=settings.CART_TTL))
+        removed = self._sweep(carts, options)
+        self.stdout.write(f"Позицій кошиків: {removed}")
+
+        if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.db':
+            removed = self._sweep(Session.objects.filter(expire_date__lt=now), options)
+            self.stdout.write(f"Сесій: {removed}")
+
+        self.stdout.write(self.style.SUCCESS("Готово."))
+
+    def _sweep(self, queryset, options):
+        if options['dry_run']:
+            return queryset.count()
+        model, removed = queryset.model, 0
+        while True:
+            batch = list(queryset.order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                return removed
+            removed += model.objects.filter(pk__in=batch).delete()[0]
+            if options['sleep']:
+                time.sleep(options['sleep'])
@@ -0,0 +1,37 @@
+"""Встановлює залишки товарів з CSV ``slug,count``.
+
+    python manage.py update_stock stock.csv     # або "-" – читати stdin
+
+Усі зміни застосовуються в одній транзакції (див. stock.py); підписники
+товарів, що знову зʼявились у наявності, сповіщаються одним пакетом.
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...stock import StockFileError, apply_stock_levels, parse_stock_csv
+
+
+class Command(BaseCommand):
+    help = "Масово оновлює залишки товарів з CSV (slug,count)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV файл; "-" – стандартний ввід.')
+
+    def handle(self, *args, **options):
+        try:
+            if options['path'] == '-':
+                levels = parse_stock_csv(sys.stdin)
+            else:
+                with open(options['path'], encoding='utf-8', newline='') as source:
+                    levels = parse_stock_csv(source)
+        except (OSError, StockFileError) as error:
+            raise CommandError(error)
+
+        result = apply_stock_levels(levels)
+        for slug in result.unknown:
+            self.stderr.write(f"Товар не знайдено: {slug}")
+        self.stdout.write(f"Змінено залишків: {result.updated}")
+        self.stdout.write(f"Знову в наявності: {len(result.restocked)}, сповіщень: {result.notified}")
+        self.stdout.write(self.style.SUCCESS("Готово."))
@@ -0,0 +1,108 @@
+"""Прогріває процес і вимірює холодний старт.
+
+    python manage.py warmup                          # час етапів прогріву
+    python manage.py warmup --probe / --probe /categories/ [--skip-warmup]
+    python manage.py warmup --compare [--probe ...]  # свіжі процеси: з прогрівом і без
+
+``--probe`` після прогріву (або без нього з ``--skip-warmup``) двічі
+запитує кожен URL через тестовий клієнт: перший запит показує, що лишилось
+неприготованим, другий – теплий час. ``--compare`` запускає команду в
+двох нових процесах (без прогріву і з ним) і виводить час старту процесу,
+прогріву і перших запитів поруч.
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+
+from ...warmup import warm_up
+
+DEFAULT_PROBES = ('/', '/categories/')
+
+
+class Command(BaseCommand):
+    help = "Компілює шаблони, заповнює URL-резолвери, відкриває пул БД і звітує про час холодного старту."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--probe', action='append', dest='probes', metavar='PATH',
+                            help='URL, перший запит до якого виміряти (можна кілька).')
+        parser.add_argument('--skip-warmup', action='store_true', help='Лише виміряти запити, без прогріву.')
+        parser.add_argument('--no-db', action='store_true', help='Не відкривати зʼєднання з БД.')
+        parser.add_argument('--compare', action='store_true',
+                            help='Порівняти холодний старт нових процесів без прогріву і з ним.')
+        parser.add_argument('--json', action='store_true', help='Вивести результат як JSON.')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self._compare(options)
+        result = {'warmup': {}, 'probes': {}}
+        if not options['skip_warmup']:
+            report = warm_up(databases=not options['no_db'])
+            result['warmup'] = {stage: round(seconds * 1000, 1) for stage, seconds in report.timings.items()}
+            for name, error in report.failed_templates:
+                self.stderr.write(f"Шаблон {name} не компілюється: {error}")
+            if not options['json']:
+                self.stdout.write(f"Шаблонів: {report.templates}, маршрутів: {report.routes}, "
+                                  f"зʼєднань у пулі: {report.pooled_connections}")
+        if options['probes']:
+            result['probes'] = self._probe(options['probes'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+            return
+        for stage, ms in result['warmup'].items():
+            self.stdout.write(f"{stage:<10} {ms:>9.1f} мс")
+        for path, (first, second) in result['probes'].items():
+            self.stdout.write(f"{path:<30} перший {first:>8.1f} мс  другий {second:>8.1f} мс")
+        if not options['skip_warmup']:
+            self.stdout.write(self.style.SUCCESS(f"Прогріто за {sum(result['warmup'].values()):.1f} мс."))
+
+    def _probe(self, paths):
+        """``{шлях: (перший, другий запит у мс)}``."""
+        timings = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            client = Client()
+            # Ланцюжок middleware воркер gunicorn будує ще при завантаженні застосунку
+            client.handler.load_middleware()
+            for path in paths:
+                measured = []
+                for _ in range(2):
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    measured.append(round((time.perf_counter() - started) * 1000, 1))
+                    if response.status_code >= 400:
+                        raise CommandError(f"{path}: HTTP {response.status_code}")
+                timings[path] = tuple(measured)
+        return timings
+
+    def _compare(self, options):
+        probes = options['probes'] or list(DEFAULT_PROBES)
+        command = [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'warmup', '--json']
+        command += [argument for path in probes for argument in ('--probe', path)]
+        if options['no_db']:
+            command.append('--no-db')
+        rows = {}
+        for mode, extra in (('без прогріву', ['--skip-warmup']), ('з прогрівом', [])):
+            started = time.perf_counter()
+            completed = subprocess.run(command + extra, capture_output=True, text=True)
+            elapsed = (time.perf_counter() - started) * 1000
+            if completed.returncode:
+                raise CommandError(f"{mode}: {completed.stderr.strip()}")
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            rows[mode] = (elapsed, sum(result['warmup'].values()), result['probes'])
+
+        self.stdout.write(f"{'':<14}{'процес':>10}{'прогрів':>10}" + ''.join(f"{path:>16}" for path in probes))
+        for mode, (elapsed, warmup, results) in rows.items():
+            self.stdout.write(
+                f"{mode:<14}{elapsed:>8.0f}мс{warmup:>8.0f}мс"
+                + ''.join(f"{results[path][0]:>14.1f}мс" for path in probes)
+            )
+        cold = sum(rows['без прогріву'][2][path][0] for path in probes)
+        warm = sum(rows['з прогрівом'][2][path][0] for path in probes)
+        self.stdout.write(f"Перші запити: {cold:.1f} мс без прогріву, {warm:.1f} мс після прогріву.")
@@ -0,0 +1,302 @@
+"""Метрики запитів у форматі Prometheus.
+
+``MetricsMiddleware`` для кожного запиту записує (мітка ``view`` – імʼя
+маршруту):
+
+* ``django_http_requests_total`` – кількість за методом і статусом;
+* ``django_http_request_duration_seconds`` – гістограма затримки;
+* ``django_db_queries_total``, ``django_db_query_duration_seconds_total``
+  і гістограма ``django_db_queries_per_request`` – запити до БД;
+* ``django_http_response_size_bytes`` – гістограма розміру відповіді;
+* ``django_cache_lookups_total`` – звернення до кешів (``cache_lookup``)
+  з результатом hit/stale/miss.
+
+Під час старту воркера (warmup.py, gunicorn.conf.py) записується
+``django_warmup_duration_seconds`` з міткою ``stage``.
+
+Усі значення – лічильники (гістограма – набір лічильників ``_bucket``,
+``_sum``, ``_count``), тому метрики воркерів gunicorn просто
+підсумовуються. Кожен процес тримає їх у памʼяті і не частіше ніж раз на
+``METRICS_FLUSH_INTERVAL`` секунд записує знімок у
+``METRICS_DIR/metrics-<pid>.json``; ``/metrics`` складає знімки всіх
+процесів. Файли завершених воркерів лишаються (лічильники не зменшуються),
+новий процес з тим самим PID продовжує його лічильники. Каталог
+очищається при старті gunicorn (gunicorn.conf.py, він же задає каталог за
+замовчуванням). Без ``METRICS_DIR`` видно лише метрики процесу, що обробив
+запит.
+
+Мітка ``method`` – лише стандартні методи HTTP, решта рахується як
+``other``: довільний метод від клієнта не створює нових рядів.
+"""
+
+import atexit
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+WARMUP_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Імʼя метрики -> (тип, опис)
+METRICS = {
+    'django_http_requests_total': ('counter', 'HTTP-запити за маршрутом, методом і статусом.'),
+    'django_http_request_duration_seconds': ('histogram', 'Час обробки запиту.'),
+    'django_http_response_size_bytes': ('histogram', 'Розмір тіла відповіді (без потокових).'),
+    'django_db_queries_total': ('counter', 'SQL-запити, виконані під час обробки запитів.'),
+    'django_db_query_duration_seconds_total': ('counter', 'Сумарний час SQL-запитів.'),
+    'django_db_queries_per_request': ('histogram', 'Кількість SQL-запитів на один HTTP-запит.'),
+    'django_cache_lookups_total': ('counter', 'Звернення до кешів за результатом (hit/stale/miss).'),
+    'django_warmup_duration_seconds': ('histogram', 'Етапи старту воркера: завантаження застосунку і прогрів.'),
+}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+class MetricsRegistry:
+    """Лічильники процесу: ``{(імʼя семпла, ((мітка, значення), ...)): значення}``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._samples = defaultdict(float)
+        self._flushed_at = 0.0
+
+    def _ensure_process(self):
+        # Після fork дочірній процес починає з власного файлу, а не з копії батьківських лічильників
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._samples = defaultdict(float)
+            path = self._path()
+            if path is not None:
+                self._samples.update(self._read(path))
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._ensure_process()
+            self._samples[key] += value
+
+    def observe(self, name, labels, value, buckets):
+        with self._lock:
+            self._ensure_process()
+            base = tuple(sorted(labels.items()))
+            for bound in (*buckets, '+Inf'):
+                if bound == '+Inf' or value <= bound:
+                    le = bound if bound == '+Inf' else repr(float(bound))
+                    self._samples[(f'{name}_bucket', tuple(sorted((*base, ('le', le)))))] += 1
+            self._samples[(f'{name}_sum', base)] += value
+            self._samples[(f'{name}_count', base)] += 1
+
+    def samples(self):
+        with self._lock:
+            self._ensure_process()
+            return dict(self._samples)
+
+    # ------------------------------------------------------------------
+    # Знімки процесів у METRICS_DIR
+    # ------------------------------------------------------------------
+
+    def _path(self, pid=None):
+        if not settings.METRICS_DIR:
+            return None
+        return Path(settings.METRICS_DIR) / f'metrics-{pid or os.getpid()}.json'
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, encoding='utf-8') as source:
+                rows = json.load(source)
+        except (OSError, ValueError):
+            return {}
+        return {(name, tuple(tuple(pair) for pair in labels)): value for name, labels, value in rows}
+
+    def flush(self, force=False):
+        path = self._path()
+        if path is None or (not force and time.monotonic() - self._flushed_at < settings.METRICS_FLUSH_INTERVAL):
+            return
+        rows = [[name, labels, value] for (name, labels), value in self.samples().items()]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Атомарна заміна: /metrics іншого воркера не прочитає недописаний файл
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.metrics-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as target:
+            json.dump(rows, target)
+        os.replace(tmp, path)
+        self._flushed_at = time.monotonic()
+
+    def collect(self):
+        """Семпли всіх процесів (з ``METRICS_DIR``) або лише поточного."""
+        if not settings.METRICS_DIR:
+            return self.samples()
+        self.flush(force=True)
+        total = defaultdict(float)
+        for path in Path(settings.METRICS_DIR).glob('metrics-*.json'):
+            for key, value in self._read(path).items():
+                total[key] += value
+        return total
+
+
+registry = MetricsRegistry()
+atexit.register(lambda: registry.flush(force=True))
+
+
+def cache_lookup(cache, result):
+    """Рахує звернення до кешу ``cache``: ``result`` – hit, stale або miss."""
+    registry.inc('django_cache_lookups_total', {'cache': cache, 'result': result})
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(samples):
+    """Текстовий формат експозиції Prometheus 0.0.4."""
+    by_metric = defaultdict(list)
+    for (name, labels), value in samples.items():
+        base = next((metric for metric in METRICS if name == metric or name.startswith(f'{metric}_')), name)
+        by_metric[base].append((name, labels, value))
+
+    lines = []
+    for metric in sorted(by_metric):
+        kind, description = METRICS.get(metric, ('untyped', ''))
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for name, labels, value in sorted(by_metric[metric], key=_sample_order):
+            rendered = ','.join(f'{label}="{_escape(label_value)}"' for label, label_value in labels)
+            lines.append(f'{name}{{{rendered}}} {_format_value(value)}' if rendered else f'{name} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def _sample_order(sample):
+    name, labels, _value = sample
+    # Кошики гістограми – за зростанням межі, +Inf останнім
+    le = dict(labels).get('le')
+    bound = float('inf') if le == '+Inf' else float(le) if le is not None else 0
+    return name, tuple(pair for pair in labels if pair[0] != 'le'), bound
+
+
+def metrics_view(request):
+    """``/metrics``: з ``METRICS_TOKEN`` – за ``Authorization: Bearer <токен>``, без нього – лише для персоналу.
+
+    За замовчуванням доступ закритий: метрики розкривають трафік, затримки й
+    час запитів до БД кожного маршруту.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        allowed = request.user.is_active and request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render(registry.collect()), content_type=CONTENT_TYPE)
+
+
+class _QueryTimer:
+    """Кількість і час SQL-запитів одного HTTP-запиту."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+# Таймер поточного запиту. Контекстна змінна, а не execute_wrapper на
+# connection: async view виконують запити через sync_to_async в інших
+# потоках, з іншими обʼєктами зʼєднання, але з тим самим контекстом.
+_current_timer = ContextVar('metrics_query_timer', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_wrapper(sender, connection, **kwargs):
+    # На початок списку: connection.execute_wrapper() знімає останній елемент
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def _view_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    # Маршрути без імені (health/) – за шаблоном
+    return match.view_name if match.url_name else match.route
+
+
+class MetricsMiddleware:
+    """Записує метрики кожного запиту; ставиться одразу після WhiteNoise.
+
+    Підтримує і WSGI, і ASGI: в async-ланцюжку не перемикається в потік.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, started = _QueryTimer(), time.perf_counter()
+        token = _current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        self._record(request, response, timer, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        timer, started = _QueryTimer(), time.perf_counter()
+        token = _current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        self._record(request, response, timer, time.perf_counter() - started)
+        return response
+
+    def _record(self, request, response, timer, duration):
+        view = _view_label(request)
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        registry.inc('django_http_requests_total',
+                     {'view': view, 'method': method, 'status': str(response.status_code)})
+        registry.observe('django_http_request_duration_seconds', {'view': view}, duration, LATENCY_BUCKETS)
+        registry.observe('django_db_queries_per_request', {'view': view}, timer.count, QUERY_COUNT_BUCKETS)
+        if timer.count:
+            registry.inc('django_db_queries_total', {'view': view}, timer.count)
+            registry.inc('django_db_query_duration_seconds_total', {'view': view}, timer.duration)
+        if not response.streaming:
+            registry.observe('django_http_response_size_bytes', {'view': view}, len(response.content), SIZE_BUCKETS)
+        registry.flush()
@@ -0,0 +1,26 @@
+"""Операції міграцій, що не блокують таблиці на PostgreSQL.
+
+``CREATE INDEX CONCURRENTLY`` не виконується в транзакції, тому міграція з
+цими операціями має бути ``atomic = False``. Якщо побудова перервалась,
+PostgreSQL лишає індекс у стані INVALID – його треба видалити
+(``DROP INDEX CONCURRENTLY``) і запустити міграцію ще раз.
+"""
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class AddIndexConcurrentlyIfSupported(AddIndexConcurrently):
+    """``AddIndexConcurrently`` на PostgreSQL, звичайний ``AddIndex`` на інших СУБД (SQLite)."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
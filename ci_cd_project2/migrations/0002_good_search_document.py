@@ -0,0 +1,64 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from ci_cd_project2.search import build_search_document
+
+BATCH_SIZE = 1000
+
+SEARCH_INDEXES = (
+    (
+        'good_search_fts_idx',
+        "CREATE INDEX IF NOT EXISTS good_search_fts_idx ON ci_cd_project2_good "
+        "USING gin (to_tsvector('simple'::regconfig, COALESCE(search_document, '')))",
+    ),
+    (
+        'good_search_trgm_idx',
+        "CREATE INDEX IF NOT EXISTS good_search_trgm_idx ON ci_cd_project2_good "
+        "USING gin (search_document gin_trgm_ops)",
+    ),
+)
+
+
+def fill_search_document(apps, schema_editor):
+    Good = apps.get_model('ci_cd_project2', 'Good')
+    batch = []
+    for good in Good.objects.only('id', 'name', 'description').iterator(chunk_size=BATCH_SIZE):
+        good.search_document = build_search_document(good.name, good.description)
+        batch.append(good)
+        if len(batch) >= BATCH_SIZE:
+            Good.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Good.objects.bulk_update(batch, ['search_document'])
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _name, sql in SEARCH_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _sql in SEARCH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ci_cd_project2', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='good',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
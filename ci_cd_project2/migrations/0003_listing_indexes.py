@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ci_cd_project2', '0002_good_search_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='good',
+            index=models.Index(fields=['-created_at', '-id'], name='good_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notification_inbox_idx'),
+        ),
+    ]
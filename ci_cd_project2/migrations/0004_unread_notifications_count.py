@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 10:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_unread_counts(apps, schema_editor):
+    CustomUser = apps.get_model('ci_cd_project2', 'CustomUser')
+    Notification = apps.get_model('ci_cd_project2', 'Notification')
+    # Бейдж раніше рахував статус "new", а сигнал створював "unread"
+    Notification.objects.filter(status='new').update(status='unread')
+    unread = (
+        Notification.objects.filter(user=OuterRef('pk'), status='unread')
+        .order_by().values('user').annotate(total=Count('id')).values('total')
+    )
+    CustomUser.objects.update(unread_notifications_count=Coalesce(Subquery(unread), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ci_cd_project2', '0003_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='unread_notifications_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='status',
+            field=models.CharField(default='unread', max_length=51),
+        ),
+        migrations.RunPython(fill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ci_cd_project2', '0004_unread_notifications_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'status', '-created_at', '-id'], name='notification_status_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ci_cd_project2', '0005_notification_status_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('content', models.TextField()),
+                ('mimetype', models.CharField(max_length=100)),
+            ],
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2 on 2026-10-18 10:34
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 5000
+
+
+def _batches(queryset):
+    """Діапазони первинних ключів ``(від, до]`` по ``BATCH_SIZE``."""
+    last = queryset.aggregate(last=Max('pk'))['last'] or 0
+    for start in range(0, last, BATCH_SIZE):
+        yield start, start + BATCH_SIZE
+
+
+def fill_order_totals(apps, schema_editor):
+    Good = apps.get_model('ci_cd_project2', 'Good')
+    Order = apps.get_model('ci_cd_project2', 'Order')
+    OrderItem = apps.get_model('ci_cd_project2', 'OrderItem')
+
+    # Історичної ціни немає – беремо поточну ціну товару
+    price = Good.objects.filter(pk=OuterRef('good_id')).values('price')[:1]
+    for start, end in _batches(OrderItem.objects.all()):
+        OrderItem.objects.filter(pk__gt=start, pk__lte=end, unit_price__isnull=True).update(
+            unit_price=Subquery(price),
+        )
+
+    items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+    total = items.annotate(
+        total=Sum(F('unit_price') * F('quantity'), output_field=models.DecimalField()),
+    ).values('total')
+    count = items.annotate(count=Count('id')).values('count')
+    for start, end in _batches(Order.objects.all()):
+        Order.objects.filter(pk__gt=start, pk__lte=end).update(
+            total_price=Coalesce(Subquery(total), Decimal('0.00'), output_field=models.DecimalField()),
+            items_count=Coalesce(Subquery(count), 0),
+        )
+
+
+class Migration(migrations.Migration):
+    # Кожен пакет оновлення комітиться окремо: без довгої транзакції на великих таблицях
+    atomic = False
+
+    dependencies = [
+        ('ci_cd_project2', '0007_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='items_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_order_totals, migrations.RunPython.noop),
+    ]
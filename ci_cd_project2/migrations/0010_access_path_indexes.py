@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+from ci_cd_project2.migration_operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY не можна виконувати в транзакції
+    atomic = False
+
+    dependencies = [
+        ('ci_cd_project2', '0009_orderitem_unit_price_not_null'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='order_history_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='good',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='good_category_listing_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='good',
+            index=models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(count__gt=0), name='good_in_stock_idx',
+            ),
+        ),
+    ]
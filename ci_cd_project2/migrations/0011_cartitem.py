@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 10:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ci_cd_project2', '0010_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cart_key', models.CharField(max_length=64)),
+                ('quantity', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('good', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ci_cd_project2.good')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['updated_at'], name='cart_item_updated_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cart_key', 'good'), name='cart_item_unique_line')],
+            },
+        ),
+    ]
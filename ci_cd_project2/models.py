@@ -1,10 +1,49 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import Count, F, Sum
 from django.contrib.auth.models import AbstractUser
 
+from .search import build_search_document
+
+
+# Запамʼятовує значення полів tracked_fields на момент завантаження з БД,
+# щоб сигнали могли порівняти старе й нове значення без додаткового SELECT.
+class LoadedValuesMixin:
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_values()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_loaded_values()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._remember_loaded_values()
+
+    def _remember_loaded_values(self):
+        values = {}
+        for name in self.tracked_fields:
+            value = self.__dict__.get(name)
+            values[name] = getattr(value, 'name', value)  # FieldFile -> імʼя файлу
+        self._loaded_values = values
+
+    def loaded_value(self, name):
+        """Значення з БД; None – невідоме (обʼєкт ще не завантажувався)."""
+        return getattr(self, '_loaded_values', {}).get(name)
+
 # Інформація про користувача
 class CustomUser(AbstractUser):
     phone_number = models.CharField(max_length=13)
     address = models.TextField()
+    # Кількість непрочитаних сповіщень (для бейджа в навбарі). Оновлюється
+    # атомарно разом зі сповіщеннями, виправляється reconcile_unread_counts.
+    unread_notifications_count = models.PositiveIntegerField(default=0, editable=False)
 
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -12,10 +51,27 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.get_full_name()
 
-class Category(models.Model):
+    def save(self, *args, **kwargs):
+        # Повне збереження (профіль, зміна пароля, адмінка) не записує
+        # лічильник: значення в памʼяті могло застаріти і затерло б
+        # паралельні атомарні оновлення (notifications.adjust_unread_counts)
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+                and field.name != 'unread_notifications_count'
+            ]
+        super().save(*args, **kwargs)
+
+class Category(LoadedValuesMixin, models.Model):
+    tracked_fields = ('photo',)
+
     slug = models.SlugField(unique=True)
     name = models.CharField(max_length=100)
     photo = models.ImageField("categories/")
+    # Зменшені копії фото {формат: {ширина: імʼя файлу}}, див. images.py
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -24,13 +80,19 @@ class Category(models.Model):
         return self.name
 
 # Товари
-class Good(models.Model):
+class Good(LoadedValuesMixin, models.Model):
+    # count – для сигналу restock, photo – для інвалідації кешу медіа
+    tracked_fields = ('count', 'photo')
+
     slug = models.SlugField(unique=True)
     name = models.CharField(max_length=255)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     count = models.PositiveIntegerField(default=0)
     photo = models.ImageField(upload_to='goods/')
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField()
+    # Нормалізовані назва та опис для пошуку (див. search.py)
+    search_document = models.TextField(blank=True, default='', editable=False)
 
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -38,13 +100,35 @@ class Good(models.Model):
     subscribers = models.ManyToManyField(CustomUser, related_name='subscribed_goods', blank=True)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='goods')
 
+    class Meta:
+        indexes = [
+            # Порядок сторінок каталогу (keyset-пагінація)
+            models.Index(fields=['-created_at', '-id'], name='good_listing_idx'),
+            # Сторінки категорії в тому ж порядку
+            models.Index(fields=['category', '-created_at', '-id'], name='good_category_listing_idx'),
+            # Лише товари в наявності (часткий індекс: без розпроданих рядків)
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(count__gt=0), name='good_in_stock_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.search_document = build_search_document(self.name, self.description)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'name', 'description'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_document'}
+        super().save(*args, **kwargs)
+
 # Повідомлення
-class Notification(models.Model):
+class Notification(LoadedValuesMixin, models.Model):
+    tracked_fields = ('status',)
+
+    STATUS_UNREAD = 'unread'
+    STATUS_READ = 'read'
+
     message = models.TextField()
-    status = models.CharField(max_length=51)
+    status = models.CharField(max_length=51, default=STATUS_UNREAD)
 
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -52,9 +136,21 @@ class Notification(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='notifications')
     good = models.ForeignKey(Good, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Сторінки сповіщень користувача (keyset-пагінація)
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_inbox_idx'),
+            # Фільтр вхідних за статусом (непрочитані) та масове "прочитати все"
+            models.Index(fields=['user', 'status', '-created_at', '-id'], name='notification_status_idx'),
+        ]
+
     def __str__(self):
         return self.message
 
+    @property
+    def is_unread(self):
+        return self.status == self.STATUS_UNREAD
+
 
 # Замовлення
 class Order(models.Model):
@@ -65,6 +161,28 @@ class Order(models.Model):
 
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='orders')
 
+    # Підсумки записуються при оформленні (checkout.py), щоб списки й
+    # аналітика не обʼєднували позиції з каталогом
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    items_count = models.PositiveIntegerField(default=0)
+
+    def refresh_totals(self, save=True):
+        """Перераховує підсумки з позицій (після ручного редагування в адмінці)."""
+        totals = self.items.aggregate(
+            total=Sum(F('unit_price') * F('quantity'), output_field=models.DecimalField()),
+            count=Count('id'),
+        )
+        self.total_price = totals['total'] or Decimal('0.00')
+        self.items_count = totals['count']
+        if save:
+            self.save(update_fields=['total_price', 'items_count', 'updated_at'])
+
+    class Meta:
+        indexes = [
+            # Історія замовлень у профілі (keyset-пагінація)
+            models.Index(fields=['user', '-created_at', '-id'], name='order_history_idx'),
+        ]
+
     def __str__(self):
         return self.user.get_full_name() + " " + str(self.created_at)
 
@@ -73,13 +191,51 @@ class OrderItem(models.Model):
     quantity = models.PositiveIntegerField()
     good = models.ForeignKey(Good, on_delete=models.CASCADE, related_name='order_items')
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    # Ціна товару на момент замовлення: зміна ціни в каталозі не переоцінює історію
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
 
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     @property
     def total_price(self):
-        return self.good.price * self.quantity
+        return self.unit_price * self.quantity
+
+    def save(self, *args, **kwargs):
+        if self.unit_price is None:
+            self.unit_price = self.good.price
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.good.name + " " + str(self.quantity)
+
+
+# Вміст медіафайлів (фото товарів і категорій), див. storage.py
+class MediaFile(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    content = models.TextField()  # base64, як очікує django-db-file-storage
+    mimetype = models.CharField(max_length=100)
+
+    def __str__(self):
+        return self.name
+
+
+# Позиції кошиків для DatabaseCartStore (див. cart_store.py): рядок на
+# позицію, тож зміна кількості не переписує сесію
+class CartItem(models.Model):
+    cart_key = models.CharField(max_length=64)
+    good = models.ForeignKey(Good, on_delete=models.CASCADE, related_name='+')
+    quantity = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart_key', 'good'], name='cart_item_unique_line'),
+        ]
+        indexes = [
+            # Прибирання покинутих кошиків (sweep_carts)
+            models.Index(fields=['updated_at'], name='cart_item_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.cart_key}: {self.good_id} x {self.quantity}"
@@ -0,0 +1,113 @@
+"""Масові сповіщення користувачів.
+
+Сповіщення про появу товару створюються пачками через ``bulk_create``,
+а підписки після розсилки видаляються одним ``DELETE``. Кількість запитів
+залежить від кількості пачок, а не від кількості підписників.
+
+Лічильник ``CustomUser.unread_notifications_count`` змінюється в тій самій
+транзакції, що й сповіщення, атомарними ``UPDATE ... SET n = n + k``.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import CustomUser, Good, Notification
+
+RESTOCK_MESSAGE = "Товар '{name}' знову доступний у продажу!"
+
+# Розмір пачки для читання підписок і вставки сповіщень
+NOTIFICATION_BATCH_SIZE = 2000
+
+
+def notify_restocked(goods, batch_size=NOTIFICATION_BATCH_SIZE):
+    """Сповіщає підписників товарів, які знову зʼявились у наявності.
+
+    Після розсилки підписки на ці товари знімаються. Повертає кількість
+    створених сповіщень.
+    """
+    messages = {good.pk: RESTOCK_MESSAGE.format(name=good.name) for good in goods}
+    if not messages:
+        return 0
+
+    field = Good._meta.get_field('subscribers')
+    good_column = f'{field.m2m_field_name()}_id'
+    user_column = f'{field.m2m_reverse_field_name()}_id'
+    subscriptions = field.remote_field.through.objects.filter(**{f'{good_column}__in': messages})
+
+    created, last_id = 0, 0
+    with transaction.atomic():
+        # Читаємо підписки пачками за id (keyset), щоб не тримати всі в памʼяті.
+        while True:
+            rows = list(
+                subscriptions.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', good_column, user_column)[:batch_size]
+            )
+            if not rows:
+                break
+            Notification.objects.bulk_create([
+                Notification(message=messages[good_id], status=Notification.STATUS_UNREAD,
+                             user_id=user_id, good_id=good_id)
+                for _id, good_id, user_id in rows
+            ])
+            adjust_unread_counts(Counter(user_id for _id, _good_id, user_id in rows))
+            created += len(rows)
+            last_id = rows[-1][0]
+
+        # Видаляємо лише прочитані підписки: ті, що зʼявились під час
+        # розсилки, залишаються до наступного поповнення.
+        if created:
+            subscriptions.filter(id__lte=last_id).delete()
+
+    return created
+
+
+def notify_restocked_ids(good_ids, batch_size=NOTIFICATION_BATCH_SIZE):
+    """``notify_restocked`` для товарів за id (після масових ``UPDATE`` без сигналів).
+
+    Завантажуються лише товари, що мають підписників. Повертає кількість
+    створених сповіщень.
+    """
+    good_ids, created = list(good_ids), 0
+    for start in range(0, len(good_ids), batch_size):
+        goods = (
+            Good.objects.filter(id__in=good_ids[start:start + batch_size], subscribers__isnull=False)
+            .distinct().only('id', 'name')
+        )
+        created += notify_restocked(list(goods), batch_size=batch_size)
+    return created
+
+
+def adjust_unread_counts(deltas):
+    """Змінює лічильники непрочитаних: ``deltas`` – ``{id користувача: зміна}``.
+
+    Користувачі з однаковою зміною оновлюються одним запитом.
+    """
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        CustomUser.objects.filter(pk__in=user_ids).update(
+            unread_notifications_count=Greatest(F('unread_notifications_count') + delta, 0)
+        )
+
+
+def mark_read(user, ids=None):
+    """Позначає непрочитані сповіщення користувача прочитаними одним ``UPDATE``.
+
+    ``ids=None`` – усі сповіщення. Повертає кількість змінених рядків.
+    """
+    unread = Notification.objects.filter(user=user, status=Notification.STATUS_UNREAD)
+    if ids is not None:
+        unread = unread.filter(pk__in=ids)
+    with transaction.atomic():
+        updated = unread.update(status=Notification.STATUS_READ, updated_at=timezone.now())
+        if updated:
+            adjust_unread_counts({user.pk: -updated})
+    user.unread_notifications_count = max(user.unread_notifications_count - updated, 0)
+    return updated
@@ -0,0 +1,183 @@
+"""Кеш сторінок каталогу для анонімних відвідувачів.
+
+Анонімні GET-запити до каталогу отримують однаковий HTML, окрім
+CSRF-токена. Тому сторінка зберігається з заглушкою замість токена, а при
+видачі заглушка замінюється токеном поточного запиту.
+
+Ключ – хеш шляху з query string. Збереження чи видалення
+``Good``/``Category`` та оформлення замовлення після коміту збільшують
+версію простору імен ``pages`` (див. catalog_cache.py); запис зберігає
+версію, з якою його відрендерено.
+
+Захист від stampede: запис «свіжий», поки його версія збігається з
+поточною і не минуло ``PAGE_CACHE_TIMEOUT`` секунд. Інакше він
+«застарілий» ще до ``PAGE_CACHE_STALE_TIMEOUT`` секунд після свіжості:
+перебудовує його лише той воркер, що взяв блокування ``cache.add``, а решта
+тим часом віддає стару копію. Тож після інвалідації (наприклад, після
+кожного замовлення) сторінку перерендерює один воркер, а не всі одразу.
+
+Кеш працює лише з ``PAGE_CACHE_ENABLED``: інвалідація має бути видна
+всім воркерам, тож за замовчуванням він увімкнений тільки зі спільним
+бекендом (``CACHE_BACKEND=file``), а не з locmem.
+"""
+
+import hashlib
+import re
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.messages import get_messages
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+
+from .catalog_cache import bump_version, get_version
+from .metrics import cache_lookup
+
+PAGES_NAMESPACE = 'pages'
+CSRF_PLACEHOLDER = '__csrf_token__'
+# Так рендерить {% csrf_token %}
+CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+# Скільки секунд блокування перебудови може утримуватись (на випадок падіння воркера)
+REBUILD_LOCK_TIMEOUT = 30
+
+
+def _cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def invalidate_pages():
+    """Інвалідує всі закешовані сторінки."""
+    bump_version(PAGES_NAMESPACE)
+
+
+def _is_cacheable_request(request):
+    if not settings.PAGE_CACHE_ENABLED:
+        return False
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    # Сторінка з flash-повідомленнями індивідуальна
+    return len(get_messages(request)) == 0
+
+
+def _is_cacheable_response(response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and 'Cache-Control' not in response
+    )
+
+
+def _page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    # Без версії в ключі: після інвалідації старий запис лишається доступним як застарілий
+    return f'catalog:{PAGES_NAMESPACE}:{path}'
+
+
+def _from_entry(request, entry, state):
+    content = entry['content'].replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+    response = HttpResponse(content, content_type=entry['content_type'])
+    response['X-Page-Cache'] = state
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def _store(key, version, response):
+    content = CSRF_INPUT_RE.sub(rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', response.content.decode(response.charset))
+    fresh = settings.PAGE_CACHE_TIMEOUT
+    _cache().set(key, {
+        'content': content.encode(response.charset),
+        'content_type': response['Content-Type'],
+        'version': version,
+        'fresh_until': time.time() + fresh,
+    }, fresh + settings.PAGE_CACHE_STALE_TIMEOUT)
+
+
+def _lookup(request):
+    """``(ключ, версія, запис, стан)``: стан ``hit``/``stale`` – віддати запис, ``None`` – рендерити.
+
+    Версія читається до рендеру: якщо дані зміняться під час рендеру, запис
+    одразу буде застарілим. Якщо рендерити треба замість застарілого запису,
+    блокування перебудови вже взято.
+    """
+    cache = _cache()
+    key = _page_key(request)
+    version = get_version(PAGES_NAMESPACE)
+    entry = cache.get(key)
+    if entry is not None:
+        if entry.get('version') == version and time.time() < entry['fresh_until']:
+            cache_lookup(PAGES_NAMESPACE, 'hit')
+            return key, version, entry, 'hit'
+        if not cache.add(f'{key}:rebuild', 1, REBUILD_LOCK_TIMEOUT):
+            # Перебудовує інший воркер
+            cache_lookup(PAGES_NAMESPACE, 'stale')
+            return key, version, entry, 'stale'
+    cache_lookup(PAGES_NAMESPACE, 'miss')
+    return key, version, entry, None
+
+
+def _remember(key, version, response):
+    if _is_cacheable_response(response):
+        _store(key, version, response)
+        response['X-Page-Cache'] = 'miss'
+        patch_vary_headers(response, ('Cookie',))
+
+
+def _release(key):
+    _cache().delete(f'{key}:rebuild')
+
+
+def cache_anonymous_page(view):
+    """Декоратор view каталогу: кешує відповідь для анонімних GET-запитів.
+
+    Працює і з async view: звернення до кешу й сесії виконуються через
+    ``sync_to_async``, сама view – в циклі подій.
+    """
+    if iscoroutinefunction(view):
+        return _async_cache_anonymous_page(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _is_cacheable_request(request):
+            return view(request, *args, **kwargs)
+
+        key, version, entry, state = _lookup(request)
+        if state is not None:
+            return _from_entry(request, entry, state)
+        try:
+            response = view(request, *args, **kwargs)
+            _remember(key, version, response)
+        finally:
+            if entry is not None:
+                _release(key)
+        return response
+
+    return wrapper
+
+
+def _async_cache_anonymous_page(view):
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # Користувач завантажується async і підставляється в request.user
+        # (як _auser у views), далі його не треба читати з БД вдруге
+        request.user = await request.auser()
+        if not await sync_to_async(_is_cacheable_request)(request):
+            return await view(request, *args, **kwargs)
+
+        key, version, entry, state = await sync_to_async(_lookup)(request)
+        if state is not None:
+            return _from_entry(request, entry, state)
+        try:
+            response = await view(request, *args, **kwargs)
+            await sync_to_async(_remember)(key, version, response)
+        finally:
+            if entry is not None:
+                await sync_to_async(_release)(key)
+        return response
+
+    return wrapper
@@ -0,0 +1,230 @@
+"""Keyset (seek) пагінація.
+
+Замість OFFSET сторінка визначається курсором – значеннями ключа
+сортування ``(created_at, id)`` останнього показаного рядка. Запит
+наступної сторінки – це ``WHERE (created_at, id) < курсор ORDER BY ... LIMIT``,
+тому глибокі сторінки коштують стільки ж, скільки перша.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import BooleanField, DateTimeField, F, Func, IntegerField, Value
+from django.http import QueryDict
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+# Назви GET-параметрів курсорів.
+NEXT_PARAM = 'after'
+PREVIOUS_PARAM = 'before'
+
+# Нижче цієї оцінки рахуємо точно: COUNT(*) по невеликій вибірці дешевий.
+EXACT_COUNT_THRESHOLD = 1000
+
+
+def encode_cursor(created_at, pk):
+    raw = json.dumps([created_at.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Повертає ``(created_at, id)`` або ``None`` для пошкодженого курсора."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, pk = json.loads(raw)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+def approximate_count(queryset):
+    """Оцінка кількості рядків вибірки.
+
+    На PostgreSQL береться оцінка планувальника з ``EXPLAIN`` (без сканування
+    таблиці); якщо вона мала – рахуємо точно. На інших СУБД – ``count()``.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    if isinstance(plan, list):
+        plan = plan[0]
+    estimate = int(plan['Plan']['Plan Rows'])
+    if estimate < EXACT_COUNT_THRESHOLD:
+        return queryset.count()
+    return estimate
+
+
+class RowCompare(Func):
+    """``(created_at, id) <op> (%s, %s)`` – порівняння row value.
+
+    На відміну від ``created_at < x OR (created_at = x AND id < y)`` таку умову
+    PostgreSQL використовує як межу сканування індексу ``(created_at, id)``.
+    Колонки компілюються через ``F()``, тож вони кваліфіковані назвою таблиці
+    і JOIN (``select_related``) не робить їх неоднозначними.
+    """
+
+    output_field = BooleanField()
+
+    def __init__(self, op, created_at, pk):
+        super().__init__(
+            F('created_at'), F('id'),
+            Value(created_at, output_field=DateTimeField()), Value(pk, output_field=IntegerField()),
+        )
+        self.op = op
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = [], []
+        for expression in self.get_source_expressions():
+            part, part_params = compiler.compile(expression)
+            sql.append(part)
+            params.extend(part_params)
+        return f'({sql[0]}, {sql[1]}) {self.op} ({sql[2]}, {sql[3]})', params
+
+
+class EstimatedCountPaginator(Paginator):
+    """OFFSET-пагінатор (адмінка), у якого загальна кількість – ``approximate_count``."""
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str = None
+    previous_cursor: str = None
+    total: int = None
+    query_params: QueryDict = field(default_factory=lambda: QueryDict(mutable=True))
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _url(self, param, cursor):
+        params = self.query_params.copy()
+        params.pop(NEXT_PARAM, None)
+        params.pop(PREVIOUS_PARAM, None)
+        params[param] = cursor
+        return '?' + params.urlencode()
+
+    @property
+    def next_url(self):
+        return self._url(NEXT_PARAM, self.next_cursor) if self.has_next else None
+
+    @property
+    def previous_url(self):
+        return self._url(PREVIOUS_PARAM, self.previous_cursor) if self.has_previous else None
+
+
+class KeysetPaginator:
+    """Пагінація вибірки від новіших до старіших за ``(created_at, id)``."""
+
+    def __init__(self, queryset, per_page, with_total=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.with_total = with_total
+
+    def _window(self, after, before):
+        """``(queryset на per_page + 1 рядків, курсор «після», чи йдемо назад)``."""
+        after = decode_cursor(after)
+        before = decode_cursor(before) if after is None else None
+
+        if before is not None:
+            # Йдемо назад: беремо рядки, новіші за курсор, у зворотному порядку.
+            queryset = self.queryset.filter(RowCompare('>', *before)).order_by('created_at', 'id')
+            return queryset[:self.per_page + 1], None, True
+        queryset = self.queryset
+        if after is not None:
+            queryset = queryset.filter(RowCompare('<', *after))
+        return queryset.order_by('-created_at', '-id')[:self.per_page + 1], after, False
+
+    def _build(self, rows, after, backwards):
+        has_more = len(rows) > self.per_page
+        if backwards:
+            rows = rows[:self.per_page][::-1]
+            has_previous, has_next = has_more, True
+        else:
+            rows = rows[:self.per_page]
+            has_previous, has_next = after is not None, has_more
+
+        page = KeysetPage(object_list=rows)
+        if rows:
+            if has_next:
+                page.next_cursor = encode_cursor(rows[-1].created_at, rows[-1].pk)
+            if has_previous:
+                page.previous_cursor = encode_cursor(rows[0].created_at, rows[0].pk)
+        return page
+
+    def page_queryset(self, after=None, before=None):
+        """Queryset, яким читається сторінка (для ``EXPLAIN``)."""
+        return self._window(after, before)[0]
+
+    def page(self, after=None, before=None):
+        queryset, after_cursor, backwards = self._window(after, before)
+        rows = list(queryset)
+        if backwards and not rows:
+            return self.page()
+        page = self._build(rows, after_cursor, backwards)
+        if self.with_total:
+            page.total = approximate_count(self.queryset)
+        return page
+
+    async def apage(self, after=None, before=None):
+        """``page()`` для async view: рядки читаються async ORM."""
+        queryset, after_cursor, backwards = self._window(after, before)
+        rows = [row async for row in queryset]
+        if backwards and not rows:
+            return await self.apage()
+        page = self._build(rows, after_cursor, backwards)
+        if self.with_total:
+            page.total = await sync_to_async(approximate_count)(self.queryset)
+        return page
+
+
+def paginate(request, queryset, per_page, with_total=False):
+    """Сторінка для поточного запиту з урахуванням курсорів у GET-параметрах."""
+    page = KeysetPaginator(queryset, per_page, with_total=with_total).page(
+        after=request.GET.get(NEXT_PARAM),
+        before=request.GET.get(PREVIOUS_PARAM),
+    )
+    page.query_params = request.GET.copy()
+    return page
+
+
+async def apaginate(request, queryset, per_page, with_total=False):
+    """``paginate()`` для async view."""
+    page = await KeysetPaginator(queryset, per_page, with_total=with_total).apage(
+        after=request.GET.get(NEXT_PARAM),
+        before=request.GET.get(PREVIOUS_PARAM),
+    )
+    page.query_params = request.GET.copy()
+    return page
@@ -0,0 +1,81 @@
+"""Пошук товарів.
+
+Пошук працює по службовій колонці ``Good.search_document``, яка містить
+нормалізовані назву та опис товару і оновлюється при кожному збереженні.
+На PostgreSQL використовуються повнотекстовий (GIN по ``to_tsvector``) та
+триграмний (GIN ``gin_trgm_ops``) індекси і ранжування результатів;
+на інших СУБД (SQLite у тестах) – простий пошук підрядка.
+"""
+
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+
+# Конфігурація 'simple' не робить стемінгу, тож однаково працює
+# для українських, російських та англійських назв.
+SEARCH_CONFIG = 'simple'
+
+# Скільки найрелевантніших товарів показуємо на сторінці пошуку.
+SEARCH_RESULTS_LIMIT = 60
+
+# Апострофи, які користувачі пишуть у словах на кшталт «пам'ять».
+_APOSTROPHES = str.maketrans('', '', "'’ʼ`´")
+_NON_WORD = re.compile(r'[^\w]+')
+
+
+def normalize_text(text: str) -> str:
+    """Повертає рядок у нижньому регістрі без діакритиків та розділових знаків.
+
+    На відміну від старої ASCII-нормалізації зберігає кирилицю: прибираються
+    лише комбіновані знаки (наголоси, умлаути), тож «Їжак» і «іжак» дають
+    однаковий результат, а не порожній рядок.
+    """
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    stripped = unicodedata.normalize('NFC', stripped).translate(_APOSTROPHES)
+    return ' '.join(_NON_WORD.sub(' ', stripped).split())
+
+
+def build_search_document(name: str, description: str) -> str:
+    """Текст, що зберігається у ``Good.search_document``."""
+    return ' '.join(part for part in (normalize_text(name), normalize_text(description)) if part)
+
+
+def search_goods(queryset, query, limit=SEARCH_RESULTS_LIMIT):
+    """Фільтрує та ранжує товари за пошуковим запитом."""
+    normalized = normalize_text(query)
+    if not normalized:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        # Вирази мають збігатися з індексами з міграції 0002,
+        # інакше планувальник їх не використає.
+        vector = SearchVector('search_document', config=SEARCH_CONFIG)
+        # Кожне слово шукаємо як префікс: «ноут» знаходить «ноутбук».
+        prefix_query = ' & '.join(f"'{term}':*" for term in normalized.split())
+        search_query = SearchQuery(prefix_query, config=SEARCH_CONFIG, search_type='raw')
+        queryset = queryset.annotate(
+            search_vector=vector,
+            search_rank=SearchRank(vector, search_query),
+            similarity=TrigramSimilarity('search_document', normalized),
+        ).filter(
+            Q(search_vector=search_query) | Q(search_document__contains=normalized)
+        ).order_by('-search_rank', '-similarity', '-created_at', '-id')
+    else:
+        for term in normalized.split():
+            queryset = queryset.filter(search_document__contains=term)
+        queryset = queryset.annotate(
+            search_rank=Case(
+                When(search_document__startswith=normalized, then=Value(2)),
+                When(search_document__contains=normalized, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        ).order_by('-search_rank', '-created_at', '-id')
+
+    return queryset[:limit]
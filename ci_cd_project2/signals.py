@@ -1,20 +1,102 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Good, Notification, CustomUser
+from .catalog_cache import bump_version
+from .images import delete_unused_photo, rendition_names, schedule_renditions
+from .models import Category, Good, Notification
+from .notifications import adjust_unread_counts, notify_restocked
+from .page_cache import invalidate_pages
 
 @receiver(post_save, sender=Good)
-def notify_subscribers_when_available(sender, instance, **kwargs):
+def notify_subscribers_when_available(sender, instance, created, raw=False, **kwargs):
     """
     Якщо товар з'явився в наявності (count > 0) і раніше був відсутній,
     надсилаємо повідомлення підписаним користувачам.
+
+    Попередній залишок береться з моменту завантаження товару
+    (Good.loaded_value), тож редагування ціни чи опису нікого не сповіщає.
+    """
+    if created or raw:
+        return
+    if instance.loaded_value('count') == 0 and instance.count > 0:  # Товар став доступним
+        notify_restocked([instance])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories_cache(sender, **kwargs):
+    """Будь-яка зміна категорії робить закешований список застарілим.
+
+    Версія збільшується після коміту: інакше паралельний читач встиг би
+    закешувати старий список уже під новою версією.
+    """
+    transaction.on_commit(lambda: bump_version('categories'))
+
+
+@receiver(post_save, sender=Good)
+@receiver(post_delete, sender=Good)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_page_cache(sender, **kwargs):
+    """Ціна, залишок чи назва змінились – закешовані сторінки каталогу застаріли.
+
+    Після коміту: інакше паралельний рендер закешував би дані до коміту вже
+    під новою версією.
     """
-    if instance.count > 0:  # Товар став доступним
-        subscribers = instance.subscribers.all()
-
-        for user in subscribers:
-            Notification.objects.create(
-                message=f"Товар '{instance.name}' знову доступний у продажу!",
-                status="unread",
-                user=user,
-                good=instance
-            )
+    transaction.on_commit(invalidate_pages)
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_count_on_save(sender, instance, created, raw=False, **kwargs):
+    """Підтримує лічильник непрочитаних для поодиноких сповіщень (адмінка, create)."""
+    if raw:
+        return
+    was_unread = not created and instance.loaded_value('status') == Notification.STATUS_UNREAD
+    if instance.is_unread != was_unread:
+        adjust_unread_counts({instance.user_id: 1 if instance.is_unread else -1})
+
+
+@receiver(post_delete, sender=Notification)
+def update_unread_count_on_delete(sender, instance, **kwargs):
+    if instance.is_unread:
+        adjust_unread_counts({instance.user_id: -1})
+
+
+@receiver(post_save, sender=Good)
+@receiver(post_save, sender=Category)
+def delete_replaced_photo(sender, instance, created, raw=False, **kwargs):
+    """Старе фото після заміни видаляється зі сховища після коміту.
+
+    Копії старого фото видаляє ``refresh_photo_renditions``.
+    """
+    previous = instance.loaded_value('photo')
+    if raw or not previous or previous == instance.photo.name:
+        return
+    transaction.on_commit(lambda: delete_unused_photo(previous))
+
+
+@receiver(post_delete, sender=Good)
+@receiver(post_delete, sender=Category)
+def delete_removed_photo(sender, instance, **kwargs):
+    if not instance.photo:
+        return
+    name, renditions = instance.photo.name, rendition_names(instance.photo_renditions)
+    transaction.on_commit(lambda: delete_unused_photo(name, renditions))
+
+
+@receiver(post_save, sender=Good)
+@receiver(post_save, sender=Category)
+def refresh_photo_renditions(sender, instance, created, raw=False, **kwargs):
+    """Нове фото – нові зменшені копії; старі копії видаляються.
+
+    Генерація ставиться в чергу після коміту (пул процесів має читати вже
+    збережений файл) і виконується у фоновому потоці, не затримуючи запит.
+    """
+    if raw or not instance.photo or (instance.loaded_value('photo') == instance.photo.name and not created):
+        return
+    outdated = rendition_names(instance.photo_renditions)
+    if outdated:
+        sender.objects.filter(pk=instance.pk).update(photo_renditions={})
+        instance.photo_renditions = {}
+
+    transaction.on_commit(lambda: schedule_renditions([instance], outdated))
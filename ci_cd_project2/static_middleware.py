@@ -0,0 +1,35 @@
+"""WhiteNoise, що не ламає async-ланцюжок middleware.
+
+``whitenoise.middleware.WhiteNoiseMiddleware`` лише синхронний: під ASGI
+Django виконує його в потоці, і кожен запит, навіть до async view, тримає
+потік пулу до кінця обробки. Цей підклас у async-ланцюжку відповідає на
+статичні файли так само, а решту запитів передає далі без перемикання.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # DEBUG: пошук файлу через finders ходить по диску
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,118 @@
+"""Масове оновлення залишків товарів.
+
+``apply_stock_levels({slug: кількість})`` в одній транзакції:
+
+1. блокує і читає поточні залишки (``SELECT ... FOR UPDATE`` пакетами);
+2. записує змінені одним ``UPDATE ... FROM (VALUES ...)`` на пакет
+   (PostgreSQL; на інших БД – ``bulk_update``, тобто ``UPDATE ... CASE``);
+3. після коміту, коли блокування рядків уже знято, сповіщає підписників
+   товарів, що перейшли з 0 у наявність, одним пакетним проходом
+   (``notify_restocked_ids``).
+
+Сигнали ``post_save`` не викликаються, тож рядки не зберігаються по
+одному і розсилка не повторюється для кожного товару. Використовується
+командою ``update_stock`` і дією адмінки «Оновити залишки».
+"""
+
+import csv
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Good
+from .notifications import notify_restocked_ids
+from .page_cache import invalidate_pages
+
+STOCK_BATCH_SIZE = 1000
+
+
+class StockFileError(ValueError):
+    pass
+
+
+@dataclass
+class StockUpdate:
+    updated: int = 0
+    # slug-и, яких немає в БД
+    unknown: list = field(default_factory=list)
+    # id товарів, що перейшли з 0 у наявність
+    restocked: list = field(default_factory=list)
+    notified: int = 0
+
+
+def parse_stock_csv(lines):
+    """``{slug: кількість}`` з рядків CSV ``slug,count`` (заголовок необовʼязковий).
+
+    Помилки формату – ``StockFileError`` з номером рядка.
+    """
+    levels = {}
+    reader = csv.reader(lines)
+    for row in reader:
+        if not row or not ''.join(row).strip():
+            continue
+        if reader.line_num == 1 and row[0].strip().lower() == 'slug':
+            continue
+        if len(row) != 2:
+            raise StockFileError(f"Рядок {reader.line_num}: очікується «slug,кількість»")
+        slug, count = row[0].strip(), row[1].strip()
+        if not slug or not count.isdigit():
+            raise StockFileError(f"Рядок {reader.line_num}: некоректні дані {','.join(row)!r}")
+        levels[slug] = int(count)
+    return levels
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _write_counts(changes, now):
+    """Записує ``[(id, кількість)]`` одним запитом."""
+    if connection.vendor != 'postgresql':
+        Good.objects.bulk_update(
+            [Good(id=good_id, count=count, updated_at=now) for good_id, count in changes],
+            ['count', 'updated_at'],
+        )
+        return
+    qn = connection.ops.quote_name
+    table = qn(Good._meta.db_table)
+    values = ', '.join(['(%s::bigint, %s::integer)'] * len(changes))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET {qn("count")} = v.count, {qn("updated_at")} = %s '
+            f'FROM (VALUES {values}) AS v(id, count) WHERE {table}.{qn("id")} = v.id',
+            [now, *(value for change in changes for value in change)],
+        )
+
+
+def apply_stock_levels(levels, batch_size=STOCK_BATCH_SIZE):
+    """Встановлює залишки ``{slug: кількість}``; повертає ``StockUpdate``."""
+    result = StockUpdate()
+    slugs = list(levels)
+    with transaction.atomic():
+        previous = {}
+        for batch in _batches(slugs, batch_size):
+            previous.update(
+                (slug, (good_id, count)) for slug, good_id, count in
+                Good.objects.select_for_update().filter(slug__in=batch).order_by('id').values_list('slug', 'id', 'count')
+            )
+        result.unknown = [slug for slug in slugs if slug not in previous]
+
+        changes = [
+            (good_id, levels[slug]) for slug, (good_id, count) in previous.items() if count != levels[slug]
+        ]
+        now = timezone.now()
+        for batch in _batches(changes, batch_size):
+            _write_counts(batch, now)
+        result.updated = len(changes)
+
+        result.restocked = [
+            good_id for slug, (good_id, count) in previous.items() if count == 0 and levels[slug] > 0
+        ]
+        if changes:
+            transaction.on_commit(invalidate_pages)
+    # Розсилка не тримає блокування товарів: паралельні оформлення замовлень
+    # і оновлення залишків не чекають на вставку сповіщень
+    result.notified = notify_restocked_ids(result.restocked)
+    return result
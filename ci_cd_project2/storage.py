@@ -0,0 +1,130 @@
+"""Сховище медіафайлів у БД з дисковим кешем.
+
+Файли зберігаються в таблиці ``MediaFile`` (django-db-file-storage), а при
+першому читанні копіюються у локальний кеш, адресований вмістом:
+
+    MEDIA_CACHE_ROOT/blobs/ab/<sha256>      – вміст файлу
+    MEDIA_CACHE_ROOT/names/<sha1(імʼя)>     – {"digest", "mimetype", "size"}
+
+Після цього запит зображення обслуговується з диска через ``FileResponse``
+(sendfile у gunicorn) або ``X-Accel-Redirect`` (nginx) без звернення до БД.
+Файли, завантажені ще у ``MEDIA_ROOT`` до переходу на БД, читаються звідти.
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+from pathlib import Path
+
+from db_file_storage.storage import FixedModelDatabaseFileStorage
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class CachedDatabaseStorage(FixedModelDatabaseFileStorage):
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('model_class_path', 'ci_cd_project2.MediaFile')
+        kwargs.setdefault('content_field', 'content')
+        kwargs.setdefault('filename_field', 'name')
+        kwargs.setdefault('mimetype_field', 'mimetype')
+        super().__init__(**kwargs)
+
+    # ------------------------------------------------------------------
+    # Storage API
+    # ------------------------------------------------------------------
+
+    def _open(self, name, mode='rb'):
+        try:
+            return super()._open(name, mode)
+        except self._get_model_cls(self.model_class_path).DoesNotExist:
+            legacy = FileSystemStorage(location=settings.MEDIA_ROOT)
+            if not legacy.exists(name):
+                raise FileNotFoundError(name)
+            _file = legacy.open(name, mode)
+            _file.mimetype = mimetypes.guess_type(name)[0]
+            return _file
+
+    def _save(self, name, content):
+        # File без content_type (команди імпорту, скрипти) бібліотека зберегла б як text/plain
+        if not getattr(content, 'content_type', None):
+            content.content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        return super()._save(name, content)
+
+    def url(self, name):
+        return reverse('media_file', kwargs={'name': name})
+
+    def delete(self, name):
+        super().delete(name)
+        self.evict(name)
+
+    # ------------------------------------------------------------------
+    # Дисковий кеш
+    # ------------------------------------------------------------------
+
+    @property
+    def cache_root(self):
+        return Path(settings.MEDIA_CACHE_ROOT)
+
+    def _index_path(self, name):
+        return self.cache_root / 'names' / hashlib.sha1(name.encode()).hexdigest()
+
+    def blob_path(self, digest):
+        return self.cache_root / 'blobs' / digest[:2] / digest
+
+    def cached_entry(self, name):
+        """Запис кешу ``{"digest", "mimetype", "size", "path"}``; файл з БД
+        копіюється на диск при першому зверненні. ``None`` – файлу немає."""
+        entry = self._read_index(name)
+        if entry is None or not self.blob_path(entry['digest']).exists():
+            try:
+                _file = self.open(name)
+            except (FileNotFoundError, ValueError):
+                return None
+            with _file:
+                content = _file.read()
+            mimetype = getattr(_file, 'mimetype', None) or 'application/octet-stream'
+            entry = self._store(name, content, mimetype)
+        entry['path'] = self.blob_path(entry['digest'])
+        return entry
+
+    def evict(self, name):
+        """Прибирає імʼя з кешу (blob лишається: той самий вміст може мати інше імʼя)."""
+        try:
+            self._index_path(name).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _read_index(self, name):
+        try:
+            with open(self._index_path(name)) as index:
+                return json.load(index)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _store(self, name, content, mimetype):
+        digest = hashlib.sha256(content).hexdigest()
+        blob = self.blob_path(digest)
+        if not blob.exists():
+            _atomic_write(blob, content)
+        entry = {'digest': digest, 'mimetype': mimetype, 'size': len(content)}
+        _atomic_write(self._index_path(name), json.dumps(entry).encode())
+        return entry
+
+
+def _atomic_write(path, data):
+    """Запис через тимчасовий файл і rename: воркери не бачать частковий файл."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
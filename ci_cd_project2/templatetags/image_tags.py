@@ -0,0 +1,39 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+DEFAULT_SIZES = '(max-width: 576px) 100vw, (max-width: 992px) 50vw, 320px'
+
+
+def _srcset(by_width):
+    return ', '.join(
+        f'{default_storage.url(name)} {width}w'
+        for width, name in sorted(by_width.items(), key=lambda item: int(item[0]))
+    )
+
+
+@register.simple_tag
+def responsive_image(obj, alt='', css_class='', sizes=DEFAULT_SIZES):
+    """``<picture>`` з WebP/JPEG srcset для об'єкта з полями photo і photo_renditions.
+
+    Поки копії не згенеровано – звичайний ``<img>`` з оригіналом.
+    """
+    if not obj.photo:
+        return ''
+    renditions = obj.photo_renditions or {}
+    attrs = format_html(
+        'class="{}" alt="{}" loading="lazy" decoding="async"', css_class, alt,
+    )
+    if not renditions.get('jpeg'):
+        return format_html('<img src="{}" {}>', obj.photo.url, attrs)
+
+    sources = format_html_join(
+        '', '<source type="image/webp" srcset="{}" sizes="{}">',
+        [(_srcset(renditions['webp']), sizes)] if renditions.get('webp') else [],
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" {}></picture>',
+        sources, obj.photo.url, _srcset(renditions['jpeg']), sizes, attrs,
+    )
@@ -7,5 +7,7 @@ def new_notifications_count(context):
     request = context.get('request')
     user = request.user if request else None
     if user and user.is_authenticated:
-        return user.notifications.filter(status="new").count()
+        # Денормалізований лічильник: користувач уже завантажений
+        # AuthenticationMiddleware, тож бейдж не робить жодного запиту.
+        return user.unread_notifications_count
     return 0
@@ -1,20 +1,63 @@
+import io
+import json
 import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import uuid
+from unittest import mock
 import django
+import importlib
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "CI_CD_Project.settings")
 django.setup()
 
 
-from django.test import TestCase, Client
-from django.urls import reverse
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import DatabaseError, connection, connections
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve, reverse
+from django.utils import timezone
+from django.contrib.admin import helpers
 from django.contrib.auth import get_user_model
-from .models import Good, Order, Category
+from .cart import resolve_cart
+from .cart_store import CacheCartStore, _DictCartStore
+from .catalog_cache import get_categories
+from .checkout import CheckoutError, place_order
+from .images import RENDITION_WIDTHS
+from .context_processors import categories_processor
+from .models import CartItem, Good, MediaFile, Order, OrderItem, Category, Notification
+from . import images, page_cache, urls, views
+from .notifications import mark_read, notify_restocked
+from .pagination import KeysetPaginator
+from .search import normalize_text, search_goods
+from .stock import apply_stock_levels
+from .templatetags.notifications_tags import new_notifications_count
+from .warmup import template_names, warm_up
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 User = get_user_model()
 
 
+def fill_cart(client, quantities):
+    """Наповнює кошик клієнта через add_to_cart – незалежно від CART_STORE."""
+    for good, quantity in quantities.items():
+        for _ in range(quantity):
+            client.get(reverse('add_to_cart', args=[good.id]))
+
+
 
 class CustomUserTests(TestCase):
     def test_create_user(self):
@@ -112,13 +155,10 @@ class ViewTests(TestCase):
     def test_add_to_cart(self):
         response = self.client.get(reverse('add_to_cart', args=[self.good.id]))
         self.assertEqual(response.status_code, 302)
-        session = self.client.session
-        self.assertIn(str(self.good.id), session.get('cart', {}))
+        self.assertEqual(response.wsgi_request.cart.items(), {str(self.good.id): 1})
 
     def test_cart_view(self):
-        session = self.client.session
-        session['cart'] = {str(self.good.id): 2}
-        session.save()
+        fill_cart(self.client, {self.good: 2})
 
         response = self.client.get(reverse('cart'))
         self.assertEqual(response.status_code, 200)
@@ -135,9 +175,7 @@ class ViewTests(TestCase):
         self.assertIn(self.user, self.good.subscribers.all())
 
     def test_order_get_with_items(self):
-        session = self.client.session
-        session['cart'] = {str(self.good.id): 1}
-        session.save()
+        fill_cart(self.client, {self.good: 1})
 
         response = self.client.get(reverse('order'))
         self.assertEqual(response.status_code, 200)
@@ -145,9 +183,7 @@ class ViewTests(TestCase):
 
     def test_order_post_authenticated_user(self):
         self.client.login(username='testuser', password='testpass')
-        session = self.client.session
-        session['cart'] = {str(self.good.id): 2}
-        session.save()
+        fill_cart(self.client, {self.good: 2})
 
         response = self.client.post(reverse('order'))
         self.assertRedirects(response, reverse('profile'))
@@ -170,4 +206,1238 @@ class ViewTests(TestCase):
     def test_profile_logged_in(self):
         self.client.login(username='testuser', password='testpass')
         response = self.client.get(reverse('profile'))
-        self.assertEqual(response.status_code, 200)
\ No newline at end of file
+        self.assertEqual(response.status_code, 200)
+
+class SearchTests(TestCase):
+    def setUp(self):
+        photo = SimpleUploadedFile('search.gif', b'\x47\x49\x46\x38\x39\x61', content_type='image/gif')
+        self.category = Category.objects.create(name='Техніка', slug='tech', photo=photo)
+        self.laptop = Good.objects.create(
+            name='Ноутбук Lenovo', slug='laptop', price=100, count=1, photo=photo,
+            category=self.category, description='Легкий і тихий'
+        )
+        self.kettle = Good.objects.create(
+            name='Електричний чайник', slug='kettle', price=20, count=1, photo=photo,
+            category=self.category, description="Об'єм 1.7 л"
+        )
+
+    def test_normalize_text_keeps_cyrillic(self):
+        self.assertEqual(normalize_text('  Їжак — Café! '), 'іжак cafe')
+        self.assertEqual(normalize_text("Об’єм"), 'обєм')
+
+    def test_search_document_is_maintained(self):
+        self.laptop.name = 'Планшет'
+        self.laptop.save(update_fields=['name'])
+        self.laptop.refresh_from_db()
+        self.assertTrue(self.laptop.search_document.startswith('планшет'))
+
+    def test_home_search_matches_cyrillic_prefix(self):
+        response = self.client.get(reverse('home'), {'q': 'НОУТ'})
+        self.assertContains(response, 'Ноутбук Lenovo')
+        self.assertNotContains(response, 'Електричний чайник')
+
+    def test_search_matches_description(self):
+        results = list(search_goods(Good.objects.all(), "об'єм"))
+        self.assertEqual(results, [self.kettle])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='testpass')
+        self.notes = [
+            Notification.objects.create(message=f'note {i}', status='unread', user=self.user)
+            for i in range(5)
+        ]
+
+    def test_walks_forward_and_back(self):
+        paginator = KeysetPaginator(Notification.objects.all(), per_page=2)
+        first = paginator.page()
+        self.assertEqual([n.message for n in first], ['note 4', 'note 3'])
+        self.assertFalse(first.has_previous)
+
+        second = paginator.page(after=first.next_cursor)
+        self.assertEqual([n.message for n in second], ['note 2', 'note 1'])
+
+        last = paginator.page(after=second.next_cursor)
+        self.assertEqual([n.message for n in last], ['note 0'])
+        self.assertFalse(last.has_next)
+
+        back = paginator.page(before=last.previous_cursor)
+        self.assertEqual([n.message for n in back], ['note 2', 'note 1'])
+        self.assertTrue(back.has_previous)
+
+    def test_page_query_count_does_not_depend_on_depth(self):
+        paginator = KeysetPaginator(Notification.objects.all(), per_page=1)
+        cursor = paginator.page(after=paginator.page().next_cursor).next_cursor
+        with self.assertNumQueries(1):
+            paginator.page(after=cursor)
+
+    def test_rows_with_equal_created_at_are_not_skipped(self):
+        Notification.objects.update(created_at=self.notes[0].created_at)
+        paginator = KeysetPaginator(Notification.objects.all(), per_page=2)
+        seen, page = [], paginator.page()
+        while True:
+            seen += [n.pk for n in page]
+            if not page.has_next:
+                break
+            page = paginator.page(after=page.next_cursor)
+        self.assertEqual(seen, sorted((n.pk for n in self.notes), reverse=True))
+
+        back = paginator.page(before=page.previous_cursor)
+        self.assertEqual([n.pk for n in back], seen[2:4])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = KeysetPaginator(Notification.objects.all(), per_page=2).page(after='not-a-cursor')
+        self.assertEqual([n.message for n in page], ['note 4', 'note 3'])
+
+    @mock.patch('ci_cd_project2.views.NOTIFICATIONS_PER_PAGE', 2)
+    def test_notifications_view_links_next_page(self):
+        self.client.login(username='reader', password='testpass')
+        response = self.client.get(reverse('notifications'))
+        page = response.context['page']
+        self.assertContains(response, 'note 4')
+        self.assertNotContains(response, 'note 2')
+        self.assertContains(response, f'?after={page.next_cursor}')
+
+
+class CartServiceTests(TestCase):
+    def setUp(self):
+        photo = SimpleUploadedFile('cart.gif', b'\x47\x49\x46\x38\x39\x61', content_type='image/gif')
+        self.category = Category.objects.create(name='Cart', slug='cart', photo=photo)
+        self.goods = [
+            Good.objects.create(
+                name=f'Cart good {i}', slug=f'cart-good-{i}', price=Decimal('1.10') * (i + 1),
+                count=3, category=self.category, photo=photo, description='-'
+            )
+            for i in range(3)
+        ]
+
+    def test_resolves_cart_with_one_query(self):
+        cart = {str(good.id): 2 for good in self.goods}
+        with self.assertNumQueries(1):
+            resolved = resolve_cart(cart)
+        self.assertEqual(len(resolved.lines), 3)
+        self.assertEqual(resolved.total, Decimal('13.20'))
+        self.assertEqual(resolved.stale_keys, [])
+
+    def test_reports_stale_and_over_stock_lines(self):
+        cart = {str(self.goods[0].id): 5, '999999': 1, 'junk': 1, str(self.goods[1].id): 0}
+        resolved = resolve_cart(cart)
+        self.assertEqual(sorted(resolved.stale_keys), sorted(['999999', 'junk', str(self.goods[1].id)]))
+        self.assertEqual([line.good for line in resolved.over_stock], [self.goods[0]])
+        self.assertEqual(resolved.cleaned(), {str(self.goods[0].id): 5})
+
+    def test_cart_and_order_pages_cost_constant_queries(self):
+        fill_cart(self.client, {self.goods[0]: 1})
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('order'))
+
+        fill_cart(self.client, {good: 1 for good in self.goods[1:]})
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(reverse('order'))
+        self.assertEqual(len(small), len(large))
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='testpass')
+        self.category = Category.objects.create(name='Checkout', slug='checkout')
+        self.goods = [
+            Good.objects.create(
+                name=f'Checkout good {i}', slug=f'checkout-{i}', price=Decimal('2.50'),
+                count=4, category=self.category, description='-'
+            )
+            for i in range(4)
+        ]
+
+    def test_decrements_stock_and_creates_items(self):
+        result = place_order(self.user, {str(self.goods[0].id): 3, str(self.goods[1].id): 1})
+        self.assertEqual(result.adjusted, [])
+        self.assertEqual(result.order.items.count(), 2)
+        self.goods[0].refresh_from_db()
+        self.assertEqual(self.goods[0].count, 1)
+        self.assertEqual(result.order.total_price, Decimal('10.00'))
+        self.assertEqual(result.order.items_count, 2)
+        self.assertEqual(set(result.order.items.values_list('unit_price', flat=True)), {Decimal('2.50')})
+
+    def test_caps_quantity_at_available_stock(self):
+        result = place_order(self.user, {str(self.goods[0].id): 10})
+        self.assertEqual([(line.requested, line.ordered) for line in result.adjusted], [(10, 4)])
+        self.assertEqual(result.order.items.get().quantity, 4)
+        self.goods[0].refresh_from_db()
+        self.assertEqual(self.goods[0].count, 0)
+
+    def test_nothing_available_rolls_back(self):
+        Good.objects.filter(pk=self.goods[0].pk).update(count=0)
+        with self.assertRaises(CheckoutError):
+            place_order(self.user, {str(self.goods[0].id): 1})
+        self.assertFalse(Order.objects.exists())
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        with CaptureQueriesContext(connection) as one_line:
+            place_order(self.user, {str(self.goods[0].id): 1})
+        with CaptureQueriesContext(connection) as four_lines:
+            place_order(self.user, {str(good.id): 1 for good in self.goods})
+        self.assertEqual(len(one_line), len(four_lines))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentCheckoutTests(TransactionTestCase):
+    def test_concurrent_checkouts_do_not_oversell(self):
+        out = io.StringIO()
+        call_command('benchmark_checkout', stock=10, buyers=8, quantity=3, lines=2, stdout=out)
+        self.assertIn('Перепродажу немає', out.getvalue())
+
+
+class RestockNotificationTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Restock', slug='restock')
+        self.good = Good.objects.create(
+            name='Sold out', slug='sold-out', price=5, count=0, category=self.category, description='-'
+        )
+        self.users = [User.objects.create_user(username=f'sub{i}') for i in range(3)]
+        self.good.subscribers.add(*self.users)
+        self.good = Good.objects.get(pk=self.good.pk)
+
+    def test_edit_without_restock_sends_nothing(self):
+        self.good.price = 7
+        self.good.save()
+        self.assertFalse(Notification.objects.exists())
+
+    def test_restock_notifies_once_and_clears_subscriptions(self):
+        self.good.count = 10
+        self.good.save()
+        self.assertEqual(Notification.objects.filter(good=self.good).count(), 3)
+        self.assertFalse(self.good.subscribers.exists())
+
+        self.good.count = 9
+        self.good.save()
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_fan_out_query_count_does_not_depend_on_subscribers(self):
+        with CaptureQueriesContext(connection) as few:
+            notify_restocked([self.good])
+        self.good.subscribers.add(*[User.objects.create_user(username=f'more{i}') for i in range(20)])
+        with CaptureQueriesContext(connection) as many:
+            notify_restocked([self.good])
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(Notification.objects.count(), 23)
+
+
+class SubscriptionGridTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='watcher', password='testpass')
+        self.photo = SimpleUploadedFile('grid.gif', b'\x47\x49\x46\x38\x39\x61', content_type='image/gif')
+        self.category = Category.objects.create(name='Grid', slug='grid', photo=self.photo)
+        self.client.login(username='watcher', password='testpass')
+
+    def _sold_out(self, n):
+        goods = [
+            Good.objects.create(
+                name=f'Grid good {Good.objects.count()}', slug=f'grid-{uuid.uuid4().hex[:8]}', price=1,
+                count=0, category=self.category, photo=self.photo, description='-'
+            )
+            for _ in range(n)
+        ]
+        for good in goods:
+            good.subscribers.add(self.user, User.objects.create_user(username=f'other-{uuid.uuid4().hex[:8]}'))
+        return goods
+
+    def test_subscribed_cards_are_marked(self):
+        subscribed, = self._sold_out(1)
+        response = self.client.get(reverse('category_goods', args=[self.category.slug]))
+        self.assertEqual(response.context['subscribed_ids'], {subscribed.id})
+        self.assertContains(response, 'Ви підписались на товар')
+
+    def test_grid_query_count_does_not_depend_on_sold_out_cards(self):
+        self._sold_out(1)
+        with CaptureQueriesContext(connection) as one_card:
+            self.client.get(reverse('home'))
+        self._sold_out(5)
+        with CaptureQueriesContext(connection) as six_cards:
+            self.client.get(reverse('home'))
+        self.assertEqual(len(one_card), len(six_cards))
+
+
+class CategoriesCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Cached', slug='cached')
+
+    def test_categories_are_served_from_cache(self):
+        with self.assertNumQueries(1):
+            get_categories()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_categories(), [self.category])
+
+    def test_save_and_delete_invalidate(self):
+        get_categories()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Renamed'
+            self.category.save()
+        self.assertEqual(get_categories()[0].name, 'Renamed')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertEqual(get_categories(), [])
+
+    def test_invalidation_waits_for_commit(self):
+        get_categories()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Renamed'
+            self.category.save()
+            # До коміту читач отримує старий список і не кешує нічого під новою версією
+            self.assertEqual(get_categories()[0].name, 'Cached')
+        self.assertEqual(get_categories()[0].name, 'Renamed')
+
+    def test_context_processor_is_lazy(self):
+        with self.assertNumQueries(0):
+            context = categories_processor(None)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(context['all_categories']), [self.category])
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='counter', password='testpass')
+
+    def _unread(self):
+        self.user.refresh_from_db()
+        return self.user.unread_notifications_count
+
+    def test_counter_follows_create_read_and_delete(self):
+        note = Notification.objects.create(message='hi', user=self.user)
+        self.assertEqual(self._unread(), 1)
+        note.status = Notification.STATUS_READ
+        note.save()
+        self.assertEqual(self._unread(), 0)
+        unread = Notification.objects.create(message='again', user=self.user)
+        unread.delete()
+        self.assertEqual(self._unread(), 0)
+
+    def test_restock_fan_out_increments_counter(self):
+        category = Category.objects.create(name='Counter', slug='counter')
+        goods = [
+            Good.objects.create(name=f'G{i}', slug=f'counter-{i}', price=1, category=category, description='-')
+            for i in range(2)
+        ]
+        for good in goods:
+            good.subscribers.add(self.user)
+        notify_restocked(goods)
+        self.assertEqual(self._unread(), 2)
+
+    def test_full_save_keeps_concurrent_counter_updates(self):
+        stale = User.objects.get(pk=self.user.pk)
+        Notification.objects.create(message='hi', user=self.user)
+        stale.first_name = 'Renamed'
+        stale.save()
+        self.assertEqual(self._unread(), 1)
+        self.assertEqual(self.user.first_name, 'Renamed')
+
+    def test_badge_costs_no_queries(self):
+        Notification.objects.create(message='hi', user=self.user)
+        self.user.refresh_from_db()
+        request = mock.Mock(user=self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(new_notifications_count({'request': request}), 1)
+
+    def test_reconcile_repairs_drift(self):
+        Notification.objects.create(message='hi', user=self.user)
+        User.objects.filter(pk=self.user.pk).update(unread_notifications_count=7)
+        out = io.StringIO()
+        call_command('reconcile_unread_counts', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertEqual(self._unread(), 1)
+
+
+class InboxActionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='inbox', password='testpass')
+        self.other = User.objects.create_user(username='other-inbox')
+        self.notes = [Notification.objects.create(message=f'n{i}', user=self.user) for i in range(3)]
+        self.foreign = Notification.objects.create(message='foreign', user=self.other)
+        self.client.login(username='inbox', password='testpass')
+
+    def test_mark_selected_read(self):
+        ids = [self.notes[0].id, self.foreign.id]
+        response = self.client.post(reverse('mark_notifications_read'), {'ids': ids})
+        self.assertRedirects(response, reverse('notifications'))
+        self.assertEqual(Notification.objects.filter(status=Notification.STATUS_READ).count(), 1)
+        self.foreign.refresh_from_db()
+        self.assertTrue(self.foreign.is_unread)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.unread_notifications_count, 2)
+
+    def test_mark_all_read_is_a_single_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(mark_read(self.user), 3)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)  # сповіщення + лічильник
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.unread_notifications_count, 0)
+
+    def test_unread_filter(self):
+        mark_read(self.user, [self.notes[0].id])
+        response = self.client.get(reverse('notifications'), {'status': 'unread'})
+        self.assertEqual(len(response.context['notifications']), 2)
+
+    def test_mark_read_requires_post(self):
+        response = self.client.get(reverse('mark_notifications_read'))
+        self.assertEqual(response.status_code, 405)
+
+
+class MediaCacheTests(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        override = self.settings(MEDIA_CACHE_ROOT=self.cache_dir.name, MEDIA_CACHE_ACCEL_REDIRECT='')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.content = b'GIF89a' + bytes(range(64))
+        photo = SimpleUploadedFile('media.gif', self.content, content_type='image/gif')
+        self.category = Category.objects.create(name='Media', slug='media', photo=photo)
+
+    def test_serves_from_disk_after_first_hit(self):
+        url = self.category.photo.url
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(b''.join(first.streaming_content), self.content)
+        self.assertEqual(first['Content-Type'], 'image/gif')
+        self.assertEqual(first['Cache-Control'], 'public, no-cache')
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_conditional_and_range_requests(self):
+        url = self.category.photo.url
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        partial = self.client.get(url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.content, self.content[2:6])
+        self.assertEqual(partial['Content-Range'], f'bytes 2-5/{len(self.content)}')
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=999-').status_code, 416)
+
+    def test_replacing_photo_deletes_old_file(self):
+        old_name = self.category.photo.name
+        self.client.get(self.category.photo.url)
+        self.category.photo = SimpleUploadedFile('new.gif', b'GIF89a-new', content_type='image/gif')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        self.assertIsNone(default_storage._read_index(old_name))
+        self.assertFalse(default_storage.exists(old_name))
+
+    def test_deleting_owner_keeps_photo_still_in_use(self):
+        name = self.category.photo.name
+        other = Category.objects.create(name='Other', slug='other', photo=name)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertTrue(default_storage.exists(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertFalse(default_storage.exists(name))
+
+    def test_missing_file_is_404(self):
+        self.assertEqual(self.client.get(reverse('media_file', args=['nope.gif'])).status_code, 404)
+
+
+def _png(width, height):
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile('photo.png', buffer.getvalue(), content_type='image/png')
+
+
+class RenditionTests(TestCase):
+    def setUp(self):
+        override = self.settings(IMAGE_RENDITION_WORKERS=0)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.category = Category.objects.create(name='Img', slug='img')
+
+    def _create_good(self, width=400):
+        with self.captureOnCommitCallbacks(execute=True):
+            good = Good.objects.create(
+                name='Фото', slug=f'photo-{uuid.uuid4().hex[:6]}', price=Decimal('1.00'), count=1,
+                category=self.category, description='.', photo=_png(width, width // 2),
+            )
+        good.refresh_from_db()
+        return good
+
+    def test_generates_renditions_without_upscaling(self):
+        good = self._create_good(width=400)
+        expected = [str(w) for w in RENDITION_WIDTHS if w <= 400]
+        self.assertEqual(sorted(good.photo_renditions['webp'], key=int), expected)
+        self.assertEqual(sorted(good.photo_renditions['jpeg'], key=int), expected)
+        self.assertTrue(default_storage.exists(good.photo_renditions['webp']['160']))
+
+        html = self.client.get(reverse('good_detail', args=[good.id])).content.decode()
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_replacing_photo_drops_old_renditions(self):
+        good = self._create_good()
+        old = good.photo_renditions['jpeg']['160']
+        good.photo = _png(200, 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            good.save()
+        good.refresh_from_db()
+        self.assertFalse(default_storage.exists(old))
+        self.assertEqual(list(good.photo_renditions['jpeg']), ['160'])
+
+    def test_narrow_photo_is_marked_and_not_retried(self):
+        good = self._create_good(width=100)
+        self.assertEqual(good.photo_renditions, images.NO_RENDITIONS)
+        self.assertIn('<img src="', self.client.get(reverse('good_detail', args=[good.id])).content.decode())
+        with mock.patch.object(images, 'generate_renditions') as generate:
+            call_command('generate_renditions', stdout=io.StringIO())
+        generate.assert_not_called()
+
+    def test_force_replaces_rendition_files_in_place(self):
+        good = self._create_good()
+        before = good.photo_renditions
+        call_command('generate_renditions', force=True, stdout=io.StringIO())
+        good.refresh_from_db()
+        self.assertEqual(good.photo_renditions, before)
+        self.assertTrue(all(default_storage.exists(name) for name in images.rendition_names(before)))
+
+    def test_upload_does_not_wait_for_renditions(self):
+        release, scheduled = threading.Event(), []
+        real_schedule = images.schedule_renditions
+
+        def schedule(*args):
+            scheduled.append(real_schedule(*args))
+
+        with self.settings(IMAGE_RENDITION_WORKERS=2), \
+                mock.patch.object(images, 'generate_renditions', side_effect=lambda instances: release.wait(5)), \
+                mock.patch('ci_cd_project2.signals.schedule_renditions', side_effect=schedule):
+            self._create_good()
+            future, = scheduled
+            self.assertFalse(future.done())
+            release.set()
+            future.result(timeout=5)
+
+
+class AdminChangelistTests(TestCase):
+    """Кількість запитів changelist-ів не залежить від кількості рядків."""
+
+    changelists = ('customuser', 'good', 'notification', 'order', 'orderitem')
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser('root', 'root@example.com', 'pass')
+        self.client.force_login(self.admin)
+        self.categories = [Category.objects.create(name=f'Cat {i}', slug=f'admin-cat-{i}') for i in range(5)]
+        self._populate(3)
+
+    def _populate(self, size):
+        tag = uuid.uuid4().hex[:6]
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f'{tag}-{i}', password='!') for i in range(size)
+        )
+        goods = Good.objects.bulk_create(
+            Good(name=f'Good {i}', slug=f'{tag}-{i}', price=Decimal('2.50'), count=i % 3,
+                 category=self.categories[i % 5], description='.')
+            for i in range(size)
+        )
+        orders = Order.objects.bulk_create(
+            Order(user=user, status='new', total_price=Decimal('5.00'), items_count=1) for user in users
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, good=good, quantity=2, unit_price=good.price)
+            for order, good in zip(orders, goods)
+        )
+        Notification.objects.bulk_create(
+            Notification(user=user, good=good, message='m') for user, good in zip(users, goods)
+        )
+
+    def _query_counts(self):
+        counts = {}
+        for name in self.changelists:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(f'admin:ci_cd_project2_{name}_changelist'))
+            self.assertEqual(response.status_code, 200)
+            counts[name] = len(queries)
+        return counts
+
+    def test_query_count_is_constant(self):
+        small = self._query_counts()
+        self._populate(10_000)
+        # Не більше, ніж на малій таблиці: на PostgreSQL мала таблиця ще й
+        # рахується точно (COUNT після EXPLAIN), велика – лише за оцінкою
+        for name, count in self._query_counts().items():
+            self.assertLessEqual(count, small[name], name)
+
+    def test_order_changelist_shows_stored_totals(self):
+        response = self.client.get(reverse('admin:ci_cd_project2_order_changelist'))
+        self.assertContains(response, '<td class="field-total_price">5.00</td>', html=True)
+
+    def test_bulk_deleting_order_items_refreshes_totals(self):
+        items = list(OrderItem.objects.order_by('id'))
+        response = self.client.post(reverse('admin:ci_cd_project2_orderitem_changelist'), {
+            'action': 'delete_selected', 'post': 'yes',
+            helpers.ACTION_CHECKBOX_NAME: [item.pk for item in items[:2]],
+        })
+        self.assertEqual(response.status_code, 302)
+        totals = {order.pk: (order.total_price, order.items_count) for order in Order.objects.all()}
+        self.assertEqual(totals[items[0].order_id], (Decimal('0.00'), 0))
+        self.assertEqual(totals[items[1].order_id], (Decimal('0.00'), 0))
+        self.assertEqual(totals[items[2].order_id], (Decimal('5.00'), 1))
+
+
+class DbPoolStatusTests(TestCase):
+    def test_staff_only(self):
+        response = self.client.get(reverse('db_pool_status'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_reports_pool_saturation(self):
+        pool = mock.Mock()
+        pool.get_stats.return_value = {'pool_min': 1, 'pool_max': 4, 'pool_size': 4, 'pool_available': 1}
+        admin = get_user_model().objects.create_superuser('pooladmin', 'p@example.com', 'pass')
+        self.client.force_login(admin)
+        with mock.patch.object(type(connections['default']), 'pool', pool, create=True):
+            data = self.client.get(reverse('db_pool_status')).json()
+        self.assertEqual(data['pid'], os.getpid())
+        self.assertEqual(data['pools']['default']['in_use'], 3)
+        self.assertEqual(data['pools']['default']['saturation'], 0.75)
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Cached', slug='cached')
+        self.good = Good.objects.create(
+            name='Кешований', slug='cached-good', price=Decimal('10.00'), count=3,
+            category=self.category, description='.',
+        )
+        self.url = reverse('home')
+
+    def test_anonymous_hit_skips_database_and_refreshes_csrf_token(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        visitor = Client(enforce_csrf_checks=True)
+        with self.assertNumQueries(0):
+            second = visitor.get(self.url)
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        html = second.content.decode()
+        self.assertNotIn(page_cache.CSRF_PLACEHOLDER, html)
+        # Підставлений токен дійсний для cookie цього відвідувача
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', html).group(1)
+        response = visitor.post(reverse('add_to_cart', args=[self.good.id]), {'csrfmiddlewaretoken': token})
+        self.assertEqual(response.status_code, 302)
+
+    def test_good_save_and_checkout_invalidate(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.good.price = Decimal('12.50')
+            self.good.save()
+            # До коміту версія не змінюється
+            self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'hit')
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, '12.50')
+
+        buyer = get_user_model().objects.create_user('cache-buyer', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            place_order(buyer, {str(self.good.id): 3})
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Немає в наявності')
+
+    def test_expired_entry_is_rebuilt_by_one_worker(self):
+        key = page_cache._page_key(self.client.get(self.url).wsgi_request)
+        later = time.time() + settings.PAGE_CACHE_TIMEOUT + 1
+        with mock.patch('ci_cd_project2.page_cache.time.time', return_value=later):
+            # Інший воркер уже перебудовує сторінку
+            cache.add(f'{key}:rebuild', 1)
+            self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'stale')
+            cache.delete(f'{key}:rebuild')
+            self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'miss')
+
+    def test_invalidated_entry_is_served_stale_while_one_worker_rebuilds(self):
+        key = page_cache._page_key(self.client.get(self.url).wsgi_request)
+        page_cache.invalidate_pages()
+        cache.add(f'{key}:rebuild', 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'stale')
+        cache.delete(f'{key}:rebuild')
+        self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'miss')
+        self.assertEqual(self.client.get(self.url)['X-Page-Cache'], 'hit')
+
+    def test_authenticated_users_are_not_cached(self):
+        user = get_user_model().objects.create_user('cache-user', password='pass')
+        self.client.force_login(user)
+        self.assertNotIn('X-Page-Cache', self.client.get(self.url))
+
+    def test_disabled_page_cache_renders_every_time(self):
+        with self.settings(PAGE_CACHE_ENABLED=False):
+            self.client.get(self.url)
+            self.assertNotIn('X-Page-Cache', self.client.get(self.url))
+
+
+class OrderHistoryTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('history', password='pass')
+        self.client.force_login(self.user)
+        category = Category.objects.create(name='History', slug='history')
+        self.goods = Good.objects.bulk_create(
+            Good(name=f'H{i}', slug=f'history-{i}', price=Decimal('3.00'), count=10,
+                 category=category, description='.')
+            for i in range(3)
+        )
+        self.order = self._create_orders(1)[0]
+
+    def _create_orders(self, count):
+        orders = Order.objects.bulk_create(
+            Order(user=self.user, status='done', total_price=Decimal('18.00'), items_count=3)
+            for _ in range(count)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, good=good, quantity=2, unit_price=good.price)
+            for order in orders for good in self.goods
+        )
+        return orders
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_budget_does_not_grow_with_history(self):
+        profile_url = reverse('profile')
+        detail_url = reverse('order_detail', args=[self.order.id])
+        small_profile, _ = self._queries(profile_url)
+        small_detail, _ = self._queries(detail_url)
+
+        self._create_orders(200)
+        large_profile, response = self._queries(profile_url)
+        self.assertEqual(large_profile, small_profile)
+        self.assertEqual(self._queries(detail_url)[0], small_detail)
+        self.assertEqual(len(response.context['orders']), views.ORDERS_PER_PAGE)
+        self.assertTrue(response.context['page'].has_next)
+
+    def test_historic_prices_survive_catalogue_changes(self):
+        Good.objects.update(price=Decimal('99.00'))
+        _, response = self._queries(reverse('order_detail', args=[self.order.id]))
+        self.assertEqual(response.context['order'].total_price, Decimal('18.00'))
+        self.assertEqual(
+            sum(item.total_price for item in response.context['order'].items.all()), Decimal('18.00'),
+        )
+
+
+class IndexUsageTests(TestCase):
+    def test_hot_queries_use_their_indexes(self):
+        out = io.StringIO()
+        call_command('explain_indexes', users=20, goods=500, categories=5, per_user=30, force_index_scan=True,
+                     stdout=out)
+        self.assertIn('Усі запити використовують свої індекси.', out.getvalue())
+        self.assertFalse(Good.objects.exists())
+
+    def test_in_stock_filter(self):
+        category = Category.objects.create(name='Stock', slug='stock')
+        for slug, count in (('in', 2), ('out', 0)):
+            Good.objects.create(name=slug, slug=f'stock-{slug}', price=Decimal('1.00'), count=count,
+                                category=category, description='.')
+        response = self.client.get(reverse('category_goods', args=['stock']), {'in_stock': 1})
+        self.assertEqual([good.slug for good in response.context['goods']], ['stock-in'])
+
+
+class CartStoreTests(TestCase):
+    stores = (
+        'ci_cd_project2.cart_store.DatabaseCartStore',
+        'ci_cd_project2.cart_store.CacheCartStore',
+        'ci_cd_project2.cart_store.SignedCookieCartStore',
+        'ci_cd_project2.cart_store.SessionCartStore',
+    )
+
+    def setUp(self):
+        category = Category.objects.create(name='Store', slug='store')
+        self.good = Good.objects.create(name='Store', slug='store-good', price=Decimal('1.00'), count=3,
+                                        category=category, description='.')
+        self.other = Good.objects.create(name='Other', slug='store-other', price=Decimal('1.00'), count=5,
+                                         category=category, description='.')
+
+    def _items(self, client):
+        return client.get(reverse('cart')).wsgi_request.cart.items()
+
+    def test_incomplete_store_fails_on_creation(self):
+        class NoSave(_DictCartStore):
+            def _load(self):
+                return {}
+
+        with self.assertRaises(TypeError):
+            NoSave(None)
+
+    def test_line_operations_on_every_store(self):
+        good, other = str(self.good.id), str(self.other.id)
+        for store in self.stores:
+            with self.subTest(store=store), self.settings(CART_STORE=store):
+                client = Client()
+                fill_cart(client, {self.good: 2, self.other: 1})
+                self.assertEqual(self._items(client), {good: 2, other: 1})
+
+                for _ in range(3):
+                    client.get(reverse('increase_quantity', args=[self.good.id]))
+                self.assertEqual(self._items(client)[good], 3)  # не більше залишку
+
+                client.get(reverse('decrease_quantity', args=[self.other.id]))
+                client.get(reverse('remove_from_cart', args=[self.good.id]))
+                self.assertEqual(self._items(client), {})
+
+    def test_cache_store_keeps_lines_added_concurrently(self):
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.CART_COOKIE_NAME] = 'c' * 32
+        goods = [self.good.id, self.other.id, 1001, 1002]
+        real_ids = CacheCartStore._ids
+        start = threading.Barrier(len(goods))
+
+        def slow_ids(store):
+            ids = real_ids(store)
+            time.sleep(0.02)  # без блокування всі потоки прочитали б той самий список
+            return ids
+
+        def add(good_id):
+            start.wait(5)
+            CacheCartStore(request).increment(good_id)
+
+        with mock.patch.object(CacheCartStore, '_ids', slow_ids):
+            threads = [threading.Thread(target=add, args=(good_id,)) for good_id in goods]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(CacheCartStore(request).items(), {str(good_id): 1 for good_id in goods})
+
+    def test_database_store_does_not_write_sessions(self):
+        from django.contrib.sessions.models import Session
+        fill_cart(self.client, {self.good: 2})
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(CartItem.objects.get().quantity, 2)
+
+    def test_legacy_session_cart_is_imported_once(self):
+        session = self.client.session
+        session['cart'] = {str(self.good.id): 2, '999999': 1}
+        session.save()
+        self.assertEqual(self._items(self.client), {str(self.good.id): 2})
+        self.assertNotIn('cart', self.client.session)
+
+    def test_sweep_removes_abandoned_lines(self):
+        fill_cart(self.client, {self.good: 1, self.other: 1})
+        CartItem.objects.filter(good=self.good).update(
+            updated_at=timezone.now() - timedelta(seconds=settings.CART_TTL + 1),
+        )
+        call_command('sweep_carts', batch_size=1, sleep=0, stdout=io.StringIO())
+        self.assertEqual(list(CartItem.objects.values_list('good_id', flat=True)), [self.other.id])
+
+
+class CatalogApiTests(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Api', slug='api')
+        self.good = Good.objects.create(name='Api', slug='api-good', price=Decimal('3.50'), count=2,
+                                        category=self.category, description='.')
+        Good.objects.create(name='Sold out', slug='api-sold-out', price=Decimal('1.00'), count=0,
+                            category=self.category, description='.')
+
+    def test_sparse_fieldset_and_filters(self):
+        response = self.client.get(reverse('api_goods'), {'in_stock': 1, 'fields': 'id,price'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'results': [{'id': self.good.id, 'price': '3.50'}], 'next': None, 'previous': None,
+        })
+        self.assertEqual(self.client.get(reverse('api_goods'), {'fields': 'id,secret'}).status_code, 400)
+
+    def test_not_modified_costs_one_query(self):
+        response = self.client.get(reverse('api_stock'))
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api_stock'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        self.good.count = 1
+        self.good.save()
+        response = self.client.get(reverse('api_stock'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CACHE_SHARED=True)
+    def test_shared_cache_etag_follows_catalog_version(self):
+        cache.clear()
+        etag = self.client.get(reverse('api_stock'))['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('api_stock'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.good.count = 1
+        with self.captureOnCommitCallbacks(execute=True):
+            self.good.save()
+        response = self.client.get(reverse('api_stock'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse('api_good_detail', args=[999999])).status_code, 404)
+
+    def test_category_change_invalidates_goods_etag(self):
+        url = reverse('api_good_detail', args=[self.good.id])
+        etag = self.client.get(url)['ETag']
+        self.category.name = 'Renamed'
+        self.category.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(reverse('api_categories'), {'fields': 'slug'}).json(),
+                         {'results': [{'slug': 'api'}]})
+
+
+class ImportCatalogTests(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = self.settings(MEDIA_CACHE_ROOT=os.path.join(self.tmp.name, 'media_cache'))
+        override.enable()
+        self.addCleanup(override.disable)
+        self.category = Category.objects.create(name='Old', slug='import-cat')
+        self.good = Good.objects.create(name='Old', slug='import-old', price=Decimal('1.00'), count=0,
+                                        category=self.category, description='.')
+        self.user = get_user_model().objects.create_user(username='subscriber', password='x')
+        self.good.subscribers.add(self.user)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as target:
+            target.write(content)
+        return path
+
+    def test_upserts_by_slug_and_notifies_once(self):
+        os.mkdir(os.path.join(self.tmp.name, 'photos'))
+        with open(os.path.join(self.tmp.name, 'photos', 'new.png'), 'wb') as photo:
+            photo.write(_png(10, 10).read())
+        categories = self._write('categories.csv', 'slug,name\nimport-cat,Renamed\nimport-new,New\n')
+        goods = self._write('goods.jsonl', '\n'.join([
+            '{"slug": "import-old", "name": "Back", "price": "2.50", "count": 3, "category": "import-cat"}',
+            '{"slug": "import-new", "name": "New", "price": "1", "count": 1, "category": "import-new",'
+            ' "photo": "new.png"}',
+            '{"slug": "import-bad", "name": "Bad", "price": "x", "category": "import-cat"}',
+            '{"slug": "import-lost", "name": "Lost", "price": "1", "category": "missing"}',
+            '{"slug": "import-nophoto", "name": "No photo", "price": "1", "category": "import-cat",'
+            ' "photo": "absent.png"}',
+        ]))
+
+        stderr = io.StringIO()
+        call_command('import_catalog', categories=categories, goods=goods, photos=os.path.join(self.tmp.name, 'photos'),
+                     chunk_size=1, workers=0, stdout=io.StringIO(), stderr=stderr)
+
+        self.category.refresh_from_db()
+        self.good.refresh_from_db()
+        self.assertEqual(self.category.name, 'Renamed')
+        self.assertEqual((self.good.name, self.good.price, self.good.count), ('Back', Decimal('2.50'), 3))
+        self.assertIn('back', self.good.search_document)
+        new = Good.objects.get(slug='import-new')
+        self.assertEqual(new.photo.name, 'goods/new.png')
+        self.assertTrue(default_storage.exists('goods/new.png'))
+        self.assertEqual(MediaFile.objects.get(name='goods/new.png').mimetype, 'image/png')
+        self.assertFalse(Good.objects.filter(slug__in=['import-bad', 'import-lost']).exists())
+        self.assertFalse(Good.objects.get(slug='import-nophoto').photo)
+        self.assertIn('goods.jsonl:3', stderr.getvalue())
+        self.assertIn('goods.jsonl:4', stderr.getvalue())
+        self.assertIn('goods.jsonl:5: фото', stderr.getvalue())
+
+        self.assertEqual(Notification.objects.filter(user=self.user, good=self.good).count(), 1)
+        self.assertFalse(self.good.subscribers.exists())
+
+    def _import_photo(self, content, **options):
+        photos = os.path.join(self.tmp.name, 'photos')
+        os.makedirs(photos, exist_ok=True)
+        with open(os.path.join(photos, 'same.gif'), 'wb') as photo:
+            photo.write(content)
+        goods = self._write('goods.jsonl', '{"slug": "import-old", "name": "Old", "price": "1", "count": 0,'
+                                           ' "category": "import-cat", "photo": "same.gif"}')
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_catalog', goods=goods, photos=photos, workers=0,
+                         stdout=io.StringIO(), stderr=io.StringIO(), **options)
+        return Good.objects.get(slug='import-old').photo.name
+
+    def test_updated_photo_with_same_filename_is_uploaded(self):
+        first = self._import_photo(b'GIF89a-first')
+        self.assertEqual(self._import_photo(b'GIF89a-first'), first)
+        second = self._import_photo(b'GIF89a-second')
+        self.assertNotEqual(second, first)
+        self.assertEqual(default_storage.open(second).read(), b'GIF89a-second')
+        self.assertFalse(default_storage.exists(first))
+
+    def test_failed_chunk_removes_its_uploads(self):
+        with mock.patch.object(Good.objects, 'bulk_create', side_effect=DatabaseError('boom')), \
+                self.assertRaises(DatabaseError):
+            self._import_photo(b'GIF89a-orphan')
+        self.assertFalse(MediaFile.objects.exists())
+
+
+class StockUpdateTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name='Stock', slug='bulk-stock')
+        self.goods = Good.objects.bulk_create(
+            Good(name=f'Bulk {i}', slug=f'bulk-{i}', price=Decimal('1.00'), count=i, category=category,
+                 description='.')
+            for i in range(3)
+        )
+        self.user = get_user_model().objects.create_user(username='bulk-subscriber', password='x')
+        self.goods[0].subscribers.add(self.user)
+
+    def _counts(self):
+        return list(Good.objects.filter(slug__startswith='bulk-').order_by('slug').values_list('count', flat=True))
+
+    def test_command_applies_levels_and_notifies_once(self):
+        path = os.path.join(tempfile.mkdtemp(), 'stock.csv')
+        with open(path, 'w') as target:
+            target.write('slug,count\nbulk-0,5\nbulk-1,0\nbulk-2,2\nmissing,1\n')
+        stderr = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('update_stock', path, stdout=io.StringIO(), stderr=stderr)
+        self.assertEqual(self._counts(), [5, 0, 2])
+        self.assertIn('missing', stderr.getvalue())
+        self.assertEqual(Notification.objects.filter(user=self.user, good=self.goods[0]).count(), 1)
+        self.assertEqual(get_user_model().objects.get(pk=self.user.pk).unread_notifications_count, 1)
+
+    def test_admin_action(self):
+        admin = get_user_model().objects.create_superuser('stock-admin', 'a@example.com', 'pass')
+        self.client.force_login(admin)
+        url = reverse('admin:ci_cd_project2_good_changelist')
+        selected = {'action': 'update_stock', '_selected_action': [good.pk for good in self.goods[:2]]}
+
+        response = self.client.post(url, selected)
+        self.assertContains(response, 'bulk-0,0\nbulk-1,1')
+
+        response = self.client.post(url, {**selected, 'apply': '1', 'levels': 'bulk-0,4\nbulk-1,1'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self._counts(), [4, 1, 2])
+        self.assertTrue(Notification.objects.filter(good=self.goods[0]).exists())
+
+    def test_notifies_after_releasing_row_locks(self):
+        outer = len(connection.atomic_blocks)
+        depths = []
+
+        def notify(ids):
+            depths.append(len(connection.atomic_blocks))
+            return 0
+
+        with mock.patch('ci_cd_project2.stock.notify_restocked_ids', side_effect=notify):
+            apply_stock_levels({'bulk-0': 3})
+        self.assertEqual(depths, [outer])
+
+
+class BenchmarkViewsTests(TestCase):
+    """Бюджети запитів перевіряються в кожному прогоні тестів (масштаб smoke).
+
+    Лише кількість запитів: затримку й памʼять перевіряє сама команда benchmark_views.
+    """
+
+    def test_all_routes_within_budgets(self):
+        output = os.path.join(tempfile.mkdtemp(), 'results.json')
+        call_command('benchmark_views', scale='smoke', repeat=1, check=['queries'], output=output,
+                     stdout=io.StringIO())
+        with open(output) as source:
+            results = json.load(source)
+        self.assertEqual(results['violations'], [])
+        self.assertIn('checkout', results['results'])
+
+    def test_exceeded_budget_fails(self):
+        budgets = os.path.join(tempfile.mkdtemp(), 'budgets.json')
+        with open(budgets, 'w') as target:
+            json.dump({connection.vendor: {'home_user': {'queries': 0}}}, target)
+        with self.assertRaises(CommandError):
+            call_command('benchmark_views', scale='smoke', repeat=1, only=['home_user'], budgets=budgets,
+                         stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_write_budgets_keeps_unchecked_metrics(self):
+        budgets = os.path.join(tempfile.mkdtemp(), 'budgets.json')
+        with open(budgets, 'w') as target:
+            json.dump({connection.vendor: {'category_list_user': {'queries': 0, 'p95_ms': 12345}}}, target)
+        call_command('benchmark_views', scale='smoke', repeat=1, only=['category_list_user'], budgets=budgets,
+                     check=['queries'], write_budgets=True, stdout=io.StringIO())
+        with open(budgets) as source:
+            budget = json.load(source)[connection.vendor]['category_list_user']
+        self.assertEqual(budget['p95_ms'], 12345)
+        self.assertGreater(budget['queries'], 0)
+
+
+def _scrape_metrics():
+    staff = get_user_model().objects.get_or_create(username='metrics-staff', defaults={'is_staff': True})[0]
+    client = Client()
+    client.force_login(staff)
+    return client.get('/metrics').content.decode()
+
+
+class MetricsTests(TestCase):
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_request_and_query_metrics(self):
+        category = Category.objects.create(name='Metrics', slug='metrics')
+        self.client.get(reverse('category_goods', args=[category.slug]))
+        body = _scrape_metrics()
+        self.assertIn('django_http_requests_total{method="GET",status="200",view="category_goods"}', body)
+        self.assertIn('django_http_request_duration_seconds_bucket{le="+Inf",view="category_goods"}', body)
+        self.assertIn('django_db_queries_total{view="category_goods"}', body)
+        self.assertRegex(body, r'django_cache_lookups_total\{cache="pages",result="miss"\} \d+')
+
+    def test_unknown_methods_share_one_label(self):
+        self.client.generic('BREW', reverse('api_stock'))
+        body = _scrape_metrics()
+        self.assertIn('method="other",status="405"', body)
+        self.assertNotIn('BREW', body)
+
+    def test_gunicorn_config_sets_metrics_dir(self):
+        env = {name: value for name, value in os.environ.items() if name != 'METRICS_DIR'}
+        script = ('import runpy, os; runpy.run_path("gunicorn.conf.py"); print(os.environ["METRICS_DIR"])')
+        result = subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), str(settings.BASE_DIR / '.metrics'))
+
+    def test_workers_are_aggregated_through_metrics_dir(self):
+        directory = tempfile.mkdtemp()
+        with open(os.path.join(directory, 'metrics-1.json'), 'w') as target:
+            json.dump([['django_cache_lookups_total', [['cache', 'other-worker'], ['result', 'hit']], 5]], target)
+        with self.settings(METRICS_DIR=directory):
+            body = _scrape_metrics()
+        self.assertIn('django_cache_lookups_total{cache="other-worker",result="hit"} 5', body)
+        self.assertTrue(os.path.exists(os.path.join(directory, f'metrics-{os.getpid()}.json')))
+
+    def test_closed_by_default(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_login(get_user_model().objects.create_user('metrics-user', password='x'))
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    def test_token(self):
+        with self.settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, 200)
+
+
+def _reload_urls():
+    # Кореневий urlconf тримає include() з уже прочитаними шаблонами – перечитуємо обидва
+    importlib.reload(urls)
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@override_settings(ASYNC_CATALOG_VIEWS=True)
+class AsyncCatalogTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # urls.py вибирає view за ASYNC_CATALOG_VIEWS під час імпорту
+        _reload_urls()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        _reload_urls()
+
+    def test_urls_pick_views_by_server_profile(self):
+        self.assertIs(resolve('/categories/').func, views.category_list)
+        with self.settings(ASYNC_CATALOG_VIEWS=False):
+            _reload_urls()
+            try:
+                self.assertIs(resolve('/categories/').func, views.category_list_sync)
+                self.assertFalse(iscoroutinefunction(resolve('/').func))
+            finally:
+                _reload_urls()
+
+    def test_sync_variants_render_same_pages(self):
+        category = Category.objects.create(name='Sync', slug='sync-category')
+        good = Good.objects.create(name='Sync good', slug='sync-good', price=Decimal('1.00'), count=1,
+                                   category=category, description='.')
+        factory = RequestFactory()
+        for view, args in ((views.home_sync, ()), (views.good_detail_sync, (good.id,)),
+                           (views.goods_by_category_sync, (category.slug,)), (views.category_list_sync, ())):
+            request = factory.get('/')
+            request.user = mock.Mock(is_authenticated=False)
+            request.session = {}
+            response = view(request, *args)
+            self.assertEqual(response.status_code, 200, view)
+            self.assertContains(response, 'Sync', msg_prefix=view.__name__)
+
+    def test_middleware_chain_stays_async_under_asgi(self):
+        # Django пише в django.request, коли обгортає sync middleware для async-ланцюжка
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+        for view in (views.home, views.good_detail, views.goods_by_category, views.category_list,
+                     views.notifications):
+            self.assertTrue(iscoroutinefunction(view), view)
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    async def test_anonymous_pages_are_cached(self):
+        category = await Category.objects.acreate(name='Async', slug='async-category')
+        await Good.objects.acreate(name='Async', slug='async-good', price=Decimal('1.00'), count=1,
+                                   category=category, description='.')
+        url = reverse('category_goods', args=[category.slug])
+        first = await self.async_client.get(url)
+        second = await self.async_client.get(url)
+        self.assertEqual((first['X-Page-Cache'], second['X-Page-Cache']), ('miss', 'hit'))
+        self.assertContains(second, 'Async')
+
+    async def test_notifications_inbox(self):
+        user = await sync_to_async(get_user_model().objects.create_user)(username='async-reader', password='x')
+        await Notification.objects.acreate(user=user, message='Async message')
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get(reverse('notifications'))
+        self.assertContains(response, 'Async message')
+
+
+class WarmupTests(TestCase):
+
+    def test_warm_up_compiles_templates_and_resolves_urls(self):
+        # Усередині транзакції тесту зʼєднання лишається відкритим
+        with mock.patch.object(connection, 'close') as close:
+            report = warm_up()
+        close.assert_not_called()
+        self.assertEqual(report.failed_templates, [])
+        self.assertEqual(report.templates, len(template_names()))
+        self.assertIn('base.html', template_names())
+        self.assertGreater(report.routes, 0)
+        self.assertEqual(set(report.timings), {'templates', 'urls', 'databases'})
+        body = _scrape_metrics()
+        self.assertIn('django_warmup_duration_seconds_count{stage="templates"}', body)
+
+    def test_command_probes_first_requests(self):
+        out = io.StringIO()
+        call_command('warmup', probe=['/', '/categories/'], stdout=out)
+        self.assertIn('templates', out.getvalue())
+        self.assertRegex(out.getvalue(), r'/categories/\s+перший\s+[\d.]+ мс')
+
+
+class ProductionSettingsTests(TestCase):
+
+    def test_imports_without_secrets_and_uses_cached_loader(self):
+        script = (
+            'import django; django.setup()\n'
+            'from django.conf import settings\n'
+            'from django.core.exceptions import ImproperlyConfigured\n'
+            'print(settings.DEBUG, settings.TEMPLATES[0]["OPTIONS"]["loaders"][0][0])\n'
+            'try:\n    settings.SECRET_KEY\nexcept ImproperlyConfigured:\n    print("no secret")\n'
+            'print(settings.CACHES["default"]["BACKEND"], settings.PAGE_CACHE_ENABLED)\n'
+        )
+        result = self._run(script)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.split('\n')[:3],
+                         ['False django.template.loaders.cached.Loader', 'no secret',
+                          'django.core.cache.backends.filebased.FileBasedCache True'])
+
+    def test_refuses_per_process_cache_with_several_workers(self):
+        script = 'import django; django.setup()\n'
+        result = self._run(script, CACHE_BACKEND='locmem')
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('CACHE_BACKEND=locmem', result.stderr)
+        self.assertEqual(self._run(script, CACHE_BACKEND='locmem', WEB_CONCURRENCY='1').returncode, 0)
+
+    def _run(self, script, **extra_env):
+        if (settings.BASE_DIR / '.env').is_file():
+            self.skipTest('.env задає змінні оточення')
+        env = {name: value for name, value in os.environ.items()
+               if not name.startswith(('DB_', 'CACHE_', 'PAGE_CACHE_'))
+               and name not in ('DJANGO_SECRET_KEY', 'PYTHONPATH', 'WEB_CONCURRENCY')}
+        env.update(extra_env, DJANGO_SETTINGS_MODULE='CI_CD_Project.settings_production')
+        return subprocess.run([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+                              capture_output=True, text=True)
@@ -5,8 +5,15 @@
 view‑функції.
 """
 
+from django.conf import settings           # ASYNC_CATALOG_VIEWS
 from django.urls import path               # Функція «path» описує шаблони URL
-from . import views                        # Імпортуємо view‑функції поточного застосунку
+from . import api, metrics, views          # Імпортуємо view‑функції поточного застосунку
+
+
+def catalog_view(name):
+    """Async view каталогу під ASGI або його синхронний варіант під WSGI."""
+    return getattr(views, name if settings.ASYNC_CATALOG_VIEWS else f'{name}_sync')
+
 
 # ======================================================================
 #                         Перелік маршрутів сайту
@@ -16,10 +23,10 @@ urlpatterns = [
     # ------------------------------------------------------------------
     # Головна сторінка магазину.
     #   URL:   /
-    #   View:  views.home
+    #   View:  views.home (views.home_sync під WSGI)
     #   Name:  home  – використовується у {% url 'home' %}
     # ------------------------------------------------------------------
-    path('', views.home, name='home'),
+    path('', catalog_view('home'), name='home'),
 
     # ------------------------------------------------------------------
     # Підписка на сповіщення про появу товару у продажу.
@@ -35,7 +42,7 @@ urlpatterns = [
     # ------------------------------------------------------------------
     # Перегляд конкретного товару.
     # ------------------------------------------------------------------
-    path('good/<int:good_id>/', views.good_detail, name='good_detail'),
+    path('good/<int:good_id>/', catalog_view('good_detail'), name='good_detail'),
 
     # ------------------------------------------------------------------
     # Кошик та повʼязані дії.
@@ -65,14 +72,35 @@ urlpatterns = [
     path('order/', views.order, name='order'),
 
     # Сторінка сповіщень користувача
-    path('notifications/', views.notifications, name='notifications'),
+    path('notifications/', catalog_view('notifications'), name='notifications'),
+    # Позначити сповіщення прочитаними (вибрані або всі)
+    path('notifications/read/', views.mark_notifications_read, name='mark_notifications_read'),
 
     # ------------------------------------------------------------------
     # Фільтрація товарів за категорією.
     #   slug – читабельний ідентифікатор категорії.
     # ------------------------------------------------------------------
-    path('category/<slug:slug>/', views.goods_by_category, name='category_goods'),
+    path('category/<slug:slug>/', catalog_view('goods_by_category'), name='category_goods'),
 
     # Список усіх категорій
-    path('categories/', views.category_list, name='category_list'),
+    path('categories/', catalog_view('category_list'), name='category_list'),
+
+    # ------------------------------------------------------------------
+    # Фото товарів і категорій (БД + дисковий кеш, див. storage.py).
+    #   name – імʼя файлу у сховищі, напр. goods/phone.jpg
+    # ------------------------------------------------------------------
+    path('media/<path:name>', views.media_file, name='media_file'),
+
+    # Статистика пулу зʼєднань з БД (JSON, лише для персоналу)
+    path('health/db-pool/', views.db_pool_status, name='db_pool_status'),
+    # Метрики запитів у форматі Prometheus (див. metrics.py)
+    path('metrics', metrics.metrics_view, name='metrics'),
+
+    # ------------------------------------------------------------------
+    # JSON API каталогу (лише читання, ETag, ?fields=).
+    # ------------------------------------------------------------------
+    path('api/goods/', api.goods, name='api_goods'),
+    path('api/goods/<int:good_id>/', api.good_detail, name='api_good_detail'),
+    path('api/categories/', api.categories, name='api_categories'),
+    path('api/stock/', api.stock, name='api_stock'),
 ]
@@ -9,48 +9,133 @@
 #                         Імпорт необхідних пакетів
 # ======================================================================
 
-import unicodedata  # Нормалізація тексту
+import os  # PID воркера для статистики пулу
 
+from asgiref.sync import sync_to_async  # Синхронний код з async view
 from django.contrib import messages  # flash‑повідомлення для користувача
+from django.contrib.admin.views.decorators import staff_member_required  # Службові сторінки
 from django.contrib.auth import login, logout  # Аутентифікація користувачів
 from django.contrib.auth import update_session_auth_hash  # Зберігає сесію після зміни паролю
 from django.contrib.auth.decorators import login_required  # Декоратор перевірки авторизації
 from django.contrib.auth.forms import PasswordChangeForm  # Стандартна форма зміни паролю
-from django.shortcuts import render, redirect, get_object_or_404  # Шаблонні функції
+from django.conf import settings  # Налаштування проєкту
+from django.core.files.storage import default_storage  # Сховище медіафайлів
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse  # Відповіді для медіафайлів і JSON
+from django.utils.cache import get_conditional_response  # Обробка If-None-Match
+from django.db import transaction  # Транзакції для оформлення замовлення
+from django.db.models import Prefetch  # Попереднє завантаження позицій замовлень
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404  # Шаблонні функції
 from django.urls import reverse  # Генерація URL за іменем
+from django.views.decorators.http import require_POST, require_safe  # Обмеження HTTP-методів
 
+from .cart import resolve_cart  # Розрахунок кошика одним запитом
+from .checkout import CheckoutError, place_order  # Транзакційне оформлення замовлення
+from .db_pool import pool_stats  # Статистика пулу зʼєднань з БД
 from .forms import *  # імпортуємо усі форми поточного застосунку
 from .models import *  # імпортуємо всі моделі поточного застосунку
+from .notifications import mark_read  # Масове "прочитано" одним UPDATE
+from .page_cache import cache_anonymous_page  # Кеш сторінок каталогу для гостей
+from .pagination import apaginate, paginate  # Keyset-пагінація списків
+from .search import search_goods  # Пошук товарів по індексованій колонці
 
+# Розміри сторінок для списків
+GOODS_PER_PAGE = 24
+NOTIFICATIONS_PER_PAGE = 20
+ORDERS_PER_PAGE = 10
+
+
+# ======================================================================
+#                            View‑функції сайту
+# ======================================================================
 
 # ----------------------------------------------------------------------
-# Допоміжна функція для нормалізації тексту: прибираємо діакритики та
-# переводимо у нижній регістр. Використовується у пошуку товарів.
+# Async view каталогу (home, good_detail, goods_by_category,
+# category_list, notifications). Дані читаються async ORM, поки воркер
+# обслуговує інші запити; шаблон рендериться в потоці (arender), бо
+# звертається до сесії, користувача та кешу категорій синхронно.
+#
+# Кожен має синхронний варіант ``<імʼя>_sync`` для профілю WSGI (вибір –
+# у urls.py за ASYNC_CATALOG_VIEWS): під WSGI async view виконувався б
+# через async_to_sync – з циклом подій і переходами між потоками на
+# кожен запит.
 # ----------------------------------------------------------------------
 
-def normalize_text(text: str) -> str:
-    """Повертає нормалізований ASCII‑рядок без діакритиків та у нижньому регістрі."""
-    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8').lower()
+arender = sync_to_async(render)
 
 
-# ======================================================================
-#                            View‑функції сайту
-# ======================================================================
+async def _auser(request):
+    # request.user і request.auser() кешують користувача окремо – завантажуємо один раз
+    request.user = user = await request.auser()
+    return user
+
+
+# ID товарів, на які підписаний поточний користувач. Рахується один раз
+# на запит, щоб шаблон перевіряв підписку без запиту на кожну картку.
+
+async def _asubscribed_good_ids(request):
+    user = await _auser(request)
+    if not user.is_authenticated:
+        return set()
+    return {good_id async for good_id in user.subscribed_goods.values_list('id', flat=True)}
+
+
+def _subscribed_good_ids(request):
+    if not request.user.is_authenticated:
+        return set()
+    return set(request.user.subscribed_goods.values_list('id', flat=True))
+
 
 # ----------------------------------------------------------------------
-# Головна сторінка. Показує всі товари та реалізує простий пошук.
+# Фільтр ?in_stock=1 – лише товари в наявності (частковий індекс
+# good_in_stock_idx).
 # ----------------------------------------------------------------------
 
-def home(request):
+def _in_stock_only(request, goods):
+    if request.GET.get('in_stock'):
+        return goods.filter(count__gt=0)
+    return goods
+
+
+# ----------------------------------------------------------------------
+# Головна сторінка. Показує товари посторінково та реалізує пошук.
+# ----------------------------------------------------------------------
+
+@cache_anonymous_page
+async def home(request):
     query = request.GET.get('q')  # Параметр пошуку з рядка запиту
-    goods = Good.objects.all()  # Витягуємо всі товари
+    goods = Good.objects.all()
 
     if query:
-        # Шукаємо збіг підрядка у назвах товарів (без врахування регістру)
-        normalized_query = query.strip().lower()
-        goods = [good for good in goods if normalized_query in good.name.lower()]
+        # Пошук і ранжування виконує база даних (див. search.py);
+        # показуємо лише найрелевантніші результати, без пагінації.
+        goods = [good async for good in search_goods(goods, query)]
+        page = None
+    else:
+        goods = page = await apaginate(request, _in_stock_only(request, goods), GOODS_PER_PAGE, with_total=True)
+
+    return await arender(request, 'home.html', {
+        'goods': goods,
+        'page': page,
+        'subscribed_ids': await _asubscribed_good_ids(request),
+    })
+
+
+@cache_anonymous_page
+def home_sync(request):
+    query = request.GET.get('q')
+    goods = Good.objects.all()
+
+    if query:
+        goods = list(search_goods(goods, query))
+        page = None
+    else:
+        goods = page = paginate(request, _in_stock_only(request, goods), GOODS_PER_PAGE, with_total=True)
 
-    return render(request, 'home.html', {'goods': goods})
+    return render(request, 'home.html', {
+        'goods': goods,
+        'page': page,
+        'subscribed_ids': _subscribed_good_ids(request),
+    })
 
 
 # ----------------------------------------------------------------------
@@ -92,6 +177,8 @@ def register_view(request):
 # ----------------------------------------------------------------------
 
 def user_logout(request):
+    # Кошик живе поза сесією, тож очищаємо його явно, як раніше це робив flush сесії
+    request.cart.clear()
     logout(request)
     return redirect('home')  # Повертаємося на головну
 
@@ -100,11 +187,21 @@ def user_logout(request):
 # Профіль користувача: історія замовлень та базові дані.
 # ----------------------------------------------------------------------
 
+def _orders_with_items(user):
+    # Замовлення користувача з позиціями і товарами: 2 запити
+    # (замовлення; позиції JOIN товари).
+    items = OrderItem.objects.select_related('good').order_by('id')
+    return Order.objects.filter(user=user).prefetch_related(Prefetch('items', queryset=items))
+
+
 @login_required
 def profile(request):
     user = request.user
-    orders = Order.objects.filter(user=user).order_by('-created_at')
-    return render(request, 'profile.html', {'user': user, 'orders': orders})
+    # Сума і кількість позицій зберігаються в Order – позиції не потрібні
+    orders = paginate(request, Order.objects.filter(user=user), ORDERS_PER_PAGE)
+    for order in orders:
+        order.user = user  # Order.__str__ не перечитує користувача
+    return render(request, 'profile.html', {'user': user, 'orders': orders, 'page': orders})
 
 
 # ----------------------------------------------------------------------
@@ -150,84 +247,56 @@ def change_password_view(request):
 
 @login_required
 def order_detail(request, order_id):
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    order = get_object_or_404(_orders_with_items(request.user), id=order_id)
+    order.user = request.user  # Order.__str__ не перечитує користувача
     return render(request, 'order_detail.html', {'order': order})
 
 
 # ======================================================================
-#                       Робота з кошиком (Session Cart)
+#                 Робота з кошиком (request.cart, див. cart_store.py)
 # ======================================================================
 
-# Додаємо товар у кошик (Session‑based).
+# Додаємо товар у кошик (атомарне +1 у сховищі кошика).
 
 def add_to_cart(request, good_id):
     good = get_object_or_404(Good, id=good_id)
-    cart = request.session.get('cart', {})  # Отримуємо кошик з сесії
-    cart[str(good_id)] = cart.get(str(good_id), 0) + 1  # Збільшуємо кількість
-    request.session['cart'] = cart  # Зберігаємо кошик у сесії
+    request.cart.increment(good.id)  # Збільшуємо кількість
     return redirect('cart')  # Переходимо до кошика
 
 
 # Оновлення кількості конкретного товару (збільшити/зменшити).
 
 def update_cart_quantity(request, good_id, action):
-    cart = request.session.get('cart', {})
-    good_id = str(good_id)
     good = get_object_or_404(Good, id=good_id)
 
-    if good_id in cart:
-        if action == 'increase':
-            # Не дозволяємо перевищити наявну кількість на складі
-            cart[good_id] = min(cart[good_id] + 1, good.count)
-        elif action == 'decrease':
-            cart[good_id] -= 1
-            if cart[good_id] <= 0:
-                del cart[good_id]
+    if action == 'increase':
+        # Не дозволяємо перевищити наявну кількість на складі
+        request.cart.increment(good.id, 1, maximum=good.count, create=False)
+    elif action == 'decrease':
+        request.cart.increment(good.id, -1)  # позиція з 0 видаляється
 
-    request.session['cart'] = cart
     return redirect('cart')
 
 
 # Видалення товару з кошика повністю.
 
 def remove_from_cart(request, good_id):
-    cart = request.session.get('cart', {})
-    good_id = str(good_id)
-    cart.pop(good_id, None)  # Безпечне видалення
-    request.session['cart'] = cart
+    request.cart.remove(good_id)  # Безпечне видалення
     return redirect('cart')
 
 
 # Перегляд кошика.
 
 def cart_view(request):
-    cart = request.session.get('cart', {})
-    cart_items = []
-    total = 0
+    resolved = resolve_cart(request.cart.items())  # Усі товари кошика – одним запитом
 
-    for good_id_str, quantity in cart.items():
-        try:
-            gid = int(good_id_str)
-            good = Good.objects.get(id=gid)
-        except (ValueError, Good.DoesNotExist):
-            # або можна очистити такі записи з cart:
-            # del cart[good_id_str]
-            continue
-
-        item_total = good.price * quantity
-        total += item_total
-        cart_items.append({
-            'good': good,
-            'quantity': quantity,
-            'item_total': item_total,
-        })
-
-    # За бажанням: оновити сесію без "битих" записів
-    request.session['cart'] = {k: v for k, v in cart.items() if Good.objects.filter(id=k).exists()}
+    # Прибираємо "биті" записи (видалені товари, некоректні кількості)
+    if resolved.stale_keys:
+        request.cart.discard(resolved.stale_keys)
 
     return render(request, 'cart.html', {
-        'cart_items': cart_items,
-        'total': total
+        'cart_items': resolved.lines,
+        'total': resolved.total
     })
 
 # ======================================================================
@@ -248,7 +317,8 @@ def notify_availability(request, good_id):
     good = get_object_or_404(Good, id=good_id)
 
     # Додаємо користувача до списку підписників, якщо він ще не підписаний.
-    if request.user not in good.subscribers.all():
+    # Перевіряємо одну пару (товар, користувач), а не весь список підписників.
+    if not request.user.subscribed_goods.filter(pk=good.pk).exists():
         good.subscribers.add(request.user)
         messages.info(request, f"Ви підписались на сповіщення про {good.name}")
     else:
@@ -257,19 +327,61 @@ def notify_availability(request, good_id):
     return redirect('home')
 
 
-# Вивід усіх нотифікацій користувача.
+# Вхідні сповіщення користувача (посторінково, з фільтром за статусом).
 
 @login_required
-def notifications(request):
-    user_notifications = request.user.notifications.all().order_by('-created_at')
-    return render(request, 'notifications.html', {'notifications': user_notifications})
+async def notifications(request):
+    user = await _auser(request)
+    user_notifications = user.notifications.all()
+    status = request.GET.get('status')
+    if status == Notification.STATUS_UNREAD:
+        user_notifications = user_notifications.filter(status=status)
+
+    page = await apaginate(request, user_notifications, NOTIFICATIONS_PER_PAGE)
+    return await arender(request, 'notifications.html', {'notifications': page, 'page': page, 'status': status})
+
+
+@login_required
+def notifications_sync(request):
+    user_notifications = request.user.notifications.all()
+    status = request.GET.get('status')
+    if status == Notification.STATUS_UNREAD:
+        user_notifications = user_notifications.filter(status=status)
+
+    page = paginate(request, user_notifications, NOTIFICATIONS_PER_PAGE)
+    return render(request, 'notifications.html', {'notifications': page, 'page': page, 'status': status})
+
+
+# Позначити прочитаними вибрані (ids) або всі (all) сповіщення.
+
+@login_required
+@require_POST
+def mark_notifications_read(request):
+    if 'all' in request.POST:
+        mark_read(request.user)
+    else:
+        ids = [value for value in request.POST.getlist('ids') if value.isdigit()]
+        mark_read(request.user, ids)
+
+    # Повертаємося на ту саму сторінку вхідних (фільтр і курсор у GET)
+    url = reverse('notifications')
+    if request.GET:
+        url += '?' + request.GET.urlencode()
+    return redirect(url)
 
 
 # ======================================================================
 #                           Сторінка товару
 # ======================================================================
 
-def good_detail(request, good_id):
+@cache_anonymous_page
+async def good_detail(request, good_id):
+    good = await aget_object_or_404(Good, id=good_id)
+    return await arender(request, 'good_detail.html', {'good': good})
+
+
+@cache_anonymous_page
+def good_detail_sync(request, good_id):
     good = get_object_or_404(Good, id=good_id)
     return render(request, 'good_detail.html', {'good': good})
 
@@ -282,95 +394,175 @@ CustomUser = get_user_model()  # Підтримка кастомної моде
 
 
 def order(request):
-    cart = request.session.get('cart', {})
+    cart = request.cart.items()
     if not cart:
         messages.warning(request, "Ваш кошик порожній!")
         return redirect('cart')
 
     if request.method == 'POST':
-        # --------------------------------------------------------------
-        # 1. Отримуємо або створюємо користувача
-        # --------------------------------------------------------------
-        if request.user.is_authenticated:
-            user = request.user
-        else:
-            if CustomUser.objects.filter(username=request.POST['username']).exists():
-                messages.error(request, "Користувач з таким іменем вже існує.")
-                return redirect('order')
-
-            # Створюємо гостя як повноцінного користувача з рандомним паролем
-            user = CustomUser.objects.create_user(
-                username=request.POST['username'],
-                email=request.POST['email'],
-                phone_number=request.POST['phone_number'],
-                address=request.POST['address'],
-                password=None  # → Django поставить unusable password
-            )
-
-        # --------------------------------------------------------------
-        # 2. Створюємо замовлення та додаємо позиції
-        # --------------------------------------------------------------
-        order = Order.objects.create(user=user, status="Очікується підтвердження")
-
-        for good_id, quantity in cart.items():
-            good = get_object_or_404(Good, id=good_id)
-
-            # Актуалізуємо залишок товару
-            if good.count >= quantity:
-                good.count -= quantity
-                good.save()
-            else:
-                messages.warning(request, f"Товару '{good.name}' залишилось лише {good.count}. Кількість змінено.")
-                quantity = good.count
-                good.count = 0
-                good.save()
-
-            # Додаємо позицію у замовлення, якщо хоч щось залишилося
-            if quantity > 0:
-                OrderItem.objects.create(order=order, good=good, quantity=quantity)
+        try:
+            # Користувач-гість і замовлення створюються в одній транзакції:
+            # якщо оформити не вдалося, гість теж не зберігається.
+            with transaction.atomic():
+                # --------------------------------------------------------------
+                # 1. Отримуємо або створюємо користувача
+                # --------------------------------------------------------------
+                if request.user.is_authenticated:
+                    user = request.user
+                else:
+                    if CustomUser.objects.filter(username=request.POST['username']).exists():
+                        messages.error(request, "Користувач з таким іменем вже існує.")
+                        return redirect('order')
+
+                    # Створюємо гостя як повноцінного користувача з рандомним паролем
+                    user = CustomUser.objects.create_user(
+                        username=request.POST['username'],
+                        email=request.POST['email'],
+                        phone_number=request.POST['phone_number'],
+                        address=request.POST['address'],
+                        password=None  # → Django поставить unusable password
+                    )
+
+                # --------------------------------------------------------------
+                # 2. Створюємо замовлення, списуємо залишки (див. checkout.py)
+                # --------------------------------------------------------------
+                result = place_order(user, cart)
+        except CheckoutError as error:
+            messages.error(request, str(error))
+            return redirect('cart')
+
+        for line in result.adjusted:
+            messages.warning(request, f"Товару '{line.good.name}' залишилось лише {line.ordered}. Кількість змінено.")
 
         # Очищаємо кошик та повідомляємо користувача
-        request.session['cart'] = {}
+        request.cart.clear()
         messages.success(request, "Замовлення успішно оформлено!")
         return redirect('profile' if request.user.is_authenticated else 'home')
 
     # --------------------------------------------------------------
     # GET‑запит: показуємо форму з поточними товарами у кошику
     # --------------------------------------------------------------
-    cart_items = _get_cart_items(cart)
-    total = _get_cart_total(cart)
-    return render(request, 'order.html', {'cart_items': cart_items, 'total': total})
+    resolved = resolve_cart(cart)
+    return render(request, 'order.html', {'cart_items': resolved.lines, 'total': resolved.total})
 
 
-# ----------------------------------------------------------------------
-# Допоміжні функції для розрахунку позицій та сум у кошику
-# ----------------------------------------------------------------------
+# ======================================================================
+#                      Категорії та фільтрація товарів
+# ======================================================================
+
+@cache_anonymous_page
+async def goods_by_category(request, slug):
+    category = await aget_object_or_404(Category, slug=slug)
+    goods = _in_stock_only(request, Good.objects.filter(category=category))
+    page = await apaginate(request, goods, GOODS_PER_PAGE, with_total=True)
+    return await arender(request, 'category_goods.html', {
+        'category': category,
+        'goods': page,
+        'page': page,
+        'subscribed_ids': await _asubscribed_good_ids(request),
+    })
+
+
+@cache_anonymous_page
+def goods_by_category_sync(request, slug):
+    category = get_object_or_404(Category, slug=slug)
+    goods = _in_stock_only(request, Good.objects.filter(category=category))
+    page = paginate(request, goods, GOODS_PER_PAGE, with_total=True)
+    return render(request, 'category_goods.html', {
+        'category': category,
+        'goods': page,
+        'page': page,
+        'subscribed_ids': _subscribed_good_ids(request),
+    })
+
 
-def _get_cart_items(cart):
-    return [
-        {
-            'good': get_object_or_404(Good, id=good_id),
-            'quantity': quantity,
-            'item_total': get_object_or_404(Good, id=good_id).price * quantity,
-        }
-        for good_id, quantity in cart.items()
-    ]
+@cache_anonymous_page
+async def category_list(request):
+    categories = [category async for category in Category.objects.all()]
+    return await arender(request, 'category_list.html', {'categories': categories})
 
 
-def _get_cart_total(cart):
-    return sum(get_object_or_404(Good, id=good_id).price * quantity for good_id, quantity in cart.items())
+@cache_anonymous_page
+def category_list_sync(request):
+    return render(request, 'category_list.html', {'categories': list(Category.objects.all())})
 
 
 # ======================================================================
-#                      Категорії та фільтрація товарів
+#                 Медіафайли (фото) з дискового кешу
 # ======================================================================
 
-def goods_by_category(request, slug):
-    category = get_object_or_404(Category, slug=slug)
-    goods = Good.objects.filter(category=category)
-    return render(request, 'category_goods.html', {'category': category, 'goods': goods})
+# Імʼя файлу може знову зʼявитися після видалення (копії фото перегенеровуються
+# під тими самими іменами), тож URL не «вічний»: кеш щоразу перевіряє ETag
+# і отримує 304 без тіла, поки вміст не змінився.
+MEDIA_CACHE_CONTROL = 'public, no-cache'
+
+
+def _parse_range(header, size):
+    """Розбирає ``Range: bytes=a-b`` (один діапазон). Повертає (start, end) або None."""
+    unit, _, spec = header.partition('=')
+    if unit.strip() != 'bytes' or ',' in spec:
+        return None
+    start, _, end = spec.strip().partition('-')
+    try:
+        if start:
+            start, end = int(start), int(end) if end else size - 1
+        else:
+            start, end = size - int(end), size - 1  # bytes=-N – останні N байтів
+    except ValueError:
+        return None
+    start, end = max(start, 0), min(end, size - 1)
+    if start > end:
+        return None
+    return start, end
+
+
+@require_safe
+def media_file(request, name):
+    if not hasattr(default_storage, 'cached_entry'):
+        raise Http404
+    entry = default_storage.cached_entry(name)
+    if entry is None:
+        raise Http404
+
+    # Сильний ETag за sha256 вмісту
+    etag = f'"{entry["digest"]}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        size = entry['size']
+        byte_range = None
+        if 'HTTP_RANGE' in request.META:
+            byte_range = _parse_range(request.META['HTTP_RANGE'], size)
+            if byte_range is None:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        if settings.MEDIA_CACHE_ACCEL_REDIRECT:
+            # nginx сам віддає файл (sendfile) і обробляє Range
+            response = HttpResponse(content_type=entry['mimetype'])
+            response['X-Accel-Redirect'] = (
+                settings.MEDIA_CACHE_ACCEL_REDIRECT + entry['path'].relative_to(default_storage.cache_root).as_posix()
+            )
+        elif byte_range is not None:
+            start, end = byte_range
+            with open(entry['path'], 'rb') as blob:
+                blob.seek(start)
+                response = HttpResponse(blob.read(end - start + 1), content_type=entry['mimetype'], status=206)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            # FileResponse віддається через wsgi.file_wrapper → sendfile
+            response = FileResponse(open(entry['path'], 'rb'), content_type=entry['mimetype'])
 
+    response['ETag'] = etag
+    response['Cache-Control'] = MEDIA_CACHE_CONTROL
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+# ----------------------------------------------------------------------
+# Стан пулу зʼєднань з БД процесу, що обробив запит (лише для персоналу).
+# ----------------------------------------------------------------------
+@staff_member_required
+def db_pool_status(request):
+    return JsonResponse({'pid': os.getpid(), 'pools': pool_stats()})
 
-def category_list(request):
-    categories = Category.objects.all()
-    return render(request, 'category_list.html', {'categories': categories})
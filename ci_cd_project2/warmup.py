@@ -0,0 +1,110 @@
+"""Прогрів процесу перед прийомом трафіку.
+
+``warm_up()`` виконує те, за що інакше платили б перші запити кожного
+воркера:
+
+* компілює всі шаблони ``ci_cd_project2/templates`` – з кешованим
+  завантажувачем (settings_production) скомпільовані шаблони лишаються в
+  памʼяті процесу;
+* заповнює URL-резолвери (``reverse``/``resolve`` всіх маршрутів);
+* відкриває пул зʼєднань з БД і чекає на ``min_size`` зʼєднань (без пулу
+  лише перевіряє, що БД доступна).
+
+Викликається з gunicorn.conf.py (``post_worker_init`` – після завантаження
+застосунку, до першого запиту) і командою ``warmup``. Час кожного етапу
+записується в метрику ``django_warmup_duration_seconds``.
+"""
+
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.apps import apps
+from django.db import connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+from django.urls import NoReverseMatch, URLPattern, URLResolver, get_resolver, reverse
+
+from .metrics import WARMUP_BUCKETS, registry
+
+POOL_WAIT_TIMEOUT = 10
+
+
+@dataclass
+class WarmupReport:
+    # Етап -> секунди
+    timings: dict = field(default_factory=dict)
+    templates: int = 0
+    # (імʼя шаблону, помилка)
+    failed_templates: list = field(default_factory=list)
+    routes: int = 0
+    # Зʼєднань у пулах після прогріву
+    pooled_connections: int = 0
+
+
+def template_names():
+    root = Path(apps.get_app_config('ci_cd_project2').path) / 'templates'
+    return sorted(
+        path.relative_to(root).as_posix() for path in root.rglob('*') if path.suffix in ('.html', '.txt')
+    )
+
+
+def compile_templates(report):
+    for name in template_names():
+        try:
+            get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+            report.failed_templates.append((name, error))
+        else:
+            report.templates += 1
+
+
+def _named_routes(resolver, namespace=''):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            nested = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            yield from _named_routes(pattern, nested)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}{pattern.name}', pattern
+
+
+def populate_urls(report):
+    """Будує таблиці резолвера; маршрути без параметрів ще й розвʼязує."""
+    resolver = get_resolver()
+    resolver.reverse_dict  # noqa: B018 – властивість будує таблиці reverse
+    for name, pattern in _named_routes(resolver):
+        report.routes += 1
+        if pattern.pattern.regex.groups:
+            continue
+        try:
+            resolver.resolve(reverse(name))
+        except NoReverseMatch:
+            pass
+
+
+def open_databases(report):
+    for connection in connections.all():
+        connection.ensure_connection()
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            pool.wait(timeout=POOL_WAIT_TIMEOUT)
+            report.pooled_connections += pool.get_stats().get('pool_size', 0)
+        # З пулом зʼєднання повертається в пул. Без пулу воно привʼязане до
+        # потоку, а запити gthread обробляються в інших потоках – закриваємо.
+        # Усередині транзакції викликача (тести, команди) зʼєднання потрібне далі.
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def warm_up(databases=True):
+    """Прогріває процес; повертає ``WarmupReport``."""
+    report = WarmupReport()
+    stages = [('templates', compile_templates), ('urls', populate_urls)]
+    if databases:
+        stages.append(('databases', open_databases))
+    for stage, run in stages:
+        started = time.perf_counter()
+        run(report)
+        report.timings[stage] = time.perf_counter() - started
+        registry.observe('django_warmup_duration_seconds', {'stage': stage}, report.timings[stage], WARMUP_BUCKETS)
+    return report
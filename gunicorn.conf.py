@@ -0,0 +1,83 @@
+"""Конфігурація gunicorn (gunicorn підхоплює її з кореня проєкту сам).
+
+    gunicorn                         # WSGI: CI_CD_Project.wsgi, воркери gthread
+    SERVER_PROFILE=asgi gunicorn     # ASGI: CI_CD_Project.asgi, воркери uvicorn
+
+У профілі ASGI сторінки каталогу (home, good_detail, goods_by_category,
+category_list, notifications) – async view: поки один запит чекає на БД,
+воркер обслуговує інші зʼєднання. Решта view синхронні й виконуються
+в потоках. Запити до БД одного воркера обмежені пулом зʼєднань
+(DB_POOL_MAX_SIZE): з ASGI пул обовʼязковий, бо кожен запит отримує
+власний потік, а з ним і власне зʼєднання.
+
+Продакшен запускається з ``DJANGO_SETTINGS_MODULE=CI_CD_Project.settings_production``.
+Кожен воркер після завантаження застосунку і до першого запиту
+прогрівається (ci_cd_project2/warmup.py: шаблони, URL, пул БД) і пише в
+лог час холодного старту; ``GUNICORN_WARMUP=0`` вимикає прогрів.
+
+Метрики воркерів (/metrics) складаються через каталог ``METRICS_DIR``;
+за замовчуванням – ``.metrics`` поруч з цим файлом.
+
+Порівняння профілів під навантаженням – ``manage.py benchmark_serving``.
+"""
+
+import multiprocessing
+import os
+import time
+
+profile = os.getenv('SERVER_PROFILE', 'wsgi')
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+
+# Спільний каталог знімків метрик (ci_cd_project2/metrics.py): без нього /metrics
+# показував би лічильники лише того воркера, що відповів. Воркери успадковують
+# оточення майстра.
+os.environ.setdefault('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.metrics'))
+
+if profile == 'asgi':
+    wsgi_app = 'CI_CD_Project.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    # Один процес тримає багато зʼєднань – воркерів потрібно менше
+    workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() + 1))
+elif profile == 'wsgi':
+    wsgi_app = 'CI_CD_Project.wsgi:application'
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+else:
+    raise RuntimeError(f"SERVER_PROFILE: очікується wsgi або asgi, отримано {profile!r}")
+
+
+def on_starting(server):
+    # Знімки метрик попереднього запуску (ci_cd_project2/metrics.py): PID-и
+    # воркерів нового запуску інші, старі лічильники лише заважали б
+    metrics_dir = os.environ['METRICS_DIR']
+    if metrics_dir and os.path.isdir(metrics_dir):
+        for name in os.listdir(metrics_dir):
+            if name.startswith('metrics-'):
+                os.remove(os.path.join(metrics_dir, name))
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    # Застосунок уже завантажено (django.setup(), імпорт views, middleware)
+    from ci_cd_project2.metrics import WARMUP_BUCKETS, registry
+
+    loaded = time.perf_counter() - worker.forked_at
+    registry.observe('django_warmup_duration_seconds', {'stage': 'app'}, loaded, WARMUP_BUCKETS)
+    stages = [f'app {loaded:.3f} с']
+    if os.getenv('GUNICORN_WARMUP', '1') != '0':
+        from ci_cd_project2.warmup import warm_up
+
+        report = warm_up()
+        stages += [f'{stage} {seconds:.3f} с' for stage, seconds in report.timings.items()]
+        for name, error in report.failed_templates:
+            worker.log.error("Шаблон %s не компілюється: %s", name, error)
+    registry.flush(force=True)
+    worker.log.info("Воркер %s готовий за %.3f с (%s)",
+                    worker.pid, time.perf_counter() - worker.forked_at, ', '.join(stages))